@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Compact dtype schema of the contribution-level data (contribDB_all, merged_df_3, OUTPUT_1) used in main.py and outputs.py
+
+
+### LIBRARIES
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+#%%
+
+### SCHEMA
+
+# Low-cardinality codes, stored as categoricals
+# NOTE: 'district' and 'party' are kept out of the categoricals on purpose. They are keys of almost every
+# groupby in outputs.py and create_ext_vars.py, and grouping on a categorical (observed = False by default
+# in pandas < 2.1) would add empty district-cycle rows to the outputs
+CATEGORY_COLUMNS = [
+    # contributions
+    'seat', 'seat_x', 'seat_y',
+    'transaction.type',
+    'contributor.type',
+    'contributor.gender',
+    'contributor.district',
+    'election.type',
+    'recipient.name',
+    # recipients, repeated on every contribution of the candidate
+    'election', 'name', 'state', 'ico.status', 'cand.gender', 
+    'pwinner', 'gwinner', 'fec.cand.status', 'comtype', 'party.orig',
+    'nimsp.party', 'nimsp.candidate.ICO.code', 'nimsp.district', 'nimsp.office', 'nimsp.candidate.status',
+    # special elections, repeated on every contribution of the district
+    'spec_member', 'spec_party', 'cause_vacancy', 'death_cause', 
+    'spec_election_Congress', 'spec_election_Original_candidate', 'spec_election_Cause_of_vacancy',
+    'spec_Winner', 'Wiki_link_spec_member', 'original_district'
+    ]
+
+# Small integers (stored as float32 instead when the column has missing values, e.g. 'cycle' after MERGE 2)
+INTEGER_COLUMNS = {
+    'cycle': 'int16',
+    'party': 'int16',
+    'election_type_S': 'int8',
+    'treat_1': 'int8',
+    'treat_2': 'int8',
+    'treat_3': 'int8',
+    'btw_death_and_spec_1': 'int8',
+    'btw_death_and_spec_2': 'int8',
+    'btw_death_and_spec_3': 'int8'
+    }
+
+# Floats that do not need double precision: flags with missing values and day counts (whole numbers, exact in float32)
+# NOTE: 'amount' and the cfscores stay float64, since they are summed / averaged in the outputs, and so do the 
+# coordinates ('latitude', 'longitude' and 'gis.confidence'), whose values are exported in OUTPUT_1
+FLOAT32_COLUMNS = [
+    'later_than_special',
+    'days_to_nearest_death',
+    'abs_days_to_death'
+    ]
+
+#%%
+
+### FUNCTIONS
+
+def read_dtypes(columns):
+    """
+    dtype argument of pd.read_csv for the categorical columns among columns, so they are never parsed as strings.
+
+    Parameters:
+    -----------
+    columns : list
+        Columns that are read from the csv file
+
+    Returns:
+    --------
+    dict
+        {column: 'category'}
+    """
+    return {col: 'category' for col in columns if col in CATEGORY_COLUMNS}
+
+
+def apply_schema(df):
+    """
+    Convert the columns of df that are in the schema to their compact dtype, column by column.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contribution-level data
+
+    Returns:
+    --------
+    DataFrame
+        df with categoricals, small integers and float32 columns
+    """
+    df = df.copy(deep = False) # columns are replaced one at a time, the others are not copied
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        elif col in INTEGER_COLUMNS:
+            values = pd.to_numeric(df[col], errors = 'coerce')
+            if values.isna().any():
+                df[col] = values.astype('float32')
+            else:
+                df[col] = values.astype(INTEGER_COLUMNS[col])
+        elif col in FLOAT32_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors = 'coerce').astype('float32')
+
+    return df
+
+
+def concat_frames(frames):
+    """
+    Concatenate frames that follow the schema, keeping the categoricals
+    (pd.concat falls back to object when the categories of the frames differ).
+
+    Parameters:
+    -----------
+    frames : list of DataFrame
+        Frames with the same columns
+
+    Returns:
+    --------
+    DataFrame
+        Concatenated frame with a new RangeIndex
+    """
+    frames = [df.copy(deep = False) for df in frames]
+    if len(frames) == 0:
+        return pd.DataFrame()
+
+    for col in frames[0].columns:
+        if all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames):
+            categories = union_categoricals([df[col] for df in frames], ignore_order = True).categories
+            for df in frames:
+                df[col] = df[col].cat.set_categories(categories)
+
+    return pd.concat(frames, axis = 0, ignore_index = True)
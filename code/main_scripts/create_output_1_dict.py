@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Creating OUTPUT_1_dict, a dictionary of OUTPUT_1 variables, their description and their source
+
+
+### LIBRARIES
+
+import pandas as pd
+
+#%%
+
+# Manually creating dictionary of variables
+OUTPUT_1_dict = {
+
+    'date': {
+            'description': 'Transaction date of the contribution',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'district': {
+            'description': 'District code: two-letter state code followed by congressional district number. Used to merge various datasets',
+            'source': 'DIME data ; ChatGPT ; Wikipedia',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'transaction.id': {
+            'description': 'Unique ID for transaction',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'cycle': {
+            'description': 'Year of election cycle. Used to merge various datasets',
+            'source': 'DIME data ; ChatGPT ; Wikipedia',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'transaction.type': {
+            'description': 'FEC code for transaction type',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'amount': {
+            'description': 'Dollar amount of the contribution',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'bonica.cid': {
+            'description': 'A unique contributor ID assigned to each contributor (individual and organization)',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'contributor.name': {
+            'description': 'Complete name of contributor (last, first) ; suffix and title removed.',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'contributor.type': {
+            'description': 'Indicator of contributor type: individual (I) or organization (C)',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'contributor.gender': {
+            'description': 'Gender of contributor, if contributor is individual',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'recipient.name': {
+            'description': 'Name of the recipient candidate or committee',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'bonica.rid': {
+            'description': 'Unique ID for recipients. Used to merge various contribution datasets with recipients data',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'seat_x': {
+            'description': 'Elected office sought by candidate, as per the contributions data',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'election.type': {
+            'description': 'Type of election contribution is going towards: primary (P), general (G), special (S), runoff (R)',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'latitude': {
+            'description': 'Geographic latitude from where the contribution is coming from',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'longitude': {
+            'description': 'Geographic longitude from where the contribution is coming from',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'gis.confidence': {
+            'description': 'A measure of confidence of the accuracy of the GIS coordinates',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'contributor.district': {
+            'description': 'District of contributor only',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'contributor.cfscore': {
+            'description': 'Contributor’s ideal CFscore, as a measure of their political ideology or beliefs',
+            'source': 'DIME data',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'election': {
+            'description': 'Election cycle preceded by two-letter state code. Federal candidates have ’fd’ as the state code',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'fecyear': {
+            'description': 'Year listed by the FEC indicating the year of campaign’s the target election.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'name': {
+            'description': 'Name of the candidate/recipient',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'title': {
+            'description': 'Title of the candidate/recipient  (e.g. Mr., Mrs., Dr., Esq)',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'suffix': {
+            'description': 'Suffix of the candidate/recipient',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'party': {
+            'description': 'Party of the candidate/ recipient (100 = Dem, 200 = Rep, 328 = Ind)',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'state': {
+            'description': 'Two-letter state abbreviations',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'seat_y': {
+            'description': 'Elected office sought by candidate, as per the recipients data',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'ico.status': {
+            'description': 'Incumbency status. (I = Incumbent, C = Challenger, O = Open Seat Candidate, blank - not up for election).',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'cand.gender': {
+            'description': 'Candidate gender codings',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'recipient.cfscore': {
+            'description': 'Recipient’s CFscore, as a measure of their political ideology or beliefs, based on donations received',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'recipient.cfscore.dyn': {
+            'description': 'Period-specific estimates of ideology. (Candidate/recipient scores are re-estimated in each election cycle while holding contributor scores constant.)',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'dwdime': {
+            'description': 'Ideological measures for recipients',
+            'source': 'DIME data ; voteview.com',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12376 ; https://www.voteview.com/'
+            },
+
+    'dwnom1': {
+            'description': '(voteview.com) First dimension common-space DW-NOMINATE score. (Based on joint scaling of the 1st to the 117th Congresses.)',
+            'source': 'DIME data ; voteview.com',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12376 ; https://www.voteview.com/'
+            },
+
+    'dwnom2': {
+            'description': '(voteview.com) Second dimension common-space DW-NOMINATE score.',
+            'source': 'DIME data ; voteview.com',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12376 ; https://www.voteview.com/'
+            },
+
+    'ps.dwnom1': {
+            'description': '(voteview.com) First dimension Nokken-Poole period-specific DW-NOMINATE score. (Scores for the House and Senate are scaled separately and thus should not be directly compared.)',
+            'source': 'DIME data ; voteview.com',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12376 ; https://www.voteview.com/'
+            },
+
+    'ps.dwnom2': {
+            'description': '(voteview.com) Second dimension Nokken-Poole period-specific DW-NOMINATE score.',
+            'source': 'DIME data ; voteview.com',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12376 ; https://www.voteview.com/'
+            },
+
+    'irt.cfscore': {
+            'description': 'Estimates of ideology for recipients/candidates from IRT count-model applied to PAC data.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://doi.org/10.1111/ajps.12014'
+            },
+
+    'composite.score': {
+            'description': 'Composite ideological score for recipients, combining information from multiple sources',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'num.givers': {
+            'description': 'Number of distinct donors that gave to the candidate during a specific election cycle',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'num.givers.total': {
+            'description': 'Number of distinct donors that gave to the candidate/recipient aggregating over the candidate/recipient’s career.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.receipts': {
+            'description': 'Sum total of contributions raised during an election cycle',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.disbursements': {
+            'description': ' Sum total campaign disbursements during an election cycle.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.indiv.contribs': {
+            'description': 'Sum total of itemized contributions from individuals raised during an election cycle',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.unitemized': {
+            'description': 'Sum of unitemized contributions from individuals raised during an election cycle.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.pac.contribs': {
+            'description': 'Sum total contributions raised from contributions from PACs and other committees.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.party.contribs': {
+            'description': 'Sum total raised from party committees.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'total.contribs.from.candidate': {
+            'description': 'Sum total raised from candidate self-contributions.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'ind.exp.support': {
+            'description': 'Sum total independent expenditures made to support the candidate.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'ind.exp.oppose': {
+            'description': 'Sum total independent expenditures made to oppose the candidate.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'prim.vote.pct': {
+            'description': 'FEC reported vote share in primary election. Primary election outcomes are only coded for federal congressional candidates.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'pwinner': {
+            'description': 'Primary election outcome (’W’ = won election; ’L’ = lost election). Primary election outcomes are only coded for federal congressional candidates.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'gen.vote.pct': {
+            'description': 'FEC reported vote share in general election.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'gwinner': {
+            'description': '...',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    's.elec.stat': {
+            'description': 'FEC special election code (W = Win) (L = Lose).',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'r.elec.stat': {
+            'description': 'FEC run-off election code (W = Win) (L = Lose).',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'district.pres.vs': {
+            'description': 'District-level percentage of the two-party vote share won by the Democratic presidential nominee in the most recent (or concurrent) presidential election.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'fec.cand.status': {
+            'description': 'Indicates the status of the candidate’s campaign assigned by the FEC. (C = Statutory candidate; F = Statutory candidate for future election; N = Not yet a statutory candidate; P = Statutory candidate in prior cycle)',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'comtype': {
+            'description': 'FEC code for type of committee.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'ICPSR': {
+            'description': 'Adjusted ICPSR legislator ID. Candidates that have never served in Congress are assigned IDs based off of their candidate IDs assigned by the FEC, NIMSP, or state reporting agencies. The four-digit election cycle is appended to the ID. Candidates that are active in multiple election cycles (or file to run for multiple seats during a single election cycle) will appear multiple times. This variable provides a unique row identifier',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'ICPSR2': {
+            'description': 'Adjusted ICPSR legislator ID. Candidates that have never served in Congress are assigned IDs based off of their candidate IDs assigned by the FEC, NIMSP, or state reporting agencies. Party switchers are assigned new ICPSR2 IDs after switching parties. (See before.switch.ICPSR and after.switch.ICPSR.)',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'Cand.ID': {
+            'description': 'The candidate ID assigned by the FEC or state reporting agency.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'FEC.ID': {
+            'description': 'The committee ID assigned by the FEC or state reporting agency campaign committee.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'NID': {
+            'description': '(CRP/NIMSP) Unique candidate IDs assigned by the Center for Responsive Politics/National Institute for Money in State Politics.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'before.switch.ICPSR': {
+            'description': 'ICPSR ID prior to switching parties (included for party-switchers only).',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'after.switch.ICPSR': {
+            'description': 'ICPSR ID after switching parties (included for party-switchers only).',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'party.orig': {
+            'description': 'Original party before switch.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'nimsp.party': {
+            'description': '(nimsp) three-letter party code assigned by the NIMSP',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'nimsp.candidate.ICO.code': {
+            'description': '(nimsp) incumbency status assigned by the NIMSP.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'nimsp.district': {
+            'description': '(nimsp) district number assigned by the NIMSP.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'nimsp.office': {
+            'description': '(nimsp) state-office sought.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'nimsp.candidate.status': {
+            'description': '(nimsp) election outcome.',
+            'source': 'DIME data',
+            'origin_dataset': 'dime_recipients_1979_2024.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime'
+            },
+
+    'spec_election_year': {
+            'description': 'Year of special election, if special election occurred because of resignation or death of incumbent',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_cycle': {
+            'description': 'Election cycle year of special election, if special election occurred because of resignation or death of incumbent',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_member': {
+            'description': 'Full name of incumbent (candidate) that either resigned or passed away',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_party': {
+            'description': 'Party of incumbent (candidate) that either resigned or passed away',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'resign_date': {
+            'description': 'Date of resignation of incumbent (candidate), includes death dates as well. Note: Not retrieved for all candidates that resigned, but applies to all candidates that passed away.',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'death_date': {
+            'description': 'Date of death of incumbent (candidate). Note: Retrieved for all candidates that passed away.',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_election_date': {
+            'description': 'Date special election date was held in for district-cycle, following resignation or death of candidate. Note: Not retrieved for all candidates that resigned, but applies to all candidates that passed away.',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'cause_vacancy': {
+            'description': 'Cause of vacancy (Death or Resigned)',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'death_age': {
+            'description': 'Age of candidate when they passed away',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'death_cause': {
+            'description': 'Cause that led to death of candidate. Contains description that was used to construct death_unexpected',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'death_unexpected': {
+            'description': 'Dummy variable indicating if death of candidate was unexpected or not (1 if yes, 0 if not), based on the cause of the death.',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'resign_year': {
+            'description': 'Year of resignation or death. Note: Not retrieved for all candidates that resigned, but applies to all candidates that passed away.',
+            'source': 'ChatGPT and Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_election_Congress': {
+            'description': 'Number of congress election was held retrieved at from Wikipedia page. Note: not retrieved for all candidates.',
+            'source': 'Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_election_Original_candidate': {
+            'description': 'Number of original candidate retrieved from Wikipedia page. Note: not retrieved for all candidates.',
+            'source': 'Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_election_Cause_of_vacancy': {
+            'description': 'Cause of vacancy retrieved from Wikipedia page. Note: not retrieved for all candidates.',
+            'source': 'Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'spec_Winner': {
+            'description': 'Winner of special elections, retrieved from Wikipedia page. Note: not retrieved for all candidates.',
+            'source': 'Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'original_district': {
+            'description': 'District of candidate retrieved from Wikipedia. Note: not retrieved for all candidates.',
+            'source': 'Wikipedia',
+            'origin_dataset': 'special_elections_final.csv',
+            'relevant_URLs': 'https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'election_date_in_cycle': {
+            'description': 'Date of the general election held at that election cycle. Used to enhance logic of treatment variables',
+            'source': 'ChatGPT',
+            'origin_dataset': 'election_dates.csv',
+            'relevant_URLs': ''
+            },
+
+    'later_than_special': {
+            'description': 'Dummy variable that indicates if a contribution in the same cycle of the death came later than the date of the special election (1), or earlier (0). Missing value indicates special elections did not occur in that specific district-cycle (we know if a special election happened in that district-cycle if the DIME contributions and recipients data is merged with the special_elections data).',
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'election_type_S': {
+            'description': "Dummy variable that indicates if a contribution is going towards a special election, as indicated by Bonica's election.type variable. Gets value 1 if election.type == 'S', else 0 (belongs to G, P, or R).",
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'days_to_nearest_death': {
+            'description': 'Counts the number of days between the contribution date and the date of the nearest death in the district',
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'abs_days_to_death': {
+            'description': 'Absolute value of days_to_nearest_death',
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'treat_1': {
+            'description': "First dummy we use to measure the impact of the death of an incumbent on contributions. For single death districts, we assign values of 0 before death of the incumbent, and 1 after death (based on whether the contribution is coming before or after death_date). For multiple death districts, we assume first death is the only death, hence we assign 0 to all contributions coming before the first death of an incumbent in that district's history, and 1 to contributions coming after the death.",
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            },
+
+    'treat_2': {
+            'description': "Second dummy we use to measure the impact of the death of an incumbent on contributions. For single death districts, we repeat the logic we used for these districts in treat_1. For multiple death districts, we assign 0 to all contributions coming before the first death of an incumbent in that district's history, 1 to contributions coming after the first death up until the end of the election cycle in which the special elections happened. In the new election cycle the values are set back to 0. This is repeated for the second death, and all other deaths.",
+            'source': 'Author (from merged datasets)',
+            'origin_dataset': 'contribDB_1980.csv to contribDB_2024.csv ; dime_recipients_1979_2024.csv ; special_elections_final.csv, election_dates.csv',
+            'relevant_URLs': 'https://data.stanford.edu/dime ; https://en.wikipedia.org/wiki/List_of_special_elections_to_the_United_States_House_of_Representatives'
+            }
+    }
+
+rows = []
+for var_name, attributes in OUTPUT_1_dict.items():
+    rows.append({
+        'variable_name': var_name,
+        'description': attributes['description'],
+        'source': attributes['source'],
+        'origin_dataset': attributes['origin_dataset'],
+        'relevant_URLs': attributes['relevant_URLs'],
+    })
+
+OUTPUT_1_dict_df = pd.DataFrame(rows)
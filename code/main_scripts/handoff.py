@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Binary hand-off of OUTPUT_1 and OUTPUT_1_recipients from main.py to outputs.py. The datasets are saved
+## as Parquet files, which keep the dtypes of main.py (dates, categoricals and small integers, see contrib_schema.py)
+## and are memory-mapped when read, instead of being written to csv and parsed again
+
+
+### LIBRARIES
+
+import os
+import pandas as pd
+
+from contrib_schema import read_dtypes, apply_schema
+
+# pyarrow is only needed for the Parquet files, without it the datasets are handed off as csv files
+try:
+    import pyarrow # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+#%%
+
+### FUNCTIONS
+
+def write_handoff(df, folder, name, csv = False):
+    """
+    Save a dataset as {folder}/{name}.parquet, and as {folder}/{name}.csv if csv is True.
+
+    The csv file is also written when the Parquet file cannot be (pyarrow not installed, or a column Arrow
+    cannot store), so that read_handoff always finds the dataset. A Parquet file of an earlier run is
+    removed in that case, so it is never read instead of the new csv file.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Dataset to save (its index is not saved)
+    folder : str
+        Folder of the files
+    name : str
+        Name of the files, without extension
+    csv : bool, optional
+        Whether to also save the csv file
+
+    Returns:
+    --------
+    list
+        Paths of the files written
+    """
+    parquet_path = os.path.join(folder, f"{name}.parquet")
+    csv_path = os.path.join(folder, f"{name}.csv")
+    written = []
+
+    if PYARROW_AVAILABLE:
+        tmp_path = parquet_path + '.tmp'
+        try:
+            df.to_parquet(tmp_path, engine = 'pyarrow', index = False)
+            os.replace(tmp_path, parquet_path)
+            written.append(parquet_path)
+        except Exception as e: # e.g. a column with mixed types that Arrow cannot store
+            print(f"Warning: could not save {name}.parquet, saving {name}.csv instead: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    else:
+        print(f"Warning: pyarrow is not installed, saving {name}.csv instead of {name}.parquet")
+
+    if parquet_path not in written:
+        if os.path.exists(parquet_path):
+            os.remove(parquet_path)
+        csv = True
+
+    if csv:
+        df.to_csv(csv_path, index = False)
+        written.append(csv_path)
+
+    return written
+
+
+def read_handoff(folder, name, memory_map = True):
+    """
+    Read a dataset saved by write_handoff: {folder}/{name}.parquet if it exists (and pyarrow is installed),
+    otherwise {folder}/{name}.csv. The compact dtypes of contrib_schema.py are applied in both cases.
+
+    Parameters:
+    -----------
+    folder : str
+        Folder of the files
+    name : str
+        Name of the files, without extension
+    memory_map : bool, optional
+        Whether to memory-map the Parquet file
+
+    Returns:
+    --------
+    DataFrame
+    """
+    parquet_path = os.path.join(folder, f"{name}.parquet")
+    csv_path = os.path.join(folder, f"{name}.csv")
+
+    if PYARROW_AVAILABLE and os.path.exists(parquet_path):
+        print(f"-> Reading {name}.parquet")
+        df = pd.read_parquet(parquet_path, engine = 'pyarrow', memory_map = memory_map)
+    else:
+        print(f"-> Reading {name}.csv")
+        df = pd.read_csv(
+            csv_path,
+            encoding = 'latin-1',
+            dtype = read_dtypes(pd.read_csv(csv_path, encoding = 'latin-1', nrows = 0).columns)
+            )
+    return apply_schema(df)
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Builders of the contribution-level datasets of main.py (OUTPUT_1 and OUTPUT_1_recipients), from the
+## contributions, recipients, special elections and election dates. Every function takes its datasets and returns a
+## dataset without writing any file or showing any plot: main.py reads the inputs, saves the outputs and shows the plots
+## of the treatments (see plot_treatments.py), and pipeline.py keeps everything in memory.
+
+
+### LIBRARIES
+
+import os
+import pandas as pd
+import numpy as np
+
+from contrib_schema import apply_schema
+from special_elections_index import build_special_elections_index, merge_nearest_special_election
+from treatment_windows import assign_treatments, btw_death_and_spec_flags
+
+#%%
+
+### SETUP
+
+# Columns read from the recipients data, excluding columns:
+#    'lname', 'ffname', 'fname', 'mname',
+#    'bonica.cid',     CONFUSED WITH THE CONTRIBUTIONS DATA
+#    'distcyc', 'contributor.cfscore',
+#    'recipient.type', NOT NEEDED IF FILTERED FOR FEDERAL:HOUSE
+#    'igcat',          TOO MANY MISSING VALUES
+#    .
+RECIPIENTS_COLUMNS = [
+    'election', 'cycle', 'fecyear', 'bonica.rid', 'name',
+    'title', 'suffix', 'party',
+    'state', 'seat', 'district', 'ico.status', 'cand.gender',
+
+    'recipient.cfscore', 'recipient.cfscore.dyn',
+    'dwdime', 'dwnom1', 'dwnom2', 'ps.dwnom1', 'ps.dwnom2', 'irt.cfscore',
+    'composite.score',
+
+    'num.givers', 'num.givers.total', 'total.receipts',
+    'total.disbursements', 'total.indiv.contribs', 'total.unitemized',
+    'total.pac.contribs', 'total.party.contribs',
+    'total.contribs.from.candidate',
+
+    'ind.exp.support', 'ind.exp.oppose',
+    'prim.vote.pct', 'pwinner', 'gen.vote.pct', 'gwinner', 's.elec.stat',
+    'r.elec.stat', 'district.pres.vs', 'fec.cand.status',
+
+    'comtype', 'ICPSR', 'ICPSR2', 'Cand.ID', 'FEC.ID', 'NID',
+    'before.switch.ICPSR', 'after.switch.ICPSR', 'party.orig',
+    'nimsp.party', 'nimsp.candidate.ICO.code', 'nimsp.district',
+    'nimsp.office', 'nimsp.candidate.status'
+    ]
+
+#%%
+
+### INPUTS
+
+def read_recipients(data_folder):
+    """
+    Read the recipients data (INPUT 2).
+
+    Parameters:
+    -----------
+    data_folder : str
+        Folder of dime_recipients_1979_2024.csv
+
+    Returns:
+    --------
+    DataFrame
+        recipients, with the columns RECIPIENTS_COLUMNS
+    """
+    print("Reading recipients data...")
+    return pd.read_csv(
+        os.path.join(data_folder, "dime_recipients_1979_2024.csv"),
+        encoding='latin-1',
+        usecols = RECIPIENTS_COLUMNS
+        )
+
+
+def filter_recipients(recipients):
+    """
+    Keep the candidates to the House of Representatives, with a numeric party.
+
+    Parameters:
+    -----------
+    recipients : DataFrame
+        Output of read_recipients
+
+    Returns:
+    --------
+    DataFrame
+    """
+    recipients = recipients[recipients['seat'] == 'federal:house']
+
+    recipients['party'] = pd.to_numeric(recipients['party'], errors='coerce')  # need to use here as well, since some numbers were saved as string
+
+    return recipients
+
+
+def fix_recipient_districts(recipients):
+    """
+    Fix the districts of candidates with a district of less than four characters (or no district), and drop the
+    candidates that are left without a district.
+
+    Parameters:
+    -----------
+    recipients : DataFrame
+        Output of filter_recipients
+
+    Returns:
+    --------
+    tuple
+        (recipients, recp_short_dist_problem, recp_short_dist_solved): the fixed recipients, and the rows of the
+        candidates with a short district before and after the fixes
+    """
+    short_districts = []
+    for dist in recipients['district'].unique():
+        if isinstance(dist, str) and len(dist) < 4:
+            print("Districts that are less than four characters:")
+            print(dist)
+            short_districts.append(dist)
+        elif not isinstance(dist, str):
+            print("Non-string district value:")
+            print(dist)
+            short_districts.append(dist)
+
+    recp_short_dist = recipients[recipients['district'].isin(short_districts)]
+    recp_short_dist_problem = recp_short_dist.copy()
+
+    # Manually replacing values
+    rec_dist_dict = {
+        # Included candidates means they ran for House of Rep in this cycle; if excluded, they did run (e.g. ran for Governor)
+        "bonior, david e": {"district": "MI10", "cycle": 2002},
+        "holloway, clyde c": {"district": "LA08", "cycle": 2004},
+        "jefferson, william j": {"district": "LA02", "cycle": 2000},
+        "clayburgh, rick": {"district": "ND01", "cycle": 2004},
+        "morenoff, dan": {"district": np.nan, "cycle": 2012},    # needs to be dropped, Texas house of reps, not US (represented District 114)
+        "ross, michael p": {"district": np.nan, "cycle": 2012},    # needs to be dropped, decided not to run
+        "rainwater, marilyn": {"district": "OK01", "cycle": 2014},
+        "vivoni, miguel hernandez": {"district": "PR01", "cycle": 2014},
+        "colantuono, thomas p": {"district": "NH01", "cycle": 2000},
+        "lindbeck, steve": {"district": "AK01", "cycle": 2016},
+        "hunkin finau, vaitinasa salu": {"district": "AS01", "cycle": 2016},
+        "whalen iii, john j": {"district": "DE01", "cycle": 2024}
+    }
+
+    for name, data in rec_dist_dict.items():
+        # Updating recp_short_dist
+        mask_short = (recp_short_dist['name'].str.contains(name, case=False, na=False) &
+                     (recp_short_dist['cycle'] == data['cycle']))
+        recp_short_dist.loc[mask_short, 'district'] = data['district']
+
+        # Updating recipients dataframe
+        mask_recipients = (recipients['name'].str.contains(name, case=False, na=False) &
+                           (recipients['cycle'] == data['cycle']))
+        recipients.loc[mask_recipients, 'district'] = data['district']
+
+
+    recipients = recipients[~recipients['district'].isna()]
+    recipients = apply_schema(recipients)
+
+    return recipients, recp_short_dist_problem, recp_short_dist
+
+#%%
+
+### MERGING DATASETS
+
+def merge_inputs(contribDB_all, recipients, special_elections, election_dates_df):
+    """
+    Merge the contributions with the recipients (MERGE 1), the special election with the nearest death in their
+    district (MERGE 2) and the election dates of their cycle (MERGE 3).
+
+    Parameters:
+    -----------
+    contribDB_all : DataFrame
+        Contributions (INPUT 1, see read_contribDB.py)
+    recipients : DataFrame
+        Output of fix_recipient_districts
+    special_elections : DataFrame
+        special_elections_final.csv (INPUT 3, see convert_html_to_csv.py)
+    election_dates_df : DataFrame
+        election_dates.csv (INPUT 4)
+
+    Returns:
+    --------
+    DataFrame
+        merged_df_3
+    """
+    ## MERGE 1: Contributions dataset (Input 1) with recipients dataset (Input 2) using id (“bonica.rid”) and “cycle” as keys
+    print("\n")
+    print("*" * 30)
+    print("\nMERGE 1: Merging contributions and recipients data...")
+    merged_df_1 = pd.merge(
+        contribDB_all,
+        recipients,
+        on=['bonica.rid', 'cycle'],
+        how='inner'                  # only keep matching rows (use option 'outer' to keep unmatched rows as well)
+    )
+
+    # check how many rows were matched (the sum of these two should match to the total!)
+    nonna_rows = len(merged_df_1[~merged_df_1['name'].isna()])
+    na_rows = len(merged_df_1[merged_df_1['name'].isna()])
+    print("Total number of rows in merged_df_1 =", len(merged_df_1))
+    print("  - Number of merged rows", nonna_rows)
+    print("  - Number of missing rows:", na_rows)
+
+
+    ## MERGE 2: Merged dataset from MERGE 1 and special_elections using 'district' (do not drop all observations)
+    # Rather than an outer merge on 'district', which gives one row per contribution and special election in its district
+    # (only the one with the nearest death is kept later on), each contribution looks up the special election with the nearest
+    # death in a district-keyed index (see main_scripts/special_elections_index.py). Unmatched rows are kept, as in the outer merge.
+    print("\n")
+    print("*" * 30)
+    print("\nMERGE 2: Merging with special elections data...")
+    special_elections_index = build_special_elections_index(special_elections)
+    merged_df_2 = merge_nearest_special_election(
+        merged_df_1,
+        special_elections,
+        special_elections_index
+    )
+
+    # check how many rows were matched (the sum of these two should match to the total!)
+    nonna_rows = len(merged_df_2[~merged_df_2['spec_member'].isna()])
+    na_rows = len(merged_df_2[merged_df_2['spec_member'].isna()])
+    print("Total number of rows in merged_df_2 =", len(merged_df_2))
+    print("  - Number of merged rows", nonna_rows)
+    print("  - Number of missing rows:", na_rows)
+
+
+    ## MERGE 3: Get election datasets (used for creating treatment dummies and dealing with complex districts)
+    print("\n")
+    print("*" * 30)
+    print("\nMERGE 3: Merging with election dates...")
+    merged_df_3 = pd.merge(
+        merged_df_2,
+        election_dates_df,
+        on='cycle',
+        how='left'
+    )
+
+    # check how many rows were matched (the sum of these two should match to the total!)
+    nonna_rows = len(merged_df_3[~merged_df_3['election_date_in_cycle'].isna()])
+    na_rows = len(merged_df_3[merged_df_3['election_date_in_cycle'].isna()])
+    print("Total number of rows in merged_df_3 =", len(merged_df_3))
+    print("  - Number of merged rows", nonna_rows)
+    print("  - Number of missing rows:", na_rows) # unmatched row because district not in merged_df_1!
+
+    # 'cycle' has missing values after MERGE 2, so it is stored as float32
+    merged_df_3 = apply_schema(merged_df_3)
+
+    return merged_df_3
+
+#%%
+
+### CREATING NEW VARIABLES
+
+# - later_than_special
+# - days_to_nearest_death
+# - treat_1, treat_2, and treat_3
+# - btw_death_and_spec_1, btw_death_and_spec_2, and btw_death_and_spec_3
+
+def add_later_than_special(merged_df_3):
+    """
+    Dates of merged_df_3, later_than_special and election_type_S.
+
+    Parameters:
+    -----------
+    merged_df_3 : DataFrame
+        Output of merge_inputs
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## 1. later_than_special
+
+    ## New dummy variable: “later_than_special”, =1 if the contribution is given in the same cycle of the death, but later than the special election (date of contribution is later than date of special election in that cycle).
+
+    merged_df_3['cycle'] = pd.to_numeric(merged_df_3['cycle'], errors='coerce')  # will convert None values to NaN
+    merged_df_3['date'] = pd.to_datetime(merged_df_3['date'], errors = 'coerce') # need to use errors = 'coerce' to include incorrect dates
+    merged_df_3['spec_election_date'] = pd.to_datetime(merged_df_3['spec_election_date'], errors = 'coerce') # need to use errors = 'coerce' to include incorrect dates
+    merged_df_3['resign_date'] = pd.to_datetime(merged_df_3['resign_date']) # no errors here, because these dates were created manually in special_elections.csv!
+    merged_df_3['death_date'] = pd.to_datetime(merged_df_3['death_date']) # no errors here, because these dates were created manually in special_elections.csv!
+    # merged_df_3['gen_elect_date'] = pd.to_datetime(merged_df_3['gen_elect_date']) # no errors here, because these dates were created manually in special_elections.csv!
+    merged_df_3['spec_gen_elect_date'] = pd.to_datetime(merged_df_3['spec_gen_elect_date']) # no errors here, because these dates were created manually in special_elections.csv!
+    merged_df_3['death_gen_elect_date'] = pd.to_datetime(merged_df_3['death_gen_elect_date']) # no errors here, because these dates were created manually in special_elections.csv!
+    merged_df_3['election_date_in_cycle'] = pd.to_datetime(merged_df_3['election_date_in_cycle']) # no errors here, because these dates were created manually in election_dates.csv!
+
+
+    merged_df_3['later_than_special'] = np.nan  # Initialize with zeros, districts that did not have special elections simply receive a zero
+
+
+    mask1 = (
+        # Filtering for within election cycle, in terms of years between spec_election_date and year
+        # (merged_df_3['date'] <= merged_df_3['spec_election_date'] + pd.DateOffset(months=6)) &
+        # (merged_df_3['date'] < merged_df_3['election_date_in_cycle']) &
+        (merged_df_3['cycle'] == merged_df_3['spec_cycle']) &
+        # Main condition!
+        (merged_df_3['date'] > merged_df_3['spec_election_date'])
+    )
+
+
+    mask0 = (
+        # Filtering for within election cycle, in terms of years between spec_election_date and year
+        # (merged_df_3['date'] <= merged_df_3['spec_election_date'] + pd.DateOffset(months=6)) &
+        # (merged_df_3['date'] < merged_df_3['election_date_in_cycle']) &
+        (merged_df_3['cycle'] == merged_df_3['spec_cycle']) &
+        # Main condition!
+        (merged_df_3['date'] <= merged_df_3['spec_election_date'])
+    )
+
+
+
+    # Apply the mask and handle NaN values in spec_election_date (keep as 0)
+    merged_df_3.loc[mask1, 'later_than_special'] = 1
+    merged_df_3.loc[mask0, 'later_than_special'] = 0
+    merged_df_3.loc[merged_df_3['spec_election_date'].isna(), 'later_than_special'] = np.nan
+
+    print("Value counts for later than special:")
+    print(merged_df_3['later_than_special'].value_counts())
+    print(f"Types of election for later_than_special == 0 (total observations: {len(merged_df_3[merged_df_3['later_than_special'] == 0])})")
+    print(merged_df_3[merged_df_3['later_than_special'] == 0]['election.type'].value_counts())
+    print(f"Types of election for later_than_special == 1 (total observations: {len(merged_df_3[merged_df_3['later_than_special'] == 1])})")
+    print(merged_df_3[merged_df_3['later_than_special'] == 1]['election.type'].value_counts())
+    print()
+
+    # Creating variable for election.type == 'S'
+    merged_df_3['election_type_S'] = 0
+    merged_df_3.loc[merged_df_3['election.type'] == 'S', 'election_type_S'] = 1
+
+    print("Value counts for election_type_S:")
+    print(merged_df_3['election_type_S'].value_counts())
+    print()
+    print("Contributions going to special elections before special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] < merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] < merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+    print("Contributions going to special elections on special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] == merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] == merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+    print("Contributions going to special elections after special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] > merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] > merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+
+
+    # Discrepancy! The contributions going to special elections according to Bonica's raw data are mostly coming before the special election date, although some
+    print()
+    # print("Number of contributions going to special elect")
+
+    return merged_df_3
+
+
+def print_district_summary(merged_df_3, district_cycle_deaths, district):
+    """Print the deaths of a district and its contributions nearest to them"""
+    print("\nExample of multiple deaths in a district:")
+    print(f"\nDeaths in district {district}:")
+    print(district_cycle_deaths[district_cycle_deaths['district'] == district][['cycle', 'death_date']].sort_values('cycle'))
+    print("\nSample contributions and their days to nearest death:")
+    print("First 10 contributions:")
+    print(merged_df_3[(merged_df_3['district'] == district) & (merged_df_3['days_to_nearest_death'].notna())][['cycle', 'date', 'amount', 'death_date', 'days_to_nearest_death']].sort_values('date').head(10))
+    print("\nLast 10 contributions:")
+    print(merged_df_3[(merged_df_3['district'] == district) & (merged_df_3['days_to_nearest_death'].notna())][['cycle', 'date', 'amount', 'death_date', 'days_to_nearest_death']].sort_values('date').tail(10))
+    print()
+    print("=" * 20)
+    print()
+
+
+def add_days_to_nearest_death(merged_df_3):
+    """
+    Keep the special election with the nearest death of each contribution, with days_to_nearest_death and
+    abs_days_to_death.
+
+    Parameters:
+    -----------
+    merged_df_3 : DataFrame
+        Output of add_later_than_special
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## 2. days_to_nearest_death
+
+    ## For each contribution in a district where an incumbent died:
+
+    #   2. Create a variable “days_to_nearest_death” which counts the number of days between the contribution (variable date in Input 1 dataset) and the date of the nearest death in the district (from Input 3 dataset)
+    #      - <0 for contributions earlier than death, >0 for contributions later than death
+    #      - Be careful! There are districts where more than one incumbent died (here, “nearest” death is key!)
+
+
+
+    # For each district-cycle combination, find all death dates
+    district_cycle_deaths = merged_df_3[merged_df_3['spec_member'].notna()][
+        ['district', 'cycle', 'death_date']].drop_duplicates()
+
+    # Days to nearest death and its absolute value were computed in MERGE 2, by a binary search of each contribution's date
+    # in the sorted death dates of its district (see main_scripts/special_elections_index.py). Moving them here keeps the order of columns
+    merged_df_3['days_to_nearest_death'] = merged_df_3.pop('days_to_nearest_death')
+    merged_df_3['abs_days_to_death'] = merged_df_3.pop('abs_days_to_death')
+    # Then, we sort by some variables, as well as absolute death, which brings up the contributions closest to death dates first
+
+    duplicate_columns = ['cycle', 'date', 'transaction.id', 'abs_days_to_death']
+    merged_df_3 = merged_df_3.sort_values(
+        by=duplicate_columns,
+        ascending=[True, True, True, True]  # 4 values to match the 4 columns
+    )
+
+
+    # Now keep only the first occurrence of each unique contribution (closest to death)
+    # This allows us to have unique rows for each contributions (rather than duplicates), even for problematic rows
+    merged_df_3 = merged_df_3.drop_duplicates(
+        subset=['cycle', 'date', 'transaction.id'],
+        keep='first'
+    )
+
+
+    print("Value counts for later than special (AFTER DROPPING DUPLICATES):")
+    print(merged_df_3['later_than_special'].value_counts())
+    print(f"Types of election for later_than_special == 0 (total observations: {len(merged_df_3[merged_df_3['later_than_special'] == 0])})")
+    print(merged_df_3[merged_df_3['later_than_special'] == 0]['election.type'].value_counts())
+    print(f"Types of election for later_than_special == 1 (total observations: {len(merged_df_3[merged_df_3['later_than_special'] == 1])})")
+    print(merged_df_3[merged_df_3['later_than_special'] == 1]['election.type'].value_counts())
+    print()
+    print("Value counts for election_type_S (AFTER DROPPING DUPLICATES):")
+    print(merged_df_3['election_type_S'].value_counts())
+    print()
+    print("Contributions going to special elections before special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] < merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] < merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+    print("Contributions going to special elections on special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] == merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] == merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+    print("Contributions going to special elections after special elections date:", len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] > merged_df_3['spec_election_date'])]),
+          f"(Percent of total: {round(100 * len(merged_df_3[(merged_df_3['election_type_S'] == 1) & (merged_df_3['date'] > merged_df_3['spec_election_date'])]) / len(merged_df_3[merged_df_3['election_type_S'] == 1]), 2)}%)")
+
+    # Checking for later_than_special masked rows
+    print("Nr of districts with contributions that either have later_than_special == 0:", merged_df_3[merged_df_3['later_than_special'] == 0]['district'].nunique())
+    print("Nr of districts with contributions that either have later_than_special == 1:", merged_df_3[merged_df_3['later_than_special'] == 1]['district'].nunique())
+    print("Nr of districts with contributions that either have later_than_special == 1 or == 0:", merged_df_3[(merged_df_3['later_than_special'] == 0) | (merged_df_3['later_than_special'] == 1)]['district'].nunique())
+    print("Total nr of districts in data that have special election:", merged_df_3[~merged_df_3['spec_election_date'].isna()]['district'].nunique())
+    print("Total nr of districts in data:", merged_df_3['district'].nunique())
+
+    # Verify results with some examples
+
+    # Print examples
+    print("\nSINGLE DEATH DISTRICT:")
+    print_district_summary(merged_df_3, district_cycle_deaths, "AL03")
+    print("\nMULTIPLE DEATH DISTRICT:")
+    print_district_summary(merged_df_3, district_cycle_deaths, "TX18")
+
+    return merged_df_3
+
+
+def add_treatments(merged_df_3, special_elections):
+    """
+    treat_1, treat_2 and treat_3.
+
+    Parameters:
+    -----------
+    merged_df_3 : DataFrame
+        Output of add_days_to_nearest_death
+    special_elections : DataFrame
+        special_elections_final.csv (INPUT 3)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## 3. treat_1, treat_2 and treat_3
+
+    ## For each contribution in a district where an incumbent died:
+
+    #   3. Create two dummy variable "treatment",
+    #      - treat_1: simple case.
+    #        -> For single death districts, assign values 0 before death, 1 after death.
+    #        -> For multiple death districts, we assume first death is the only one.
+    #      - treat_2: complex case.
+    #        -> For single death districts, repeats logic from treat_1.
+    #        -> For multiple death districts, we assign 0 before death, 1 after death, and then reset to 0 after election_cycle, and repeat until next death.
+
+    # NOTE: these are used in the OUTPUTS later
+    special_elections_districts = special_elections.groupby('district')['spec_member'].nunique().reset_index()
+    death_counts = special_elections[special_elections['cause_vacancy'] == 'Death'].groupby('district')['spec_member'].nunique().reset_index()
+    death_counts_unique = special_elections[special_elections['cause_vacancy'] == 'Death']
+    single_death_districts = death_counts[death_counts['spec_member'] == 1]['district'].tolist()
+    multiple_death_districts = death_counts[death_counts['spec_member'] > 1]['district'].tolist()
+    no_death_districts = special_elections[special_elections['cause_vacancy'] == 'Resigned'].groupby('district')['spec_member'].nunique().reset_index()
+    no_death_districts_unique = special_elections[special_elections['cause_vacancy'] == 'Resigned']
+
+    print("Total number of districts with special elections", len(special_elections_districts))
+    print("Total number of districts with one death", len(single_death_districts))
+    print("Total number of districts with multiple deaths", len(multiple_death_districts))
+    print("Nr of districts with resignations", len(no_death_districts))
+    print()
+    print("Total number of deaths:", len(death_counts_unique))
+    print("Total number of resignations:", len(no_death_districts_unique))
+
+    # Create treat_1 (simple case), treat_2 (complex case) and treat_3 (single death districts only treated within same cycle,
+    # multiple district logic is the same as treat_2), with one interval join of the contributions on the treatment windows
+    # [death_date, next election) of their district
+    # Get all election dates, so that we know when a reset of values happens
+    election_dates = merged_df_3['election_date_in_cycle'].dropna().unique()
+    treatments = assign_treatments(merged_df_3, single_death_districts, multiple_death_districts, election_dates)
+    for treatment in ['treat_1', 'treat_2', 'treat_3']:
+        merged_df_3[treatment] = treatments[treatment]
+    del treatments
+
+    print("Value counts for treat_1, treat_2 and treat_3:")
+    print(merged_df_3[['treat_1', 'treat_2', 'treat_3']].apply(pd.Series.value_counts))
+
+    return merged_df_3
+
+
+def add_btw_death_and_spec(merged_df_3):
+    """
+    btw_death_and_spec_1, btw_death_and_spec_2 and btw_death_and_spec_3.
+
+    Parameters:
+    -----------
+    merged_df_3 : DataFrame
+        Output of add_treatments
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## 4. btw_death_and_spec_1, btw_death_and_spec_2, and btw_death_and_spec_3
+
+    # Create btw_death_and_spec_1, _2 and _3 (treat_X = 1 AND date between death_date and spec_election_date)
+    btw_death_and_spec = btw_death_and_spec_flags(merged_df_3)
+    for btw in ['btw_death_and_spec_1', 'btw_death_and_spec_2', 'btw_death_and_spec_3']:
+        merged_df_3[btw] = btw_death_and_spec[btw]
+    del btw_death_and_spec
+
+    # Compact dtypes for the new flags and day counts
+    merged_df_3 = apply_schema(merged_df_3)
+    print("Memory usage of merged_df_3 (MB):", round(merged_df_3.memory_usage(deep = True).sum() / 1e6, 1))
+
+    return merged_df_3
+
+#%%
+
+### OUTPUTS
+
+def build_output_1(merged_df_3):
+    """
+    OUTPUT_1: contribution-day level dataset, one row per contribution and district.
+
+    Parameters:
+    -----------
+    merged_df_3 : DataFrame
+        Output of add_btw_death_and_spec
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## OUTPUT 1: contribution-day level dataset
+    print("Processing OUTPUT_1...")
+
+    # Important to know that we have multiple merged rows for districts that have multiple deaths
+    # Solution for entire datset (dealing with districts that have multiple deaths)
+
+    output_1 = merged_df_3.sort_values(
+        ['transaction.id', 'district', 'days_to_nearest_death']
+    ).drop_duplicates(
+        subset=['transaction.id', 'district'],
+        keep='first'
+    )
+
+
+    duplicate_columns = ['cycle', 'date', 'bonica.cid', 'bonica.rid', 'abs_days_to_death', 'spec_member']
+
+    # Finding what rows are being dropped
+    dropped_indices = set(merged_df_3.index) - set(output_1.index)
+    dropped_rows = merged_df_3.loc[list(dropped_indices)]
+    dropped_rows_CA05 = dropped_rows[dropped_rows['district'] == 'CA05']
+
+    # Using duplicates function
+    duplicates = merged_df_3[merged_df_3.duplicated(subset=['transaction.id', 'district'], keep=False)]
+
+    # Checking
+    print(f"Number of transactions with duplicates: {duplicates['transaction.id'].nunique()}")
+    print(dropped_rows['transaction.id'].nunique(), "... should be same number as above")
+
+
+    # Note: duplicates are because some values are different for the same contribution but different values in the 'recepients' data. Districts are NAN
+    print(f"Districts that have these duplicates: {duplicates['district'].unique()}")
+
+
+    # Sort the rows by date and transaction.id
+    sort_vars = ['date', 'district', 'transaction.id', 'cycle']
+    output_1 = output_1.sort_values(sort_vars)
+    # Reorder columns to put date and transaction.id first
+    cols = sort_vars + [col for col in output_1.columns if col not in sort_vars]
+    output_1 = output_1[cols]
+
+    return output_1
+
+
+def build_output_1_recipients(output_1):
+    """
+    OUTPUT_1_recipients: recipient-cycle level dataset.
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        Output of build_output_1
+
+    Returns:
+    --------
+    DataFrame
+    """
+    ## OUTPUT_1_recipients: recipient-cycle level dataset
+    print("Processing OUTPUT_1_recipients...")
+
+    # Candidate-level variables (vote shares and cfscores from the recipients data) are repeated on every contribution
+    # of the candidate. outputs.py uses this much smaller table for them (OUTPUT_6_2 and OUTPUT_9) instead of OUTPUT_1.
+    # One row per bonica.rid, cycle and district (or per version of the candidate's row, when the recipients data has
+    # several for the same cycle), in the order of their first contribution in OUTPUT_1, so that keeping the first row
+    # of each bonica.rid and cycle gives the same rows as in OUTPUT_1. election.type is that of the first contribution.
+    recipient_vars = ['bonica.rid', 'cycle', 'district', 'party', 'prim.vote.pct', 'gen.vote.pct', 'recipient.cfscore', 'recipient.cfscore.dyn']
+    output_1_recipients = output_1[recipient_vars + ['election.type']].drop_duplicates(subset = recipient_vars)
+    print("Number of rows in OUTPUT_1_recipients:", len(output_1_recipients), "(OUTPUT_1:", len(output_1), "rows)")
+
+    return output_1_recipients
+
+
+def create_output_1(contribDB_all, recipients, special_elections, election_dates_df):
+    """
+    OUTPUT_1 and OUTPUT_1_recipients from the inputs of main.py, with the steps above (without the plots of main.py).
+
+    Parameters:
+    -----------
+    contribDB_all : DataFrame
+        Contributions (INPUT 1, see read_contribDB.py)
+    recipients : DataFrame
+        Output of fix_recipient_districts
+    special_elections : DataFrame
+        special_elections_final.csv (INPUT 3)
+    election_dates_df : DataFrame
+        election_dates.csv (INPUT 4)
+
+    Returns:
+    --------
+    dict
+        OUTPUT_1 and OUTPUT_1_recipients
+    """
+    merged_df_3 = merge_inputs(contribDB_all, recipients, special_elections, election_dates_df)
+    merged_df_3 = add_later_than_special(merged_df_3)
+    merged_df_3 = add_days_to_nearest_death(merged_df_3)
+    merged_df_3 = add_treatments(merged_df_3, special_elections)
+    merged_df_3 = add_btw_death_and_spec(merged_df_3)
+
+    output_1 = build_output_1(merged_df_3)
+    del merged_df_3
+    return {'OUTPUT_1': output_1, 'OUTPUT_1_recipients': build_output_1_recipients(output_1)}
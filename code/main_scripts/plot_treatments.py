@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Plots of main.py checking days_to_nearest_death, the treatments (treat_1, treat_2 and treat_3) and
+## btw_death_and_spec_1, _2 and _3 of some districts. Only imported by main.py when show_plots is True, so that the
+## datasets can be built (see output_1_builders.py) without matplotlib and seaborn
+
+
+### LIBRARIES
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+#%%
+
+### FUNCTIONS
+
+def plot_days_to_nearest_death(merged_df_3):
+    """Histogram of days_to_nearest_death"""
+    plt.figure(figsize=(10, 6))
+    sns.histplot(data=merged_df_3, x='days_to_nearest_death', bins=30)
+    plt.axvline(x=0, color='red', linewidth=3, label = 'Difference = 0')
+    plt.axvline(x=merged_df_3['days_to_nearest_death'].mean(), color='blue', linewidth=3, label = 'Mean value')  # adds vertical line
+    plt.title('Distribution of days_to_nearest_death')
+    plt.xlabel('Value')
+    plt.ylabel('Count')
+    plt.legend()
+    plt.show()
+
+
+def plot_scatter(merged_df_3, picked_district, treatment):
+    """Scatterplot of a treatment (treat_1, treat_2 or treat_3) across time for a district"""
+    merged_df_3_sample = merged_df_3[merged_df_3['district'] == picked_district]
+    death_dates = merged_df_3_sample['death_date'].dropna().unique()
+
+    # Define election_dates here so it's available in all branches
+    election_dates = merged_df_3_sample['election_date_in_cycle'].dropna().unique()
+
+    if treatment == 'treat_1':
+        # Plot for treat_1
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['treat_1'], c='blue', label = 'Contributions', s = 0.5)
+        # Add a vertical line for each death date
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")  # Only one label in legend
+
+        # Add lines for election dates if you have them
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: treat_1 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
+
+    elif treatment == 'treat_2':
+        # Plot for treat_2
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['treat_2'], c='red', label = 'Contributions', s = 0.5)
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")
+
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: treat_2 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
+
+    elif treatment == 'treat_3':
+        # Plot for treat_3
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['treat_3'], c='orange', label = 'Contributions', s = 0.5)
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")
+
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: treat_3 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
+
+
+def plot_scatter_2(merged_df_3, picked_district, treatment):
+    """Scatterplot of btw_death_and_spec_1, btw_death_and_spec_2 or btw_death_and_spec_3 across time for a district"""
+    merged_df_3_sample = merged_df_3[merged_df_3['district'] == picked_district]
+    death_dates = merged_df_3_sample['death_date'].dropna().unique()
+
+    # Define election_dates and special election dates
+    election_dates = merged_df_3_sample['election_date_in_cycle'].dropna().unique()
+    spec_election_dates = merged_df_3_sample['spec_election_date'].dropna().unique()
+
+    if treatment == 'btw_death_and_spec_1':
+        # Plot for btw_death_and_spec_1
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['btw_death_and_spec_1'], c='blue', label='Contributions', s=0.5)
+        # Add a vertical line for each death date
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")
+
+        # Add lines for regular election dates
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        # Add lines for special election dates
+        for i, spec_election_date in enumerate(spec_election_dates):
+            plt.axvline(x=spec_election_date, color='red', linestyle=':', linewidth=2,
+                        label='Special election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: btw_death_and_spec_1 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
+
+    elif treatment == 'btw_death_and_spec_2':
+        # Plot for btw_death_and_spec_2
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['btw_death_and_spec_2'], c='red', label='Contributions', s=0.5)
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")
+
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        for i, spec_election_date in enumerate(spec_election_dates):
+            plt.axvline(x=spec_election_date, color='red', linestyle=':', linewidth=2,
+                        label='Special election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: btw_death_and_spec_2 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
+
+    elif treatment == 'btw_death_and_spec_3':
+        # Plot for btw_death_and_spec_3
+        plt.figure(figsize=(10, 6))
+        plt.scatter(merged_df_3_sample['date'], merged_df_3_sample['btw_death_and_spec_3'], c='orange', label='Contributions', s=0.5)
+        for i, death_date in enumerate(death_dates):
+            plt.axvline(x=death_date, color='purple', linewidth=3,
+                        label='Death date' if i == 0 else "_")
+
+        for i, election_date in enumerate(election_dates):
+            plt.axvline(x=election_date, color='green', linestyle='--', linewidth=2, alpha=0.5,
+                        label='Election date' if i == 0 else "_")
+
+        for i, spec_election_date in enumerate(spec_election_dates):
+            plt.axvline(x=spec_election_date, color='red', linestyle=':', linewidth=2,
+                        label='Special election date' if i == 0 else "_")
+
+        plt.title(f'Scatterplot: btw_death_and_spec_3 across time (for {picked_district})')
+        plt.xlabel('Date')
+        plt.ylabel('Treatment')
+        plt.legend()
+        plt.show()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Reading and filtering the DIME contribution files (contribDB_{year}.csv) for INPUT_1 of main.py
+
+
+### LIBRARIES
+
+import os
+import json
+import hashlib
+import inspect
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+
+import contrib_schema
+from contrib_schema import read_dtypes, apply_schema, concat_frames
+
+# pyarrow is only needed for the cache of filtered cycles (see read_contribDB_cached)
+try:
+    import pyarrow # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+#%%
+
+### SETUP
+
+# excluding columns:
+#    'contributor.lname', 'contributor.fname', 'contributor.mname',
+#    'contributor.suffix', 'contributor.title', 'contributor.ffname',
+#    'contributor.address', 'contributor.city', 'contributor.state', 'contributor.zipcode',
+#    'contributor.occupation', 'contributor.employer', 'occ.standardized', 'is.corp',
+#    'recipient.party', 'recipient.type', 'recipient.state',
+#    'censustract',
+#    'efec.memo', 'efec.memo2', 'efec.transaction.id.orig'
+#    'bk.ref.transaction.id', 'efec.org.orig', 'efec.comid.orig',
+#    'efec.form.type', 'excluded.from.scaling',
+#    'candidate.cfscore'   # NOT NEEDED, EXISTS IN RECIPIENTS DATA
+CONTRIB_USECOLS = ['cycle', 'transaction.id', 'transaction.type', 'amount', 'date',
+                   'bonica.cid', 'contributor.name', 'contributor.type',
+                   'contributor.gender', 'recipient.name',
+                   'bonica.rid', 'seat', 'election.type', 'gis.confidence',
+                   'contributor.district', 'latitude', 'longitude',
+                   'contributor.cfscore']
+
+# Number of rows parsed at a time when streaming a contribDB file
+CONTRIB_CHUNKSIZE = 1_000_000
+
+#%%
+
+### FUNCTIONS
+
+def filter_contributions(df):
+    """
+    Apply the INPUT_1 filters to a (chunk of a) raw contribDB dataset.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Raw contributions with the columns in CONTRIB_USECOLS
+
+    Returns:
+    --------
+    DataFrame
+        House contributions from corporations and individuals with a non-negative amount
+        and a valid date within two years of the cycle
+    """
+    # Filter for House seats and corporate / individual contributions
+    df = df[
+        ((df['seat'] == 'federal:house') & (df['contributor.type'] == 'C')) |
+        ((df['seat'] == 'federal:house') & (df['contributor.type'] == 'I'))
+    ]
+    df = df[df['amount'] >= 0]
+    df = df.dropna(subset = ['amount', 'date']) # dropping missing values for these vars
+    # dropping contributions with absurd dates after 2024
+
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'], format = '%Y-%m-%d', errors = 'coerce') # need to use errors = 'coerce' to include incorrect dates
+
+    df = df[
+        (df['date'].dt.year >= df['cycle'] - 2) &
+        (df['date'].dt.year <= df['cycle'] + 2)
+    ]
+
+    return df
+
+
+def iter_contribDB_chunks(file_path, chunksize = CONTRIB_CHUNKSIZE):
+    """
+    Stream a contribDB file in bounded-size chunks and yield only the rows that survive the filters.
+
+    Parameters:
+    -----------
+    file_path : str or Path
+        Path to contribDB_{year}.csv
+    chunksize : int
+        Number of raw rows parsed at a time, this sets the peak memory of the read
+
+    Yields:
+    -------
+    tuple
+        (filtered chunk, number of raw rows in the chunk)
+    """
+    reader = pd.read_csv(
+        file_path,
+        encoding = 'latin-1',
+        usecols = CONTRIB_USECOLS,
+        dtype = read_dtypes(CONTRIB_USECOLS),
+        chunksize = chunksize
+        )
+
+    with reader:
+        for chunk in reader:
+            yield apply_schema(filter_contributions(chunk)), len(chunk)
+
+
+def read_contribDB(file_path, chunksize = CONTRIB_CHUNKSIZE):
+    """
+    Read and filter one contribDB file, either in one go or streaming it in chunks. 
+    The result follows the dtype schema in contrib_schema.py.
+
+    Parameters:
+    -----------
+    file_path : str or Path
+        Path to contribDB_{year}.csv
+    chunksize : int or None
+        Number of raw rows parsed at a time. If None, the whole file is read at once
+
+    Returns:
+    --------
+    tuple
+        (filtered DataFrame, number of rows in the raw file)
+    """
+    if chunksize is None:
+        df = pd.read_csv(
+            file_path,
+            encoding = 'latin-1',
+            usecols = CONTRIB_USECOLS,
+            dtype = read_dtypes(CONTRIB_USECOLS)
+            )
+        return apply_schema(filter_contributions(df)), len(df)
+
+    chunks = []
+    n_raw = 0
+    for chunk, n_chunk in iter_contribDB_chunks(file_path, chunksize = chunksize):
+        n_raw += n_chunk
+        if len(chunk) > 0:
+            chunks.append(chunk)
+
+    if len(chunks) == 0:
+        # keep the columns and dtypes of an empty filtered frame
+        empty = pd.read_csv(file_path, encoding = 'latin-1', usecols = CONTRIB_USECOLS, dtype = read_dtypes(CONTRIB_USECOLS), nrows = 0)
+        return apply_schema(filter_contributions(empty)), n_raw
+
+    return concat_frames(chunks), n_raw
+
+
+def filter_signature():
+    """
+    Signature of the INPUT_1 read and filters: hash of the columns read, the source code of 
+    filter_contributions and of the dtype schema, and the pandas version. Any change to these 
+    invalidates the cache.
+    """
+    signature = json.dumps({
+        'usecols': CONTRIB_USECOLS,
+        'filter': inspect.getsource(filter_contributions),
+        'schema': inspect.getsource(contrib_schema),
+        'pandas': pd.__version__,
+        })
+    return hashlib.sha256(signature.encode('utf-8')).hexdigest()[:16]
+
+
+def file_hash(file_path, block_size = 2**24):
+    """SHA-256 of the contents of a file, read in blocks of block_size bytes"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def read_contribDB_cached(file_path, cache_folder, chunksize = CONTRIB_CHUNKSIZE):
+    """
+    Read one filtered contribDB file from a Parquet cache, (re)building the cache entry when needed.
+    
+    Each cycle is cached as {cache_folder}/contribDB_{year}_{signature}.parquet next to a .json file 
+    with the size, modification time and SHA-256 of the source csv. The entry is used when the size 
+    and modification time match, or when only the modification time changed but the contents hash 
+    is the same (e.g. the file was copied again). A different filter signature gives a different file 
+    name, so changing the filters or the columns read rebuilds the cache. The cached file is 
+    memory-mapped when read. If pyarrow is not installed the csv is read as usual.
+
+    Parameters:
+    -----------
+    file_path : str or Path
+        Path to contribDB_{year}.csv
+    cache_folder : str
+        Folder where the cached cycles are saved
+    chunksize : int or None
+        Number of raw rows parsed at a time when the csv has to be read (see read_contribDB)
+
+    Returns:
+    --------
+    tuple
+        (filtered DataFrame, number of rows in the raw file)
+    """
+    if not PYARROW_AVAILABLE:
+        print("Warning: pyarrow is not installed, contribDB cache is not used")
+        return read_contribDB(file_path, chunksize = chunksize)
+
+    source_stat = os.stat(file_path) # raises FileNotFoundError as the csv read would
+    file_stem = os.path.splitext(os.path.basename(file_path))[0]
+    signature = filter_signature()
+    cache_path = os.path.join(cache_folder, f"{file_stem}_{signature}.parquet")
+    meta_path = os.path.join(cache_folder, f"{file_stem}_{signature}.json")
+
+    meta = None
+    if os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    if meta is not None and meta['size'] == source_stat.st_size:
+        if meta['mtime_ns'] != source_stat.st_mtime_ns:
+            # same size, different modification time: compare contents
+            if file_hash(file_path) == meta['sha256']:
+                meta['mtime_ns'] = source_stat.st_mtime_ns
+                with open(meta_path, 'w') as f:
+                    json.dump(meta, f)
+            else:
+                meta = None
+        if meta is not None:
+            print(f"-> Using cached {os.path.basename(cache_path)}")
+            df = pd.read_parquet(cache_path, engine = 'pyarrow', memory_map = True)
+            return df, meta['n_raw']
+
+    df, n_raw = read_contribDB(file_path, chunksize = chunksize)
+
+    os.makedirs(cache_folder, exist_ok = True)
+    # entries of the same file built with an older signature are stale
+    for file_name in os.listdir(cache_folder):
+        if file_name.startswith(f"{file_stem}_") and not file_name.startswith(f"{file_stem}_{signature}."):
+            os.remove(os.path.join(cache_folder, file_name))
+
+    meta = {
+        'source': os.path.basename(file_path),
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'sha256': file_hash(file_path),
+        'signature': signature,
+        'n_raw': n_raw,
+        }
+    tmp_path = cache_path + '.tmp'
+    try:
+        df.to_parquet(tmp_path, engine = 'pyarrow', index = False)
+        os.replace(tmp_path, cache_path)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+    except Exception as e: # e.g. a column with mixed types that Arrow cannot store
+        print(f"Warning: could not cache {os.path.basename(file_path)}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return df, n_raw
+
+
+def _read_contribDB_year(year, data_folder, chunksize, cache_folder):
+    """Worker of read_contribDB_cycles: read one cycle and return (year, df, n_raw, warning)"""
+    file_path = os.path.join(data_folder, f"contribDB_{year}.csv")
+    try:
+        if cache_folder is None:
+            df, n_raw = read_contribDB(file_path, chunksize = chunksize)
+        else:
+            df, n_raw = read_contribDB_cached(file_path, cache_folder, chunksize = chunksize)
+        return year, df, n_raw, None
+    except FileNotFoundError:
+        return year, None, None, f"Warning: File not found for year {year}"
+    except pd.errors.EmptyDataError:
+        return year, None, None, f"Warning: Empty file for year {year}"
+
+
+def read_contribDB_cycles(data_folder, years, n_workers = 1, chunksize = CONTRIB_CHUNKSIZE, cache_folder = None):
+    """
+    Read and filter the contribDB files of several cycles, optionally over a pool of worker processes.
+    
+    Cycles are independent, so each one is read by its own worker and the results are 
+    collected back in the order of years. Workers are forked, since main.py runs at import 
+    time and a spawned worker would re-run the whole script; where fork is not available 
+    (Windows) the files are read one after the other.
+
+    Parameters:
+    -----------
+    data_folder : str
+        Folder where contribDB_{year}.csv are saved
+    years : iterable of int
+        Cycles to read
+    n_workers : int
+        Number of worker processes, 1 reads the files one after the other
+    chunksize : int or None
+        Number of raw rows parsed at a time within each file (see read_contribDB)
+    cache_folder : str or None
+        Folder of the Parquet cache of filtered cycles (see read_contribDB_cached), None disables the cache
+
+    Returns:
+    --------
+    dict
+        {year: filtered DataFrame} in the order of years, missing or empty files are skipped
+    """
+    years = list(years)
+    n_workers = max(1, min(int(n_workers), len(years)))
+
+    if n_workers > 1 and 'fork' in mp.get_all_start_methods():
+        print(f"Reading {len(years)} contribDB files with {n_workers} workers...")
+        with ProcessPoolExecutor(max_workers = n_workers, mp_context = mp.get_context('fork')) as executor:
+            results = list(executor.map(_read_contribDB_year, years, repeat(data_folder), repeat(chunksize), repeat(cache_folder)))
+    else:
+        results = map(_read_contribDB_year, years, repeat(data_folder), repeat(chunksize), repeat(cache_folder))
+
+    contribDB_dict = {}
+    for year, df, n_raw, warning in results:
+        print(f"\nReading contribDB_{year}.csv ...")
+        if warning is not None:
+            print(warning)
+            continue
+        print("\n-> Length of raw dataset:", n_raw)
+        print("-> Length of dataset after filtering:", len(df))
+        contribDB_dict[year] = df
+
+    return contribDB_dict
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: District-keyed index of special elections (deaths and resignations), used in MERGE 2 of main.py
+## to attach to each contribution the special election of its district with the nearest death
+
+
+### LIBRARIES
+
+import numpy as np
+import pandas as pd
+
+#%%
+
+### SETUP
+
+# Deaths are searched on one sorted array of keys district_code * DISTRICT_SPAN + days since DAY_ORIGIN,
+# so the deaths of each district form a contiguous, date-sorted block
+DAY_ORIGIN = np.datetime64('1900-01-01', 'D')
+DISTRICT_SPAN = 2**20 # days, about 2,870 years
+
+#%%
+
+### FUNCTIONS
+
+def _to_days(dates):
+    """Days since DAY_ORIGIN as float64 (NaN for missing dates)"""
+    dates = pd.to_datetime(pd.Series(np.asarray(dates)), errors = 'coerce').values.astype('datetime64[D]')
+    days = (dates - DAY_ORIGIN).astype('int64').astype('float64')
+    days[np.isnat(dates)] = np.nan
+    return days
+
+
+def build_special_elections_index(special_elections):
+    """
+    Build a district-keyed index of special elections.
+
+    Deaths are stored district by district in arrays sorted by death date (equal dates in the order of
+    special_elections), with their special election dates, cycles and positions in special_elections.
+    The deaths of district code c are entries start[c]:end[c] of each array.
+
+    Parameters:
+    -----------
+    special_elections : DataFrame
+        Special elections data (special_elections_final.csv)
+
+    Returns:
+    --------
+    dict
+        'districts' : Index of districts (district codes are positions in it)
+        'first_row' : position in special_elections of the first special election of each district
+        'start', 'end' : block of each district in the death arrays
+        'key' : sorted search keys of the deaths
+        'row', 'death_day', 'spec_election_date', 'spec_cycle' : death arrays
+        'run_first' : for each death, first entry with the same district and death date
+    """
+    district_codes, districts = pd.factorize(special_elections['district'])
+    rows = np.arange(len(special_elections))
+    death_days = _to_days(special_elections['death_date'])
+    first_row = pd.Series(rows).groupby(district_codes).min().reindex(range(len(districts))).values
+
+    # deaths only, sorted by district, death date and position in special_elections
+    death_rows = rows[~np.isnan(death_days)]
+    death_rows = death_rows[np.lexsort((death_rows, death_days[death_rows], district_codes[death_rows]))]
+    death_codes = district_codes[death_rows]
+    death_day = death_days[death_rows]
+    key = death_codes * DISTRICT_SPAN + death_day
+
+    # first entry of each run of equal keys (same district and death date)
+    new_run = np.ones(len(key), dtype = bool)
+    new_run[1:] = key[1:] != key[:-1]
+    run_first = np.maximum.accumulate(np.where(new_run, np.arange(len(key)), 0)) if len(key) > 0 else np.arange(0)
+
+    return {
+        'districts': districts,
+        'first_row': first_row,
+        'start': np.searchsorted(death_codes, np.arange(len(districts)), side = 'left'),
+        'end': np.searchsorted(death_codes, np.arange(len(districts)), side = 'right'),
+        'key': key,
+        'row': death_rows,
+        'death_day': death_day,
+        'spec_election_date': pd.to_datetime(special_elections['spec_election_date'], errors = 'coerce').values[death_rows],
+        'spec_cycle': pd.to_numeric(special_elections['spec_cycle'], errors = 'coerce').values[death_rows],
+        'run_first': run_first
+        }
+
+
+def nearest_special_election(index, districts, dates):
+    """
+    Special election with the nearest death for each contribution, by binary search on the index.
+
+    Each contribution is only compared with the last death before its date and the first death on or
+    after it in its district, so the lookup is O(log k) per contribution. Ties in the distance go to the
+    special election that comes first in special_elections. Contributions without a valid date, or in
+    districts without deaths, get the first special election of the district in special_elections, and
+    contributions in districts without special elections get -1. This is the row the old outer merge
+    kept after sorting on abs_days_to_death and dropping duplicates.
+
+    Parameters:
+    -----------
+    index : dict
+        Index returned by build_special_elections_index
+    districts : array
+        District of each contribution
+    dates : array of datetime64
+        Date of each contribution
+
+    Returns:
+    --------
+    tuple
+        (positions in special_elections, days_to_nearest_death), where days_to_nearest_death is the date
+        of the contribution minus the date of the nearest death, in days (NaN if there is none)
+    """
+    codes = index['districts'].get_indexer(np.asarray(districts))
+    days = _to_days(dates)
+    n = len(codes)
+
+    in_index = codes >= 0
+    codes = np.where(in_index, codes, 0)
+    start = index['start'][codes] if n > 0 else np.zeros(0, dtype = int)
+    end = index['end'][codes] if n > 0 else np.zeros(0, dtype = int)
+    has_death = in_index & (end > start) & ~np.isnan(days)
+
+    positions = np.where(in_index, index['first_row'][codes], -1) if n > 0 else np.zeros(0, dtype = int)
+    days_to_death = np.full(n, np.nan)
+    if not has_death.any():
+        return positions, days_to_death
+
+    # binary search for the first death on or after the date of the contribution, within its district
+    key = index['key']
+    search_key = codes * DISTRICT_SPAN + np.where(has_death, days, 0)
+    after = np.searchsorted(key, search_key, side = 'left')
+    has_after = has_death & (after < end)
+    has_before = has_death & (after > start)
+
+    # the last death before the date (first entry of its run, i.e. first in special_elections among equal dates)
+    before = index['run_first'][np.maximum(after - 1, 0)]
+    after = np.minimum(after, len(key) - 1)
+
+    distance_after = np.where(has_after, index['death_day'][after] - days, np.inf)
+    distance_before = np.where(has_before, days - index['death_day'][before], np.inf)
+    use_before = (
+        (distance_before < distance_after) |
+        ((distance_before == distance_after) & (index['row'][before] < index['row'][after]))
+        )
+    nearest = np.where(use_before, before, after)
+
+    positions = np.where(has_death, index['row'][nearest], positions)
+    days_to_death = np.where(has_death, days - index['death_day'][nearest], np.nan)
+
+    return positions, days_to_death
+
+
+def merge_nearest_special_election(contributions, special_elections, index):
+    """
+    Attach to each contribution the special election of its district with the nearest death.
+
+    Replaces the outer merge of contributions and special_elections on 'district', which multiplied
+    every contribution by the number of special elections in its district before keeping only the
+    nearest one. Rows keep the order of the outer merge (grouped by district, in order of first
+    appearance), contributions in districts without special elections keep missing values, and special
+    elections in districts without contributions are appended at the end, as in the outer merge.
+    The distance to the nearest death is added as 'days_to_nearest_death' and 'abs_days_to_death'.
+
+    Parameters:
+    -----------
+    contributions : DataFrame
+        Contributions with 'district' and 'date' (merged_df_1)
+    special_elections : DataFrame
+        Special elections data (special_elections_final.csv)
+    index : dict
+        Index returned by build_special_elections_index
+
+    Returns:
+    --------
+    DataFrame
+        Columns of contributions, then the columns of special_elections (without 'district'), 
+        then days_to_nearest_death and abs_days_to_death
+    """
+    # order of the outer merge: grouped by district in order of first appearance
+    district_codes, districts = pd.factorize(contributions['district'])
+    contributions = contributions.iloc[np.argsort(district_codes, kind = 'stable')].reset_index(drop = True)
+
+    positions, days_to_death = nearest_special_election(index, contributions['district'].values, contributions['date'].values)
+
+    special_columns = special_elections.drop(columns = ['district']).reset_index(drop = True)
+    matched = special_columns.reindex(positions) # positions = -1 give missing values
+    matched.index = contributions.index
+    matched['days_to_nearest_death'] = days_to_death
+    matched['abs_days_to_death'] = np.abs(days_to_death)
+    merged = pd.concat([contributions, matched], axis = 1)
+
+    # special elections in districts without contributions
+    unmatched = special_elections[~special_elections['district'].isin(districts)].reset_index(drop = True)
+    if len(unmatched) > 0:
+        empty_contributions = contributions.iloc[:0].reindex(range(len(unmatched)))
+        empty_contributions['district'] = unmatched['district'].values
+        unmatched = pd.concat([empty_contributions, unmatched.drop(columns = ['district'])], axis = 1)
+        merged = pd.concat([merged, unmatched], axis = 0, ignore_index = True)
+
+    return merged
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Vectorized treatment and window flags of the contributions, shared by main.py (treat_1, treat_2, treat_3
+## and btw_death_and_spec_1, _2, _3) and outputs_scripts/create_ext_vars.py (contributions between death_date and
+## special_elections_date of the treated district-cycles of OUTPUT_7), and the treatments and death attributes of the
+## district-cycles of OUTPUT_7 in outputs.py
+
+
+### LIBRARIES
+
+import numpy as np
+import pandas as pd
+
+#%%
+
+### SETUP
+
+# Stands for "no next election" at the end of a treatment window
+NO_END = np.iinfo('int64').max
+
+#%%
+
+### FUNCTIONS
+
+def _to_ns(dates):
+    """Dates as int64 nanoseconds, and a mask of the valid (non-missing) ones"""
+    dates = pd.to_datetime(pd.Series(np.asarray(dates)), errors = 'coerce').values.astype('datetime64[ns]')
+    return dates.view('int64'), ~np.isnat(dates)
+
+
+def next_election_after(death_dates, election_dates):
+    """
+    End of the treatment window of each death: the first general election strictly after it.
+
+    Parameters:
+    -----------
+    death_dates : array of int64
+        Death dates in nanoseconds
+    election_dates : array of datetime64
+        All general election dates (election_date_in_cycle)
+
+    Returns:
+    --------
+    array of int64
+        Next election date in nanoseconds, NO_END if there is none
+    """
+    elections, valid = _to_ns(election_dates)
+    elections = np.unique(elections[valid])
+    if len(elections) == 0:
+        return np.full(len(death_dates), NO_END)
+
+    after = np.searchsorted(elections, death_dates, side = 'right')
+    return np.where(after < len(elections), elections[np.minimum(after, len(elections) - 1)], NO_END)
+
+
+def latest_event_before(codes, values, event_codes, event_values):
+    """
+    Interval join: for each row, the latest event of the same group strictly before its value.
+
+    Events and rows are ranked on one common scale, so that (group, value) pairs can be searched
+    on a single sorted integer key.
+
+    Parameters:
+    -----------
+    codes : array of int
+        Group of each row
+    values : array of int64
+        Value (date in nanoseconds) of each row
+    event_codes : array of int
+        Group of each event
+    event_values : array of int64
+        Value (date in nanoseconds) of each event
+
+    Returns:
+    --------
+    array of int
+        Position of the event in event_codes / event_values, -1 if there is none
+    """
+    if len(event_codes) == 0 or len(codes) == 0:
+        return np.full(len(codes), -1)
+
+    order = np.lexsort((event_values, event_codes))
+    sorted_codes = event_codes[order]
+    ranks = np.unique(np.concatenate([event_values[order], values]), return_inverse = True)[1].reshape(-1)
+    span = ranks.max() + 1
+    event_key = sorted_codes * span + ranks[:len(order)]
+    key = codes * span + ranks[len(order):]
+
+    before = np.searchsorted(event_key, key, side = 'left') - 1
+    found = (before >= 0) & (sorted_codes[np.maximum(before, 0)] == codes)
+    return np.where(found, order[np.maximum(before, 0)], -1)
+
+
+def assign_treatments(df, single_death_districts, multiple_death_districts, election_dates):
+    """
+    Create the treatment dummies treat_1, treat_2 and treat_3 for every contribution.
+
+    - treat_1: 1 after the first death of the district (first non-missing death_date in the order of df).
+    - treat_2: single death districts as treat_1. Multiple death districts are 1 inside the window
+      [death_date, next general election) of any of their deaths, and 0 elsewhere.
+    - treat_3: single death districts are 1 after the death only within the cycle of the special election
+      (spec_cycle of the first death row). Multiple death districts as treat_2.
+
+    The deaths of each district are read once, and the windows are assigned to all contributions with
+    one interval join instead of looping over districts and contributions.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'district', 'date', 'cycle', 'death_date' and 'spec_cycle' (merged_df_3)
+    single_death_districts : list
+        Districts with one death
+    multiple_death_districts : list
+        Districts with more than one death
+    election_dates : array of datetime64
+        All general election dates, marking the end of the treatment windows of treat_2
+
+    Returns:
+    --------
+    DataFrame
+        treat_1, treat_2 and treat_3 (int), with the index of df
+    """
+    treated_districts = pd.Index(list(single_death_districts) + list(multiple_death_districts))
+    codes = treated_districts.get_indexer(df['district'].values)
+    is_multiple = np.zeros(len(treated_districts) + 1, dtype = bool)
+    is_multiple[len(single_death_districts):len(treated_districts)] = True
+    is_multiple = is_multiple[codes] # code -1 (untreated districts) falls on the last entry, False
+
+    dates, valid_dates = _to_ns(df['date'].values)
+    death_dates, valid_deaths = _to_ns(df['death_date'].values)
+    cycles = pd.to_numeric(df['cycle'], errors = 'coerce').values.astype('float64')
+    spec_cycles = pd.to_numeric(df['spec_cycle'], errors = 'coerce').values.astype('float64')
+
+    # first death row of each district, in the order of df
+    death_rows = np.flatnonzero((codes >= 0) & valid_deaths)
+    district_codes, first = np.unique(codes[death_rows], return_index = True)
+    first_rows = death_rows[first]
+
+    for code in np.setdiff1d(np.arange(len(treated_districts)), district_codes):
+        print(f"Warning: No death date found for district {treated_districts[code]}")
+
+    first_death = np.full(len(treated_districts) + 1, NO_END)
+    first_death[district_codes] = death_dates[first_rows]
+    first_spec_cycle = np.full(len(treated_districts) + 1, np.nan)
+    first_spec_cycle[district_codes] = spec_cycles[first_rows]
+
+    # treat_1: after the first death
+    treat_1 = valid_dates & (dates > first_death[codes])
+
+    # treat_2: inside the window of the latest death strictly before the contribution
+    # (windows end at the next election after the death, which is increasing in the death date, so if any
+    # window of the district contains the contribution, the window of the latest death before it does)
+    multiple_rows = death_rows[is_multiple[death_rows]]
+    deaths = pd.DataFrame({'code': codes[multiple_rows], 'death_date': death_dates[multiple_rows]}).drop_duplicates()
+    event_codes = deaths['code'].values
+    event_values = deaths['death_date'].values
+    window_end = next_election_after(event_values, election_dates)
+
+    in_death_window = np.zeros(len(df), dtype = bool)
+    rows = np.flatnonzero(is_multiple & valid_dates)
+    latest = latest_event_before(codes[rows], dates[rows], event_codes, event_values)
+    in_death_window[rows] = (latest >= 0) & (dates[rows] < window_end[np.maximum(latest, 0)])
+    treat_2 = np.where(is_multiple, in_death_window, treat_1)
+
+    # treat_3: single death districts only treated within the cycle of the special election
+    same_cycle = cycles == first_spec_cycle[codes]
+    treat_3 = np.where(is_multiple, treat_2, treat_1 & same_cycle)
+
+    return pd.DataFrame({
+        'treat_1': treat_1.astype('int64'),
+        'treat_2': treat_2.astype('int64'),
+        'treat_3': treat_3.astype('int64')
+        }, index = df.index)
+
+
+def in_window(dates, start, end):
+    """
+    Strict window flag start < date < end (False where any of the three dates is missing).
+
+    Parameters:
+    -----------
+    dates, start, end : arrays of datetime64
+        Dates of the contributions and start / end of their windows
+
+    Returns:
+    --------
+    array of bool
+    """
+    dates, valid = _to_ns(dates)
+    start, valid_start = _to_ns(start)
+    end, valid_end = _to_ns(end)
+    return valid & valid_start & valid_end & (dates > start) & (dates < end)
+
+
+def btw_death_and_spec_flags(df):
+    """
+    Create btw_death_and_spec_1, _2 and _3: treat_X = 1 AND date between death_date and spec_election_date.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'date', 'death_date', 'spec_election_date' and treat_1, treat_2, treat_3 (merged_df_3)
+
+    Returns:
+    --------
+    DataFrame
+        btw_death_and_spec_1, _2 and _3 (int), with the index of df
+    """
+    between = in_window(df['date'].values, df['death_date'].values, df['spec_election_date'].values)
+    return pd.DataFrame({
+        f'btw_death_and_spec_{treat_num}': (between & (df[f'treat_{treat_num}'].values == 1)).astype('int64')
+        for treat_num in [1, 2, 3]
+        }, index = df.index)
+
+
+def district_cycle_keys(df):
+    """
+    (district, cycle) keys of the rows of df, with districts as objects and cycles as float64, so that
+    keys of tables with integer and float cycles match.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Table with 'district' and 'cycle'
+
+    Returns:
+    --------
+    MultiIndex
+    """
+    return pd.MultiIndex.from_arrays([
+        np.asarray(df['district'], dtype = object),
+        pd.to_numeric(df['cycle'], errors = 'coerce').astype('float64').values
+        ])
+
+
+def treated_district_cycles(output_7_df, treat_num, single_death_districts, multiple_death_districts):
+    """
+    District-cycles of OUTPUT_7 where treat_X == 1, as used for the _ext_ variables.
+
+    For treat_1, multiple death districts only keep their first treated cycle (and, when there are any,
+    only districts of single_death_districts or multiple_death_districts are kept).
+
+    Parameters:
+    -----------
+    output_7_df : DataFrame
+        The treatment data with treat_1, treat_2, treat_3, death_date, special_elections_date
+    treat_num : int
+        1, 2 or 3
+    single_death_districts : list
+        List of districts with single death
+    multiple_death_districts : list
+        List of districts with multiple deaths
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, death_date and special_elections_date of the treated district-cycles
+    """
+    treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
+
+    if treat_num == 1:
+        multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
+        if not multiple_death_treated.empty:
+            first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
+            single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
+            treated_districts = pd.concat([single_death_treated, multiple_death_treated.loc[first_occurrences]], ignore_index = True)
+
+    return treated_districts
+
+
+def treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts):
+    """
+    Flag, for each treatment, the contributions of the treated district-cycles of OUTPUT_7 given between
+    death_date and special_elections_date of their district-cycle.
+
+    Every contribution is looked up once in OUTPUT_7 on (district, cycle), and the three windows are
+    checked on the same lookup, instead of one merge and filter per treatment in every function of
+    create_ext_vars.py.
+
+    Parameters:
+    -----------
+    input_df : DataFrame
+        The raw contribution data (OUTPUT_1)
+    output_7_df : DataFrame
+        The treatment data with treat_1, treat_2, treat_3, death_date, special_elections_date
+    single_death_districts : list
+        List of districts with single death
+    multiple_death_districts : list
+        List of districts with multiple deaths
+
+    Returns:
+    --------
+    DataFrame
+        window_1, window_2 and window_3 (bool), with the index of input_df
+    """
+    contributions = district_cycle_keys(input_df)
+
+    flags = {}
+    for treat_num in [1, 2, 3]:
+        treated_districts = treated_district_cycles(output_7_df, treat_num, single_death_districts, multiple_death_districts)
+        if treated_districts.empty:
+            flags[f'window_{treat_num}'] = np.zeros(len(input_df), dtype = bool)
+            continue
+
+        rows = district_cycle_keys(treated_districts).get_indexer(contributions)
+        found = rows >= 0
+        rows = np.maximum(rows, 0)
+        flags[f'window_{treat_num}'] = found & in_window(
+            input_df['date'].values,
+            treated_districts['death_date'].values[rows],
+            treated_districts['special_elections_date'].values[rows]
+            )
+
+    return pd.DataFrame(flags, index = input_df.index)
+
+
+def district_cycle_treatments(df, single_death_districts, multiple_death_districts):
+    """
+    Create the treatment dummies treat_1, treat_2 and treat_3 of the district-cycles of OUTPUT_7.
+
+    - treat_1: 1 from the cycle of the first death of the district (first row with death_date in the order of df) on.
+    - treat_2: single death districts as treat_1. Multiple death districts are 1 in the cycles with a death_date.
+    - treat_3: 1 in the cycles with a death_date, for single and multiple death districts.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        District-cycles with 'district', 'cycle' and 'death_date' (OUTPUT_7)
+    single_death_districts : list
+        Districts with one death
+    multiple_death_districts : list
+        Districts with more than one death
+
+    Returns:
+    --------
+    DataFrame
+        treat_1, treat_2 and treat_3 (int), with the index of df
+    """
+    is_single = df['district'].isin(single_death_districts).values
+    is_multiple = df['district'].isin(multiple_death_districts).values & ~is_single
+    has_death = df['death_date'].notna().values
+    cycles = pd.to_numeric(df['cycle'], errors = 'coerce').values.astype('float64')
+
+    # cycle of the first death row of each treated district, in the order of df
+    first_death = df[(is_single | is_multiple) & has_death].drop_duplicates('district').set_index('district')['cycle']
+    for district in list(single_death_districts) + list(multiple_death_districts):
+        if district not in first_death.index:
+            print(f"Warning: No death date found for district {district} (likely because of merge btw special_elections and sample used")
+
+    first_death_cycle = pd.to_numeric(df['district'].map(first_death), errors = 'coerce').values.astype('float64')
+    treat_1 = cycles >= first_death_cycle # False where the district has no death
+    treat_2 = np.where(is_single, treat_1, is_multiple & has_death)
+    treat_3 = (is_single | is_multiple) & has_death
+
+    return pd.DataFrame({
+        'treat_1': treat_1.astype('int64'),
+        'treat_2': treat_2.astype('int64'),
+        'treat_3': treat_3.astype('int64')
+        }, index = df.index)
+
+
+def death_episode_attributes(df, deaths, special_elections, single_death_districts, multiple_death_districts):
+    """
+    Attributes of the death relevant to each district-cycle of OUTPUT_7 for each treatment: death_unexpected_X,
+    death_age_X and death_party_X (spec_party of the death).
+
+    The deaths of each district are sorted by date (deaths on the same date keep the order of deaths), and
+    - _1: the first death of the district, in all its cycles.
+    - _2: the latest death in a year up to the cycle (as-of join on the year of death). Cycles before the first
+      death take the first death, and so do the cycles of multiple death districts with a special election
+      after the year of that death and up to the cycle.
+    - _3: in the cycles with a death_date only. The first death for single death districts, and for multiple
+      death districts the first death among the contributions of the cycle.
+    Districts without deaths in deaths are missing.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        District-cycles with 'district', 'cycle' and 'death_date' (OUTPUT_7)
+    deaths : DataFrame
+        Contributions with 'district', 'cycle', 'death_date', 'death_unexpected', 'death_age' and 'spec_party' (OUTPUT_1)
+    special_elections : DataFrame
+        Special elections with 'district' and 'spec_election_date'
+    single_death_districts : list
+        Districts with one death
+    multiple_death_districts : list
+        Districts with more than one death
+
+    Returns:
+    --------
+    DataFrame
+        death_unexpected_X, death_age_X and death_party_X for X = 1, 2, 3, with the index of df
+    """
+    treated_districts = pd.Index(pd.unique(np.asarray(list(single_death_districts) + list(multiple_death_districts), dtype = object)))
+    codes = treated_districts.get_indexer(df['district'].values)
+    cycles = pd.to_numeric(df['cycle'], errors = 'coerce').values.astype('float64')
+    is_single = df['district'].isin(single_death_districts).values
+    is_multiple = df['district'].isin(multiple_death_districts).values
+
+    # Deaths of the treated districts, sorted by district and date
+    deaths = deaths[deaths['district'].isin(treated_districts) & deaths['death_date'].notna()]
+    deaths = deaths[['district', 'death_date', 'cycle', 'death_unexpected', 'death_age', 'spec_party']].drop_duplicates()
+    deaths = deaths.assign(
+        death_date = pd.to_datetime(deaths['death_date']),
+        code = treated_districts.get_indexer(deaths['district'].values)
+        ).sort_values(['code', 'death_date'], kind = 'mergesort')
+
+    death_districts = set(deaths['district'])
+    for district in list(single_death_districts) + list(multiple_death_districts):
+        if district not in death_districts:
+            print(f"Warning: No death data found for district {district}")
+
+    if deaths.empty:
+        return pd.DataFrame({
+            f'{name}_{treat_num}': np.full(len(df), np.nan)
+            for treat_num in [1, 2, 3] for name in ['death_unexpected', 'death_age', 'death_party']
+            }, index = df.index)
+
+    death_codes = deaths['code'].values
+    death_years = deaths['death_date'].dt.year.values.astype('float64')
+    death_cycles = pd.to_numeric(deaths['cycle'], errors = 'coerce').values.astype('float64')
+
+    # Districts and years on one sorted key (district codes are far apart, years are not)
+    span = 100000.0
+    death_key = death_codes * span + death_years
+
+    # _1: first death of the district
+    district_codes, first_rows = np.unique(death_codes, return_index = True)
+    first_death = np.full(len(treated_districts) + 1, -1)
+    first_death[district_codes] = first_rows
+    first_death = first_death[codes] # code -1 (untreated districts) falls on the last entry, -1
+
+    # _2: latest death up to the cycle, unless a special election came after it
+    latest = np.searchsorted(death_key, codes * span + cycles, side = 'right') - 1
+    found = (codes >= 0) & ~np.isnan(cycles) & (latest >= 0) & (death_codes[np.maximum(latest, 0)] == codes)
+    latest = np.maximum(latest, 0)
+
+    specials = special_elections[special_elections['district'].isin(treated_districts)][['district', 'spec_election_date']].drop_duplicates()
+    special_years = pd.to_datetime(specials['spec_election_date']).dt.year.values.astype('float64')
+    special_key = treated_districts.get_indexer(specials['district'].values) * span + special_years
+    special_key = np.sort(special_key[~np.isnan(special_key)])
+    intervening_special = (
+        np.searchsorted(special_key, codes * span + cycles, side = 'right') -
+        np.searchsorted(special_key, codes * span + death_years[latest], side = 'right')
+        ) > 0
+
+    relevant_death = np.where(found & ~(is_multiple & intervening_special), latest, first_death)
+
+    # _3: cycles with a death_date, first death of the district or first death of the contributions of the cycle
+    district_cycles = district_cycle_keys(df)
+    death_district_cycles = district_cycle_keys(df[df['death_date'].notna().values])
+    cycle_has_death = district_cycles.isin(death_district_cycles) & ~np.isnan(cycles)
+
+    first_in_cycle = np.flatnonzero(~deaths.duplicated(['code', 'cycle']).values)
+    first_in_cycle_rows = pd.MultiIndex.from_arrays([
+        death_codes[first_in_cycle],
+        death_cycles[first_in_cycle]
+        ]).get_indexer(pd.MultiIndex.from_arrays([codes, cycles]))
+    first_in_cycle_rows = np.where(first_in_cycle_rows >= 0, first_in_cycle[np.maximum(first_in_cycle_rows, 0)], -1)
+    cycle_death = np.where(
+        is_single,
+        np.where(df['death_date'].notna().values, first_death, -1),
+        np.where(is_multiple & cycle_has_death, first_in_cycle_rows, -1)
+        )
+
+    attributes = {
+        'death_unexpected': deaths['death_unexpected'].values.astype('float64'),
+        'death_age': deaths['death_age'].values.astype('float64'),
+        'death_party': np.asarray(deaths['spec_party'], dtype = object)
+        }
+
+    result = {}
+    for treat_num, rows in zip([1, 2, 3], [first_death, np.where(first_death >= 0, relevant_death, -1), cycle_death]):
+        for name, values in attributes.items():
+            column = np.full(len(df), np.nan, dtype = values.dtype)
+            column[rows >= 0] = values[rows[rows >= 0]]
+            result[f'{name}_{treat_num}'] = column
+
+    return pd.DataFrame(result, index = df.index)
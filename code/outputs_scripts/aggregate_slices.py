@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: One-pass aggregation of contributions by district-cycle over the 22 slices
+## (election type x party x later_than_special) of OUTPUT_2, OUTPUT_3 and OUTPUT_4, for all contributor-type variants at once
+## (also used for the party slices of the _gen_np and _gen_np_spec variables of the _ext outputs)
+
+
+### LIBRARIES
+
+import numpy as np
+import pandas as pd
+
+#%%
+
+### SLICES
+
+# (name, party, election type) of the slices, in the order of the columns of OUTPUT_2.
+# Each slice comes in two versions: all contributions, and without LTS1 (later_than_special != 1).
+# Election type '-P' stands for election.type != 'P'
+SLICES = [
+    ('', None, None),
+    ('_no_primary', None, '-P'),
+    ('_primary', None, 'P'),
+    ('_gen', None, 'G'),
+    ('_special', None, 'S'),
+    ('_dem_gen', 100, 'G'),
+    ('_dem_primary', 100, 'P'),
+    ('_dem_special', 100, 'S'),
+    ('_rep_gen', 200, 'G'),
+    ('_rep_primary', 200, 'P'),
+    ('_rep_special', 200, 'S')
+    ]
+
+# Contributor-type variants of the outputs: output name -> (contributor.type, amount below, suffix)
+CONTRIBUTOR_VARIANTS = {
+    'OUTPUT_2': (None, None, ''),
+    'OUTPUT_3': ('C', None, '_corp'),
+    'OUTPUT_4_1': ('I', None, '_ind'),
+    'OUTPUT_4_2': ('I', 200, '_smallind')
+    }
+
+#%%
+
+### FUNCTIONS
+
+def variant_mask(df, filter_type = None, amount_filter = None):
+    """
+    Contributions of a contributor-type variant (all rows when filter_type and amount_filter are None).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'contributor.type' and 'amount'
+    filter_type : str, optional
+        contributor.type to keep ('C' or 'I')
+    amount_filter : float, optional
+        Keep amounts below this value
+
+    Returns:
+    --------
+    array of bool
+    """
+    mask = np.ones(len(df), dtype = bool)
+    if filter_type:
+        mask &= (df['contributor.type'] == filter_type).values
+    if amount_filter:
+        mask &= (df['amount'] < amount_filter).values
+    return mask
+
+
+def party_slices(stem):
+    """
+    Slices of all contributions, Democrats and Republicans, without election type filter, for the variables
+    of a column stem (e.g. '_gen_np' gives '_gen_np', '_dem_gen_np' and '_rep_gen_np').
+    """
+    return [(stem, None, None), (f'_dem{stem}', 100, None), (f'_rep{stem}', 200, None)]
+
+
+def slice_masks(df, slices = SLICES):
+    """
+    Membership of each contribution in the slices (by default the 22 slices of OUTPUT_2).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'party', 'election.type' and 'later_than_special'
+    slices : list
+        (name, party, election type) of the slices, as in SLICES
+
+    Returns:
+    --------
+    dict
+        Column stem of the slice (e.g. '_dem_gen_without_LTS1') -> boolean array
+    """
+    election_type = df['election.type']
+    party = df['party'].values
+    before_special = (df['later_than_special'] != 1).values
+
+    masks = {}
+    for name, party_code, election in slices:
+        mask = np.ones(len(df), dtype = bool)
+        if party_code is not None:
+            mask &= party == party_code
+        if election == '-P':
+            mask &= (election_type != 'P').values
+        elif election is not None:
+            mask &= (election_type == election).values
+
+        masks[name] = mask
+        masks[f'{name}_without_LTS1'] = mask & before_special
+
+    return masks
+
+
+def aggregate_slices_variants(df, variants, slices = SLICES):
+    """
+    total_amount and tran_count of every slice by district-cycle, for several contributor-type variants
+    in one grouped pass.
+
+    Replaces one filtered copy, groupby and outer merge per slice and variant. Amounts outside a slice
+    (or variant) are masked as missing, so the grouped sum skips them and adds up exactly the same
+    values, in the same order, as a groupby on the filtered rows. District-cycles with contributions in
+    the variant but not in a slice get missing values, as after the outer merges.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'district', 'cycle', 'amount', 'transaction.id', 'party', 'election.type',
+        'later_than_special' and 'contributor.type'
+    variants : dict
+        Output name -> (contributor.type, amount below, suffix), as in CONTRIBUTOR_VARIANTS
+    slices : list
+        (name, party, election type) of the slices, by default the 22 slices of OUTPUT_2
+
+    Returns:
+    --------
+    dict
+        Output name -> DataFrame with district, cycle and total_amount{slice}{suffix}, tran_count{slice}{suffix}
+        for the slices, sorted by district and cycle
+    """
+    amount = df['amount'].values.astype('float64')
+    has_id = df['transaction.id'].notna().values.astype('float32')
+    masks = slice_masks(df, slices)
+
+    columns, variant_columns = {}, {}
+    for output_name, (filter_type, amount_filter, suffix) in variants.items():
+        in_variant = variant_mask(df, filter_type, amount_filter)
+        total_columns, count_columns = [], []
+        for name, mask in masks.items():
+            total_column, count_column = f'total_amount{name}{suffix}', f'tran_count{name}{suffix}'
+            columns[total_column] = np.where(mask & in_variant, amount, np.nan)
+            columns[count_column] = np.where(mask & in_variant, has_id, np.float32(np.nan))
+            total_columns.append(total_column)
+            count_columns.append(count_column)
+        variant_columns[output_name] = (total_columns, count_columns)
+
+    grouped = pd.DataFrame(columns, index = df.index).groupby([df['district'], df['cycle']])
+    all_totals = grouped[[column for total_columns, _ in variant_columns.values() for column in total_columns]].sum()
+    all_counts = grouped[[column for _, count_columns in variant_columns.values() for column in count_columns]].sum(min_count = 1) # missing if the slice has no contributions
+    del columns, grouped
+
+    outputs = {}
+    for output_name, (total_columns, count_columns) in variant_columns.items():
+        in_variant = all_counts[count_columns[0]].notna().values # district-cycles with contributions in the variant
+        counts = all_counts.loc[in_variant, count_columns]
+        output = all_totals.loc[in_variant, total_columns].where(counts.notna().values)
+        for column in count_columns:
+            output[column] = counts[column].astype('int64') if counts[column].notna().all() else counts[column].astype('float64')
+        outputs[output_name] = output[[column for pair in zip(total_columns, count_columns) for column in pair]].reset_index()
+
+    return outputs
+
+
+def aggregate_slices(df, suffix = ''):
+    """
+    total_amount and tran_count of every slice by district-cycle, in one grouped pass (see aggregate_slices_variants).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions with 'district', 'cycle', 'amount', 'transaction.id', 'party', 'election.type' and 'later_than_special'
+    suffix : str
+        Suffix of the column names (e.g. '_corp')
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle and total_amount{slice}{suffix}, tran_count{slice}{suffix} for the 22 slices,
+        sorted by district and cycle
+    """
+    return aggregate_slices_variants(df, {'': (None, None, suffix)})['']
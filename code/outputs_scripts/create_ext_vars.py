@@ -12,9 +12,17 @@ Created on Wed Feb 12 11:18:52 2025
 ### LIBRARIES
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 
+# Treatment windows shared with main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "main_scripts"))
+from treatment_windows import district_cycle_keys, treatment_window_flags
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from aggregate_slices import CONTRIBUTOR_VARIANTS, variant_mask, party_slices, aggregate_slices_variants
+from hedging_cube import contributor_cube, counting_hedging, amounts_by_party, amounts_by_recipient
+
 #%%
 
 
@@ -24,6 +32,10 @@ def calculate_party_hedging(data, party_code, party_name, contributor_type):
     """
     Calculate hedging metrics for a specific party's primary candidates.
     
+    The top two candidates of each contributor are selected with one sort and a cumcount (rank 1 and 2 
+    within district, cycle, contributor and party, largest total_amount first, ties in the order of data), 
+    rather than with nlargest on every group.
+    
     Parameters:
     -----------
     data : DataFrame
@@ -40,43 +52,28 @@ def calculate_party_hedging(data, party_code, party_name, contributor_type):
     DataFrame
         A dataframe with hedging metrics by district and cycle
     """
-    # Filter for specified party
-    party_data = data[data['party'] == party_code].copy()
+    group_vars = ['district', 'cycle', 'bonica.cid', 'party']
+    
+    # Filter for specified party (rows with missing keys or amounts are never among the top two)
+    party_data = data[data['party'] == party_code].dropna(subset = group_vars + ['total_amount'])
     
     # Sort the data
     party_data = party_data.sort_values(
-        ['district', 'cycle', 'bonica.cid', 'party', 'total_amount'], 
+        group_vars + ['total_amount'], 
         ascending=[True, True, True, True, False]
     )
     
-    # Create ranking (useful for pivot)
-    party_data['rank'] = party_data.groupby(
-        ['district', 'cycle', 'bonica.cid', 'party']
-    )['bonica.rid'].transform(lambda x: pd.Series(range(1, len(x) + 1)))
-    
-    # Select top two candidates
-    party_data = party_data.groupby(['district', 'cycle', 'bonica.cid', 'party']).apply(
-        lambda x: x.nlargest(2, 'total_amount')
-    ).reset_index(drop=True)
-    
-    # Recompute rank after filtering
-    party_data['rank'] = party_data.groupby(
-        ['district', 'cycle', 'bonica.cid', 'party']
-    ).cumcount() + 1
-    
-    # Pivot to get contributions to top candidates
-    party_data_pivot = party_data.pivot_table(
-        index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-        columns='rank',
-        values='total_amount',
-        fill_value=0
-    ).reset_index()
+    # Create ranking and select top two candidates
+    rank = party_data.groupby(group_vars).cumcount() + 1
+    party_data = party_data[rank <= 2]
+    rank = rank[rank <= 2]
     
-    # Rename columns based on party name
-    party_data_pivot = party_data_pivot.rename(columns={
-        1.0: f"total_amount_{party_name}_first", 
-        2.0: f"total_amount_{party_name}_second"
+    # Contributions to top candidates (0 if the contributor gave to one candidate only)
+    party_data = party_data[['district', 'cycle', 'bonica.cid', 'contributor.name']].assign(**{
+        f"total_amount_{party_name}_first": party_data['total_amount'].where(rank == 1, 0),
+        f"total_amount_{party_name}_second": party_data['total_amount'].where(rank == 2, 0)
     })
+    party_data_pivot = party_data.groupby(['district', 'cycle', 'bonica.cid', 'contributor.name']).sum().reset_index()
     
     # Calculate hedging metrics
     party_data_pivot['hedging'] = abs(
@@ -114,7 +111,76 @@ def calculate_party_hedging(data, party_code, party_name, contributor_type):
 
 # print("Processing OUTPUT_2_ext, OUTPUT_3_ext, and OUTPUT_4_ext...")
 
-def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, output_name, single_death_districts, multiple_death_districts):
+def treated_slice_aggregates(input_df, output_7_df, windows, output_names):
+    """
+    Aggregates of the 22 slices over the contributions of the treated district-cycles between death_date
+    and special_elections_date, for each treatment and contributor-type variant.
+    
+    All variants of a treatment come from one grouped pass (see outputs_scripts/aggregate_slices.py).
+    
+    Parameters:
+    -----------
+    input_df : DataFrame
+        The raw contribution data (OUTPUT_1)
+    output_7_df : DataFrame
+        The treatment data with treat_1, treat_2, treat_3, death_date, special_elections_date
+    windows : DataFrame
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags
+    output_names : list
+        Outputs to aggregate (e.g., ['OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4_1', 'OUTPUT_4_2'])
+    
+    Returns:
+    --------
+    dict
+        treat_num -> output_name -> DataFrame with district, cycle and the _1, _2 or _3 versions of the
+        variables (missing where a slice has no contributions). Treatments without treated districts are left out.
+    """
+    aggregates = {}
+    for treat_num in [1, 2, 3]:
+        if not (output_7_df[f'treat_{treat_num}'] == 1).any():
+            continue
+        
+        input_treated = input_df[windows.loc[input_df.index, f'window_{treat_num}'].values]
+        aggregates[treat_num] = aggregate_slices_variants(input_treated, {
+            output_name: (filter_type, amount_filter, f'{suffix}_{treat_num}')
+            for output_name, (filter_type, amount_filter, suffix) in CONTRIBUTOR_VARIANTS.items() if output_name in output_names
+            })
+    
+    return aggregates
+
+
+def update_treated_values(result_df, treated_df, overwrite_missing=False):
+    """
+    Overwrite the values of result_df with those of treated_df on matching (district, cycle), in place.
+    
+    Only the columns of treated_df that exist in result_df are updated, and missing values of treated_df
+    (e.g. slices without contributions) leave result_df unchanged unless overwrite_missing is True. Every
+    row of result_df is matched with one lookup, and each column is written once.
+    
+    Parameters:
+    -----------
+    result_df : DataFrame
+        Output with district and cycle
+    treated_df : DataFrame
+        Values of the treated district-cycles, with district and cycle (one row per district-cycle)
+    overwrite_missing : bool, optional
+        Also write the missing values of treated_df (the matching rows of result_df get exactly the values of treated_df)
+    """
+    rows = district_cycle_keys(treated_df).get_indexer(district_cycle_keys(result_df))
+    matched = rows >= 0
+    rows = np.maximum(rows, 0)
+    
+    for col in treated_df.columns:
+        if col in ['district', 'cycle'] or col not in result_df.columns:
+            continue
+        # Columns of empty placeholders are of object dtype, written as numbers as they would be one value at a time
+        values = treated_df[col].infer_objects().values[rows]
+        update = matched if overwrite_missing else matched & pd.notna(values)
+        if update.any():
+            result_df.loc[update, col] = values[update]
+
+
+def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, output_name, single_death_districts, multiple_death_districts, windows=None, treated_aggregates=None):
     """
     Create treatment-filtered versions of all variables in base_output_df.
     
@@ -128,6 +194,10 @@ def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, out
         The base output (OUTPUT_2, OUTPUT_3, or OUTPUT_4_1/OUTPUT_4_2)
     output_name : str
         Name for the output (e.g., 'OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4_1')
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
+    treated_aggregates : dict, optional
+        Output of treated_slice_aggregates including output_name (computed here if not given)
     
     Returns:
     --------
@@ -137,6 +207,11 @@ def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, out
     
     print(f"Creating treatment-filtered versions for {output_name}...")
     
+    if treated_aggregates is None:
+        if windows is None:
+            windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+        treated_aggregates = treated_slice_aggregates(input_df, output_7_df, windows, [output_name])
+    
     # Start with base output
     result_df = base_output_df.copy()
     
@@ -153,323 +228,17 @@ def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, out
         
     result_df = pd.concat([result_df, pd.DataFrame(new_cols, index=result_df.index)], axis=1)
     
-    # Determine suffix and filter type based on output_name
-    if output_name == 'OUTPUT_2':
-        filter_type = None
-        amount_filter = None
-        suffix = ''
-    elif output_name == 'OUTPUT_3':
-        filter_type = 'C'
-        amount_filter = None
-        suffix = '_corp'
-    elif output_name == 'OUTPUT_4_1':
-        filter_type = 'I'
-        amount_filter = None
-        suffix = '_ind'
-    elif output_name == 'OUTPUT_4_2':
-        filter_type = 'I'
-        amount_filter = 200
-        suffix = '_smallind'
-        
-    # Apply type and amount filters to input_df ONCE at the beginning
-    input_df_filtered = input_df.copy()
-    if filter_type:
-        input_df_filtered = input_df_filtered[input_df_filtered['contributor.type'] == filter_type]
-    if amount_filter:
-        input_df_filtered = input_df_filtered[input_df_filtered['amount'] < amount_filter]
-
-    # Step 2: For each treatment, filter contributions and recalculate for treatment == 1 rows
+    # Step 2: For each treatment, overwrite the treated district-cycles with the 22 aggregations of their
+    # contributions between death_date and special_elections_date
     for treat_num in [1, 2, 3]:
         print(f"Processing treat_{treat_num}...")
         
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
+        if treat_num not in treated_aggregates:
             print(f"No treated districts for treat_{treat_num}")
             continue
         
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            # Filter to only include districts that are in multiple_death_districts
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            # For multiple death districts, keep only the first occurrence (earliest cycle)
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                # For single death districts, keep all
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                # Combine: first occurrence for multiple deaths + all single deaths
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge filtered input_df with treated districts
-        input_treated = pd.merge(
-            input_df_filtered.drop(columns=['death_date', 'spec_election_date']),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date'])
-        ]
-        
-        # Now create all 22 aggregations for these treated district-cycles
-        treat_suffix = f'_{treat_num}'
-         
-        # Create aggregations (same 22 as before)
-        agg_dict = {}
-        
-        # 1: All contributions
-        agg_1 = input_treated.groupby(['district', 'cycle']).agg(
-            **{f'total_amount{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        agg_dict.update(agg_1.set_index(['district', 'cycle']).to_dict('index'))
-        
-        # 2: Before special election
-        agg_2 = input_treated[input_treated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_2.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 3: No primary
-        agg_3 = input_treated[input_treated['election.type'] != 'P'].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_no_primary{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_no_primary{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_3.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 4: No primary, before special
-        agg_4 = input_treated[(input_treated['election.type'] != 'P') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_no_primary_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_no_primary_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_4.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 5: Primary only
-        agg_5 = input_treated[input_treated['election.type'] == 'P'].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_primary{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_primary{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_5.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 6: Primary, before special
-        agg_6 = input_treated[(input_treated['election.type'] == 'P') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_primary_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_primary_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_6.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 7: General only
-        agg_7 = input_treated[input_treated['election.type'] == 'G'].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_7.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 8: General, before special
-        agg_8 = input_treated[(input_treated['election.type'] == 'G') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_8.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 9: Special only
-        agg_9 = input_treated[input_treated['election.type'] == 'S'].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_special{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_special{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_9.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 10: Special, before special
-        agg_10 = input_treated[(input_treated['election.type'] == 'S') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_special_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_special_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_10.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 11: Dem general
-        agg_11 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'G')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_11.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 12: Dem general, before special
-        agg_12 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'G') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_12.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 13: Dem primary
-        agg_13 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'P')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_primary{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_primary{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_13.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 14: Dem primary, before special
-        agg_14 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'P') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_primary_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_primary_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_14.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 15: Dem special
-        agg_15 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'S')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_special{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_special{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_15.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 16: Dem special, before special
-        agg_16 = input_treated[(input_treated['party'] == 100) & (input_treated['election.type'] == 'S') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_special_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_special_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_16.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 17: Rep general
-        agg_17 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'G')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_17.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 18: Rep general, before special
-        agg_18 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'G') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_18.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 19: Rep primary
-        agg_19 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'P')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_primary{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_primary{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_19.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 20: Rep primary, before special
-        agg_20 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'P') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_primary_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_primary_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_20.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 21: Rep special
-        agg_21 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'S')].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_special{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_special{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_21.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 22: Rep special, before special
-        agg_22 = input_treated[(input_treated['party'] == 200) & (input_treated['election.type'] == 'S') & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_special_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_special_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_22.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Step 3: Update result_df with these calculated values
         print(f"Updating values for treat_{treat_num}...")
-        for (district, cycle), values in agg_dict.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                if col in result_df.columns:
-                    result_df.loc[mask, col] = val
+        update_treated_values(result_df, treated_aggregates[treat_num][output_name])
     
     print(f"Finished creating treatment-filtered versions for {output_name}")
     return result_df
@@ -477,7 +246,7 @@ def create_treatment_filtered_outputs(input_df, output_7_df, base_output_df, out
 #%%
 # print("Processing OUTPUT_8_ext...")
 
-def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, single_death_districts, multiple_death_districts):
+def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, single_death_districts, multiple_death_districts, windows=None):
     """
     Create treatment-filtered versions of OUTPUT_8 variables.
     
@@ -489,6 +258,8 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         The treatment data with treat_1, treat_2, treat_3, death_date, special_elections_date
     base_output_df : DataFrame
         The base OUTPUT_8
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
     
     Returns:
     --------
@@ -498,6 +269,9 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
     
     print("Creating treatment-filtered versions for OUTPUT_8...")
     
+    if windows is None:
+        windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+    
     # Start with base output
     result_df = base_output_df.copy()
     
@@ -518,69 +292,30 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
     for treat_num in [1, 2, 3]:
         print(f"Processing treat_{treat_num} for OUTPUT_8...")
         
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
+        if not (output_7_df[f'treat_{treat_num}'] == 1).any():
             print(f"No treated districts for treat_{treat_num}")
             continue
         
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            # Filter to only include districts that are in multiple_death_districts
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            # For multiple death districts, keep only the first occurrence (earliest cycle)
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                # For single death districts, keep all
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                # Combine: first occurrence for multiple deaths + all single deaths
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge input_df with treated districts to filter contributions
-        input_treated = pd.merge(
-            input_df.drop(columns=['death_date', 'spec_election_date']),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date'])
-        ]
+        # Contributions of the treated district-cycles between death_date and special_elections_date (see main_scripts/treatment_windows.py)
+        input_treated = input_df[windows.loc[input_df.index, f'window_{treat_num}'].values]
         
         treat_suffix = f'_{treat_num}'
         
+        # Contributor-level cube of these contributions, as for OUTPUT_8 (see outputs_scripts/hedging_cube.py)
+        treated_cube = contributor_cube(input_treated)
+        
         # === CORPORATE CONTRIBUTORS ===
         print(f"  Processing corporate contributors for treat_{treat_num}...")
         
         # 1. avg_counting_hedging_corp
-        temp_corp_1 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_corp_1 = counting_hedging(treated_cube, 'G', 'corp', 'counting_hedging_corp')
         
         temp_corp_1 = temp_corp_1.groupby(['district', 'cycle']).agg(
             **{f'avg_counting_hedging_corp{treat_suffix}': ('counting_hedging_corp', 'mean')}
         ).reset_index()
         
         # 2. avg_counting_hedging_corp_dem_primary and avg_counting_hedging_corp_rep_primary
-        temp_corp_2 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'C') &
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp_primary=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_corp_2 = counting_hedging(treated_cube, 'P', 'corp', 'counting_hedging_corp_primary')
         
         temp_corp_2 = temp_corp_2.pivot_table(
             index=['district', 'cycle'],
@@ -607,13 +342,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 3. hedging_money_general_corp
-        temp_corp_3 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_corp_3 = amounts_by_party(treated_cube, 'G', 'corp')
         
         temp_corp_3 = temp_corp_3.pivot_table(
             index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
@@ -639,13 +368,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 4. hedging_money_dem_primary_corp and hedging_money_rep_primary_corp
-        temp_corp_4 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party', 'bonica.rid']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_corp_4 = amounts_by_recipient(treated_cube, 'P', 'corp')
         
         temp_corp_4 = temp_corp_4[temp_corp_4.duplicated(subset=['district', 'cycle', 'bonica.cid', 'party'], keep=False)]
         
@@ -662,26 +385,14 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         print(f"  Processing individual contributors for treat_{treat_num}...")
         
         # 1. avg_counting_hedging_ind
-        temp_ind_1 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_ind_1 = counting_hedging(treated_cube, 'G', 'ind', 'counting_hedging_ind')
         
         temp_ind_1 = temp_ind_1.groupby(['district', 'cycle']).agg(
             **{f'avg_counting_hedging_ind{treat_suffix}': ('counting_hedging_ind', 'mean')}
         ).reset_index()
         
         # 2. avg_counting_hedging_ind_dem_primary and avg_counting_hedging_ind_rep_primary
-        temp_ind_2 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'I') &
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind_primary=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_ind_2 = counting_hedging(treated_cube, 'P', 'ind', 'counting_hedging_ind_primary')
         
         temp_ind_2 = temp_ind_2.pivot_table(
             index=['district', 'cycle'],
@@ -707,13 +418,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 3. hedging_money_general_ind
-        temp_ind_3 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_ind_3 = amounts_by_party(treated_cube, 'G', 'ind')
         
         temp_ind_3 = temp_ind_3.pivot_table(
             index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
@@ -738,13 +443,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 4. hedging_money_dem_primary_ind and hedging_money_rep_primary_ind
-        temp_ind_4 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party', 'bonica.rid']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_ind_4 = amounts_by_recipient(treated_cube, 'P', 'ind')
         
         temp_ind_4 = temp_ind_4[temp_ind_4.duplicated(subset=['district', 'cycle', 'bonica.cid', 'party'], keep=False)]
         
@@ -761,28 +460,14 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         print(f"  Processing small individual contributors for treat_{treat_num}...")
         
         # 1. avg_counting_hedging_smallind
-        temp_smallind_1 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_smallind_1 = counting_hedging(treated_cube, 'G', 'smallind', 'counting_hedging_smallind')
         
         temp_smallind_1 = temp_smallind_1.groupby(['district', 'cycle']).agg(
             **{f'avg_counting_hedging_smallind{treat_suffix}': ('counting_hedging_smallind', 'mean')}
         ).reset_index()
         
         # 2. avg_counting_hedging_smallind_dem_primary and avg_counting_hedging_smallind_rep_primary
-        temp_smallind_2 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'I') &
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind_primary=('bonica.rid', 'nunique')
-        ).reset_index()
+        temp_smallind_2 = counting_hedging(treated_cube, 'P', 'smallind', 'counting_hedging_smallind_primary')
         
         temp_smallind_2 = temp_smallind_2.pivot_table(
             index=['district', 'cycle'],
@@ -808,14 +493,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 3. hedging_money_general_smallind
-        temp_smallind_3 = input_treated[
-            (input_treated['election.type'] == 'G') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_smallind_3 = amounts_by_party(treated_cube, 'G', 'smallind')
         
         temp_smallind_3 = temp_smallind_3.pivot_table(
             index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
@@ -840,14 +518,7 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
         ).reset_index()
         
         # 4. hedging_money_dem_primary_smallind and hedging_money_rep_primary_smallind
-        temp_smallind_4 = input_treated[
-            (input_treated['election.type'] == 'P') & 
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party', 'bonica.rid']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
+        temp_smallind_4 = amounts_by_recipient(treated_cube, 'P', 'smallind')
         
         temp_smallind_4 = temp_smallind_4[temp_smallind_4.duplicated(subset=['district', 'cycle', 'bonica.cid', 'party'], keep=False)]
         
@@ -868,13 +539,10 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
                        temp_smallind_1, temp_smallind_2, temp_smallind_3, temp_smallind_4]:
             treat_result = pd.merge(treat_result, temp_df, on=['district', 'cycle'], how='outer')
         
-        # Update result_df with calculated values
+        # Update result_df with calculated values, missing ones included (the last row of a district-cycle wins)
         print(f"  Updating result_df for treat_{treat_num}...")
-        for idx, row in treat_result.iterrows():
-            mask = (result_df['district'] == row['district']) & (result_df['cycle'] == row['cycle'])
-            for col in treat_result.columns:
-                if col not in ['district', 'cycle'] and col in result_df.columns:
-                    result_df.loc[mask, col] = row[col]
+        treat_result = treat_result.drop_duplicates(subset=['district', 'cycle'], keep='last')
+        update_treated_values(result_df, treat_result, overwrite_missing=True)
     
     print("Finished creating treatment-filtered versions for OUTPUT_8")
     return result_df
@@ -1641,7 +1309,205 @@ def create_output8_treatment_filtered(input_df, output_7_df, base_output_df, sin
 #%%
 
 
-def add_gen_np_variables(input_df, output_7_df, ext_df, output_name, single_death_districts, multiple_death_districts):
+def untreated_flags(keys, output_7_df, treat_num, multiple_death_districts):
+    """
+    Flag the untreated district-cycles of a treatment, whose _gen_np variables only keep general election contributions.
+    
+    - treat_1: treat_1 == 0, treat_1 == 1 with treat_3 == 0, and the treated cycles after the first one of multiple death districts
+    - treat_2 and treat_3: treat_3 == 0, or district-cycles missing from OUTPUT_7
+    
+    Parameters:
+    -----------
+    keys : MultiIndex
+        (district, cycle) keys from district_cycle_keys
+    output_7_df : DataFrame
+        The treatment data with treat_1, treat_2, treat_3 (one row per district-cycle)
+    treat_num : int
+        1, 2 or 3
+    multiple_death_districts : list
+        List of districts with multiple deaths
+    
+    Returns:
+    --------
+    array of bool
+    """
+    rows = district_cycle_keys(output_7_df).get_indexer(keys)
+    found = rows >= 0
+    rows = np.maximum(rows, 0)
+    
+    def treat(num):
+        values = pd.to_numeric(output_7_df[f'treat_{num}'], errors='coerce').values.astype('float64')
+        return np.where(found, values[rows], np.nan) if len(values) > 0 else np.full(len(keys), np.nan)
+    
+    treat_3 = treat(3)
+    if treat_num != 1:
+        return (treat_3 == 0) | np.isnan(treat_3)
+    
+    treat_1 = treat(1)
+    
+    # First treat_1 cycle of multiple death districts
+    first_deaths = output_7_df[(output_7_df['treat_1'] == 1) & output_7_df['district'].isin(multiple_death_districts)]
+    first_death_cycle = pd.to_numeric(first_deaths['cycle'], errors='coerce').groupby(first_deaths['district'].values).min()
+    districts = keys.get_level_values(0)
+    later_death_cycle = (
+        districts.isin(multiple_death_districts) &
+        (treat_1 == 1) & (treat_3 == 1) &
+        (keys.get_level_values(1).values != first_death_cycle.reindex(districts).values)
+    )
+    
+    return (treat_1 == 0) | ((treat_1 == 1) & (treat_3 == 0)) | later_death_cycle
+
+
+def override_treated_values(result_df, treated_df, untreated_df):
+    """
+    Write the values of the treated district-cycles, overridden by those of the untreated ones, into result_df, in place.
+    
+    Both frames are combined on (district, cycle), keeping the untreated value wherever it is not missing,
+    and written with one indexed update (see update_treated_values).
+    
+    Parameters:
+    -----------
+    result_df : DataFrame
+        Output with district and cycle
+    treated_df, untreated_df : DataFrame or None
+        Values of the treated and untreated district-cycles, with district and cycle (one row per district-cycle)
+    """
+    frames = [df for df in [untreated_df, treated_df] if df is not None]
+    if not frames:
+        return
+    
+    combined = pd.concat(frames, ignore_index=True)
+    keys = district_cycle_keys(combined)
+    combined = combined.drop(columns=['district', 'cycle']).groupby(
+        [keys.get_level_values(0), keys.get_level_values(1)], sort=False
+    ).first() # first non-missing value, untreated first
+    combined.index.names = ['district', 'cycle']
+    update_treated_values(result_df, combined.reset_index())
+
+
+def add_treated_override_variables(input_df, output_7_df, result_df, variables, aggregate, treated_election, windows, multiple_death_districts):
+    """
+    Add the _1, _2, _3 versions of variables to result_df (treated-override engine of the _gen_np and _gen_np_spec variables).
+    
+    For each treatment, the variables of the treated district-cycles are aggregated over their contributions
+    between death_date and special_elections_date (election.type != 'P', or election.type == 'S'), and those of
+    the untreated district-cycles (see untreated_flags) over their general election contributions. Untreated
+    values override treated ones, and district-cycles without contributions are left missing.
+    
+    Parameters:
+    -----------
+    input_df : DataFrame
+        The raw contribution data (OUTPUT_1)
+    output_7_df : DataFrame
+        The treatment data with treat_1, treat_2, treat_3
+    result_df : DataFrame
+        The _ext output, with district and cycle
+    variables : list
+        Base names of the variables
+    aggregate : function
+        (contributions, treat_suffix) -> DataFrame with district, cycle and the variables suffixed with treat_suffix
+    treated_election : str
+        '-P' (election.type != 'P') or 'S'
+    windows : DataFrame
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags
+    multiple_death_districts : list
+        List of districts with multiple deaths
+    
+    Returns:
+    --------
+    DataFrame
+        result_df with the _1, _2, _3 versions of variables
+    """
+    result_df = result_df.assign(**{f'{var}_{treat_num}': np.nan for treat_num in [1, 2, 3] for var in variables})
+    
+    if treated_election == '-P':
+        treated_election_type = (input_df['election.type'] != 'P').values
+    else:
+        treated_election_type = (input_df['election.type'] == treated_election).values
+    
+    # Position of the district-cycle of each contribution in result_df
+    keys = district_cycle_keys(result_df).unique()
+    input_rows = keys.get_indexer(district_cycle_keys(input_df))
+    in_result = (input_rows >= 0) & (input_df['election.type'] == 'G').values
+    input_rows = np.maximum(input_rows, 0)
+    
+    for treat_num in [1, 2, 3]:
+        print(f"  Processing treat_{treat_num}...")
+        treat_suffix = f'_{treat_num}'
+        
+        treated_df = None
+        if (output_7_df[f'treat_{treat_num}'] == 1).any():
+            input_treated = input_df[windows.loc[input_df.index, f'window_{treat_num}'].values & treated_election_type]
+            treated_df = aggregate(input_treated, treat_suffix)
+        else:
+            print(f"  No treated districts for treat_{treat_num}")
+        
+        untreated_df = None
+        untreated = untreated_flags(keys, output_7_df, treat_num, multiple_death_districts)
+        if untreated.any():
+            untreated_df = aggregate(input_df[in_result & untreated[input_rows]], treat_suffix)
+        else:
+            print(f"  No untreated districts for treat_{treat_num}")
+        
+        print(f"  Updating result_df with {treat_suffix} values...")
+        override_treated_values(result_df, treated_df, untreated_df)
+    
+    return result_df
+
+
+def general_hedging_aggregates(input_df, stem, treat_suffix=''):
+    """
+    Hedging of corporate, individual and small individual contributors between parties in general elections
+    (contributions with later_than_special != 1), by district-cycle.
+    
+    - hedging_money_general{stem}_{type}: mean over contributors of |total to Democrats - total to Republicans|
+    - avg_counting_hedging{stem}_{type}: mean over parties of the number of recipients
+    
+    Party totals of each contributor come from one grouped sum of amounts masked by party.
+    
+    Parameters:
+    -----------
+    input_df : DataFrame
+        Contributions (already restricted to the relevant elections and district-cycles)
+    stem : str
+        Stem of the variable names ('_np' or '_np_spec')
+    treat_suffix : str
+        Suffix of the variable names (e.g., '_1')
+    
+    Returns:
+    --------
+    DataFrame
+        district, cycle and the 6 variables (missing where a contributor type has no contributions)
+    """
+    before_special = input_df[(input_df['later_than_special'] != 1).values]
+    party = before_special['party'].values
+    
+    columns = {}
+    for output_name in ['OUTPUT_3', 'OUTPUT_4_1', 'OUTPUT_4_2']:
+        filter_type, amount_filter, suffix = CONTRIBUTOR_VARIANTS[output_name]
+        in_variant = variant_mask(before_special, filter_type, amount_filter)
+        
+        # Contributions of each contributor to Democrats and Republicans (rows without party are left out)
+        contributions = before_special[in_variant & pd.notna(party)]
+        amounts = pd.DataFrame({
+            'total_amount_dem': np.where(contributions['party'].values == 100, contributions['amount'].values, np.nan),
+            'total_amount_rep': np.where(contributions['party'].values == 200, contributions['amount'].values, np.nan)
+        }, index=contributions.index)
+        contributor_totals = amounts.groupby(
+            [contributions['district'], contributions['cycle'], contributions['bonica.cid'], contributions['contributor.name']]
+        ).sum()
+        hedging = (contributor_totals['total_amount_dem'] - contributor_totals['total_amount_rep']).abs()
+        columns[f'hedging_money_general{stem}{suffix}{treat_suffix}'] = hedging.groupby(level=[0, 1]).mean()
+        
+        counting = before_special[in_variant].groupby(['district', 'cycle', 'party'])['bonica.rid'].nunique()
+        columns[f'avg_counting_hedging{stem}{suffix}{treat_suffix}'] = counting.groupby(level=[0, 1]).mean()
+    
+    result = pd.concat(columns, axis=1)
+    result.index.names = ['district', 'cycle']
+    return result.reset_index()
+
+
+def add_gen_np_variables(input_df, output_7_df, ext_df, output_name, single_death_districts, multiple_death_districts, windows=None):
     """
     Add _gen_np suffix variables with _1, _2, _3 versions to _ext datasets.
     
@@ -1662,6 +1528,8 @@ def add_gen_np_variables(input_df, output_7_df, ext_df, output_name, single_deat
         List of districts with single death
     multiple_death_districts : list
         List of districts with multiple deaths
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
     
     Returns:
     --------
@@ -1671,33 +1539,14 @@ def add_gen_np_variables(input_df, output_7_df, ext_df, output_name, single_deat
     
     print(f"Adding _gen_np variables with _1, _2, _3 suffixes for {output_name}_ext...")
     
+    if windows is None:
+        windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+    
     # Start with the existing ext_df
     result_df = ext_df.copy()
     
-    # Determine filter type based on output_name
-    if output_name == 'OUTPUT_2':
-        filter_type = None
-        amount_filter = None
-        suffix = ''
-    elif output_name == 'OUTPUT_3':
-        filter_type = 'C'
-        amount_filter = None
-        suffix = '_corp'
-    elif output_name == 'OUTPUT_4_1':
-        filter_type = 'I'
-        amount_filter = None
-        suffix = '_ind'
-    elif output_name == 'OUTPUT_4_2':
-        filter_type = 'I'
-        amount_filter = 200
-        suffix = '_smallind'
-    
-    # Apply type and amount filters to input_df
-    input_df_filtered = input_df.copy()
-    if filter_type:
-        input_df_filtered = input_df_filtered[input_df_filtered['contributor.type'] == filter_type]
-    if amount_filter:
-        input_df_filtered = input_df_filtered[input_df_filtered['amount'] < amount_filter]
+    # Contributor-type variant of the output (see outputs_scripts/aggregate_slices.py)
+    filter_type, amount_filter, suffix = CONTRIBUTOR_VARIANTS[output_name]
     
     # Define base gen_np variables
     gen_np_vars_base = [
@@ -1715,394 +1564,22 @@ def add_gen_np_variables(input_df, output_7_df, ext_df, output_name, single_deat
         f'tran_count_rep_gen_np_without_LTS1{suffix}'
     ]
     
-    # Initialize _1, _2, _3 versions with NaN
-    for treat_num in [1, 2, 3]:
-        for var in gen_np_vars_base:
-            result_df[f'{var}_{treat_num}'] = np.nan
+    # total_amount and tran_count of all contributions, Democrats and Republicans, with and without LTS1
+    def aggregate(contributions, treat_suffix):
+        return aggregate_slices_variants(
+            contributions, {output_name: (filter_type, amount_filter, f'{suffix}{treat_suffix}')}, party_slices('_gen_np')
+        )[output_name]
     
-    # Process each treatment
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing treat_{treat_num} for gen_np variables...")
-        
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
-            print(f"  No treated districts for treat_{treat_num}")
-            continue
-        
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge filtered input_df with treated districts
-        input_treated = pd.merge(
-            input_df_filtered.drop(columns=['death_date', 'spec_election_date'], errors='ignore'),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions with election.type != 'P' between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date']) &
-            (input_treated['election.type'] != 'P')
-        ]
-        
-        # Create aggregations for treated rows
-        treat_suffix = f'_{treat_num}'
-        agg_dict = {}
-        
-        # 1: All contributions (no primary) - includes both G and S
-        agg_1 = input_treated.groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        agg_dict.update(agg_1.set_index(['district', 'cycle']).to_dict('index'))
-        
-        # 2: Before special election - includes both G and S
-        agg_2 = input_treated[input_treated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_2.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 3: Dem general
-        agg_3 = input_treated[input_treated['party'] == 100].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_3.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 4: Dem general, before special
-        agg_4 = input_treated[(input_treated['party'] == 100) & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_4.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 5: Rep general
-        agg_5 = input_treated[input_treated['party'] == 200].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_5.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 6: Rep general, before special
-        agg_6 = input_treated[(input_treated['party'] == 200) & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_6.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Update result_df with calculated values for treated rows
-        print(f"  Updating result_df with _gen_np{treat_suffix} values for treated rows...")
-        for (district, cycle), values in agg_dict.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                if col in result_df.columns:
-                    result_df.loc[mask, col] = val
-    
-    # # Process untreated rows (all treatments use election.type == 'G')
-    # # We need to process this for EACH treatment separately since treat_1 has different treated rows than treat_2 and treat_3
-    # print("  Processing untreated rows with election.type == 'G'...")
-    
-    # all_districts = result_df[['district', 'cycle']].copy()
-    
-    # # Merge with treatment info for treat_3 (most comprehensive)
-    # all_districts = pd.merge(
-    #     all_districts,
-    #     output_7_df[['district', 'cycle', 'treat_3']],
-    #     on=['district', 'cycle'],
-    #     how='left'
-    # )
-    
-    # # Select untreated rows (treat_3 == 0 or NaN)
-    # untreated_districts = all_districts[(all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())][['district', 'cycle']]
-    
-    # if not untreated_districts.empty:
-    #     # Merge with input data
-    #     input_untreated = pd.merge(
-    #         input_df_filtered,
-    #         untreated_districts,
-    #         on=['district', 'cycle'],
-    #         how='inner'
-    #     )
-        
-    #     # Filter for general elections only
-    #     input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-    #     # Create aggregations for untreated rows
-    #     agg_dict_untreated = {}
-        
-    #     # 1: All general election contributions
-    #     agg_gen_all = input_untreated.groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_gen_np{suffix}': ('amount', 'sum'),
-    #            f'tran_count_gen_np{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     agg_dict_untreated.update(agg_gen_all.set_index(['district', 'cycle']).to_dict('index'))
-        
-    #     # 2: General elections, before special election
-    #     agg_gen_lts = input_untreated[input_untreated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_gen_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     # Party-specific aggregations
-    #     agg_dem = input_untreated[input_untreated['party'] == 100].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_dem_gen_np{suffix}': ('amount', 'sum'),
-    #            f'tran_count_dem_gen_np{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_dem.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_dem_lts = input_untreated[(input_untreated['party'] == 100) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_dem_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_dem_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_dem_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_rep = input_untreated[input_untreated['party'] == 200].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_rep_gen_np{suffix}': ('amount', 'sum'),
-    #            f'tran_count_rep_gen_np{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_rep.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_rep_lts = input_untreated[(input_untreated['party'] == 200) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_rep_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_rep_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_rep_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     # Update result_df with calculated values for untreated rows (copy to all _1, _2, _3)
-    #     print("  Updating result_df with _gen_np values for untreated rows...")
-    #     for (district, cycle), values in agg_dict_untreated.items():
-    #         mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-    #         for col, val in values.items():
-    #             # Update all three treatment versions with the same untreated values
-    #             for treat_num in [1, 2, 3]:
-    #                 col_with_suffix = f'{col}_{treat_num}'
-    #                 if col_with_suffix in result_df.columns:
-    #                     result_df.loc[mask, col_with_suffix] = val
-    
-    # print(f"Finished adding _gen_np variables with _1, _2, _3 suffixes for {output_name}_ext")
-    # return result_df
-    
-    # Process untreated rows (all treatments use election.type == 'G')
-    # We need to process this for EACH treatment separately since treat_1 has different treated rows than treat_2 and treat_3
-    print("  Processing untreated rows with election.type == 'G'...")
+    # Treated district-cycles: election.type != 'P' between death_date and special_elections_date, other rows: election.type == 'G'
+    result_df = add_treated_override_variables(
+        input_df, output_7_df, result_df, gen_np_vars_base, aggregate, '-P', windows, multiple_death_districts
+    )
     
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing untreated rows for treat_{treat_num}...")
-        
-        all_districts = result_df[['district', 'cycle']].copy()
-        
-        # Merge with ALL treatment info at once
-        all_districts = pd.merge(
-            all_districts,
-            output_7_df[['district', 'cycle', 'treat_1', 'treat_2', 'treat_3']],
-            on=['district', 'cycle'],
-            how='left'
-        )
-        
-        if treat_num == 1:
-            # For treat_1: untreated means:
-            # 1. treat_1 == 0 (never treated)
-            # 2. OR (treat_1 == 1 AND treat_3 == 0) - post first death but no death this cycle
-            # 3. OR (district in multiple_death_districts AND treat_1 == 1 AND treat_3 == 1 AND this is NOT the first death)
-            
-            # Get the first death for each district (already processed in treated section)
-            first_deaths = output_7_df[output_7_df['treat_1'] == 1].copy()
-            if not first_deaths.empty and len(multiple_death_districts) > 0:
-                first_deaths_multiple = first_deaths[first_deaths['district'].isin(multiple_death_districts)]
-                if not first_deaths_multiple.empty:
-                    first_death_cycles = first_deaths_multiple.groupby('district')['cycle'].min().reset_index()
-                    first_death_cycles.columns = ['district', 'first_death_cycle']
-                    
-                    # Merge to identify which rows are first deaths
-                    all_districts = pd.merge(
-                        all_districts,
-                        first_death_cycles,
-                        on='district',
-                        how='left'
-                    )
-                    
-                    # Create a flag for multiple-death districts
-                    all_districts['is_multiple_death'] = all_districts['district'].isin(multiple_death_districts)
-                    
-                    # Untreated for treat_1 includes:
-                    # - Never treated (treat_1 == 0)
-                    # - Post-treatment non-death cycles (treat_1 == 1, treat_3 == 0)
-                    # - Subsequent deaths ONLY in multiple-death districts (is_multiple_death & treat_3 == 1 & cycle != first_death_cycle)
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0)) |
-                        ((all_districts['is_multiple_death'] == True) & 
-                         (all_districts['treat_1'] == 1) & 
-                         (all_districts['treat_3'] == 1) & 
-                         (all_districts['cycle'] != all_districts['first_death_cycle']))
-                    ][['district', 'cycle']]
-                else:
-                    # No multiple death districts, simpler logic
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                    ][['district', 'cycle']]
-            else:
-                # No multiple death districts, simpler logic
-                untreated_districts = all_districts[
-                    (all_districts['treat_1'] == 0) | 
-                    ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                ][['district', 'cycle']]
-            
-        else:
-            # For treat_2 and treat_3: untreated means treat_3 == 0 (no death in this cycle)
-            # treat_2 and treat_3 have identical logic
-            untreated_districts = all_districts[
-                (all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())
-            ][['district', 'cycle']]
-            
-        if untreated_districts.empty:
-            print(f"  No untreated districts for treat_{treat_num}")
-            continue
-        
-        # Merge with input data
-        input_untreated = pd.merge(
-            input_df_filtered,
-            untreated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for general elections only
-        input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-        # Create aggregations for untreated rows
-        agg_dict_untreated = {}
-        
-        # 1: All general election contributions
-        agg_gen_all = input_untreated.groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np{suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        agg_dict_untreated.update(agg_gen_all.set_index(['district', 'cycle']).to_dict('index'))
-        
-        # 2: General elections, before special election
-        agg_gen_lts = input_untreated[input_untreated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_gen_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Party-specific aggregations
-        agg_dem = input_untreated[input_untreated['party'] == 100].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np{suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_dem.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_dem_lts = input_untreated[(input_untreated['party'] == 100) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_dem_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_rep = input_untreated[input_untreated['party'] == 200].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np{suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_rep.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_rep_lts = input_untreated[(input_untreated['party'] == 200) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_rep_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Update result_df with calculated values for untreated rows for THIS treatment
-        print(f"  Updating result_df with _gen_np_{treat_num} values for untreated rows...")
-        treat_suffix = f'_{treat_num}'
-        for (district, cycle), values in agg_dict_untreated.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                col_with_suffix = f'{col}{treat_suffix}'
-                if col_with_suffix in result_df.columns:
-                    result_df.loc[mask, col_with_suffix] = val    
-                    
     print(f"Finished adding _gen_np variables with _1, _2, _3 suffixes for {output_name}_ext")
     return result_df
 
 
-def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_death_districts, multiple_death_districts):
+def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_death_districts, multiple_death_districts, windows=None):
     """
     Add _gen_np suffix variables with _1, _2, _3 versions to OUTPUT_8_ext dataset.
     
@@ -2121,6 +1598,8 @@ def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_deat
         List of districts with single death
     multiple_death_districts : list
         List of districts with multiple deaths
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
     
     Returns:
     --------
@@ -2130,6 +1609,9 @@ def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_deat
     
     print("Adding _gen_np variables with _1, _2, _3 suffixes for OUTPUT_8_ext...")
     
+    if windows is None:
+        windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+    
     # Start with the existing output8_ext
     result_df = output8_ext.copy()
     
@@ -2143,737 +1625,16 @@ def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_deat
         'avg_counting_hedging_np_smallind',
     ]
     
-    # Initialize _1, _2, _3 versions with NaN
-    for treat_num in [1, 2, 3]:
-        for var in gen_np_vars_base:
-            result_df[f'{var}_{treat_num}'] = np.nan
-    
-    # Process each treatment
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing treat_{treat_num} for OUTPUT_8 gen_np variables...")
-        
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
-            print(f"  No treated districts for treat_{treat_num}")
-            continue
-        
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge input_df with treated districts
-        input_treated = pd.merge(
-            input_df.drop(columns=['death_date', 'spec_election_date'], errors='ignore'),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions with election.type != 'P' between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date']) &
-            (input_treated['election.type'] != 'P')
-        ]
-        
-        treat_suffix = f'_{treat_num}'
-        agg_dict = {}
-        
-        ### Corporate contributors
-        
-        ## Hedging
-        temp_corp = input_treated[
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_corp = temp_corp.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_corp.columns:
-            temp_corp = temp_corp.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_corp['total_amount_dem'] = 0
-            
-        if 200.0 in temp_corp.columns:
-            temp_corp = temp_corp.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_corp['total_amount_rep'] = 0
-        
-        temp_corp['hedging'] = abs(temp_corp['total_amount_dem'] - temp_corp['total_amount_rep'])
-        
-        temp_corp_result = temp_corp.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_corp{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_corp_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_corp{treat_suffix}'] = row[f'hedging_money_general_np_corp{treat_suffix}']
-            
-           
-        ## Avg_count
-        temp_corp_count = input_treated[
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_corp_count_result = temp_corp_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_corp{treat_suffix}': ('counting_hedging_corp', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_corp_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_corp{treat_suffix}'] = row[f'avg_counting_hedging_np_corp{treat_suffix}']
-        
-        
-        ### Individual contributors
-        ## Hedging
-        temp_ind = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_ind = temp_ind.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_ind.columns:
-            temp_ind = temp_ind.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_ind['total_amount_dem'] = 0
-            
-        if 200.0 in temp_ind.columns:
-            temp_ind = temp_ind.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_ind['total_amount_rep'] = 0
-        
-        temp_ind['hedging'] = abs(temp_ind['total_amount_dem'] - temp_ind['total_amount_rep'])
-        
-        temp_ind_result = temp_ind.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_ind{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_ind_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_ind{treat_suffix}'] = row[f'hedging_money_general_np_ind{treat_suffix}']
-        
-        ## Avg_count
-        temp_ind_count = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_ind_count_result = temp_ind_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_ind{treat_suffix}': ('counting_hedging_ind', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_ind_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_ind{treat_suffix}'] = row[f'avg_counting_hedging_np_ind{treat_suffix}']
-        
-        
-        ### Small individual contributors
-        ## Hedging
-        temp_smallind = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_smallind = temp_smallind.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_smallind.columns:
-            temp_smallind = temp_smallind.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_smallind['total_amount_dem'] = 0
-            
-        if 200.0 in temp_smallind.columns:
-            temp_smallind = temp_smallind.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_smallind['total_amount_rep'] = 0
-        
-        temp_smallind['hedging'] = abs(temp_smallind['total_amount_dem'] - temp_smallind['total_amount_rep'])
-        
-        temp_smallind_result = temp_smallind.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_smallind{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_smallind_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_smallind{treat_suffix}'] = row[f'hedging_money_general_np_smallind{treat_suffix}']
-        
-        ## Avg_count
-        temp_smallind_count = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_smallind_count_result = temp_smallind_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_smallind{treat_suffix}': ('counting_hedging_smallind', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_smallind_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_smallind{treat_suffix}'] = row[f'avg_counting_hedging_np_smallind{treat_suffix}']
-
-        
-        # Update result_df with calculated values for treated rows
-        print(f"  Updating result_df with _gen_np{treat_suffix} values for treated rows...")
-        for (district, cycle), values in agg_dict.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                if col in result_df.columns:
-                    result_df.loc[mask, col] = val
-    
-    # # Process untreated rows (all treatments use election.type == 'G')
-    # print("  Processing untreated rows with election.type == 'G'...")
-    
-    # all_districts = result_df[['district', 'cycle']].copy()
-    
-    # # Merge with treatment info
-    # all_districts = pd.merge(
-    #     all_districts,
-    #     output_7_df[['district', 'cycle', 'treat_3']],
-    #     on=['district', 'cycle'],
-    #     how='left'
-    # )
-    
-    # # Select untreated rows (treat_3 == 0 or NaN)
-    # untreated_districts = all_districts[(all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())][['district', 'cycle']]
-    
-    # if not untreated_districts.empty:
-    #     # Merge with input data
-    #     input_untreated = pd.merge(
-    #         input_df,
-    #         untreated_districts,
-    #         on=['district', 'cycle'],
-    #         how='inner'
-    #     )
-        
-    #     # Filter for general elections only
-    #     input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-    #     # Create aggregations for untreated rows
-    #     agg_dict_untreated = {}
-        
-    #     ### Corporate contributors - general only
-        
-    #     ## Hedging
-    #     temp_corp_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'C') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_corp_unt = temp_corp_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_corp_unt.columns:
-    #         temp_corp_unt = temp_corp_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_corp_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_corp_unt.columns:
-    #         temp_corp_unt = temp_corp_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_corp_unt['total_amount_rep'] = 0
-        
-    #     temp_corp_unt['hedging'] = abs(temp_corp_unt['total_amount_dem'] - temp_corp_unt['total_amount_rep'])
-        
-    #     temp_corp_unt_result = temp_corp_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_corp=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_corp_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_corp'] = row['hedging_money_general_np_corp']
-        
-    #     ## Avg_count
-    #     temp_corp_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'C') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_corp=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_corp_unt_count_result = temp_corp_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_corp=('counting_hedging_corp', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_corp_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_corp'] = row['avg_counting_hedging_np_corp']
-        
-        
-    #     ### Individual contributors - general only
-        
-    #     ## Hedging
-    #     temp_ind_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_ind_unt = temp_ind_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_ind_unt.columns:
-    #         temp_ind_unt = temp_ind_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_ind_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_ind_unt.columns:
-    #         temp_ind_unt = temp_ind_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_ind_unt['total_amount_rep'] = 0
-        
-    #     temp_ind_unt['hedging'] = abs(temp_ind_unt['total_amount_dem'] - temp_ind_unt['total_amount_rep'])
-        
-    #     temp_ind_unt_result = temp_ind_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_ind=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_ind_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_ind'] = row['hedging_money_general_np_ind']
-        
-    #     ## Avg_count
-    #     temp_ind_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_ind=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_ind_unt_count_result = temp_ind_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_ind=('counting_hedging_ind', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_ind_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_ind'] = row['avg_counting_hedging_np_ind']
-        
-        
-    #     ### Small individual contributors - general only
-        
-    #     ## Hedging
-    #     temp_smallind_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1) &
-    #         (input_untreated['amount'] < 200)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_smallind_unt = temp_smallind_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_smallind_unt.columns:
-    #         temp_smallind_unt = temp_smallind_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_smallind_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_smallind_unt.columns:
-    #         temp_smallind_unt = temp_smallind_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_smallind_unt['total_amount_rep'] = 0
-        
-    #     temp_smallind_unt['hedging'] = abs(temp_smallind_unt['total_amount_dem'] - temp_smallind_unt['total_amount_rep'])
-        
-    #     temp_smallind_unt_result = temp_smallind_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_smallind=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_smallind_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_smallind'] = row['hedging_money_general_np_smallind']
-        
-    #     ## Avg_count
-    #     temp_smallind_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1) &
-    #         (input_untreated['amount'] < 200)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_smallind=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_smallind_unt_count_result = temp_smallind_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_smallind=('counting_hedging_smallind', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_smallind_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_smallind'] = row['avg_counting_hedging_np_smallind']
-        
-    #     # Update result_df with calculated values for untreated rows (copy to all _1, _2, _3)
-    #     print("  Updating result_df with _gen_np values for untreated rows...")
-    #     for (district, cycle), values in agg_dict_untreated.items():
-    #         mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-    #         for col, val in values.items():
-    #             # Update all three treatment versions with the same untreated values
-    #             for treat_num in [1, 2, 3]:
-    #                 col_with_suffix = f'{col}_{treat_num}'
-    #                 if col_with_suffix in result_df.columns:
-    #                     result_df.loc[mask, col_with_suffix] = val
-    
-    # print("Finished adding _gen_np variables with _1, _2, _3 suffixes for OUTPUT_8_ext")
-    # return result_df
-    
-    
-    # Process untreated rows (all treatments use election.type == 'G')
-    # We need to process this for EACH treatment separately since treat_1 has different treated rows than treat_2 and treat_3
-    print("  Processing untreated rows with election.type == 'G'...")
-    
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing untreated rows for treat_{treat_num}...")
-        
-        all_districts = result_df[['district', 'cycle']].copy()
-        
-        # Merge with ALL treatment info at once
-        all_districts = pd.merge(
-            all_districts,
-            output_7_df[['district', 'cycle', 'treat_1', 'treat_2', 'treat_3']],
-            on=['district', 'cycle'],
-            how='left'
-        )
-        
-        if treat_num == 1:
-            # For treat_1: untreated means:
-            # 1. treat_1 == 0 (never treated)
-            # 2. OR (treat_1 == 1 AND treat_3 == 0) - post first death but no death this cycle
-            # 3. OR (district in multiple_death_districts AND treat_1 == 1 AND treat_3 == 1 AND this is NOT the first death)
-            
-            # Get the first death for each district (already processed in treated section)
-            first_deaths = output_7_df[output_7_df['treat_1'] == 1].copy()
-            if not first_deaths.empty and len(multiple_death_districts) > 0:
-                first_deaths_multiple = first_deaths[first_deaths['district'].isin(multiple_death_districts)]
-                if not first_deaths_multiple.empty:
-                    first_death_cycles = first_deaths_multiple.groupby('district')['cycle'].min().reset_index()
-                    first_death_cycles.columns = ['district', 'first_death_cycle']
-                    
-                    # Merge to identify which rows are first deaths
-                    all_districts = pd.merge(
-                        all_districts,
-                        first_death_cycles,
-                        on='district',
-                        how='left'
-                    )
-                    
-                    # Create a flag for multiple-death districts
-                    all_districts['is_multiple_death'] = all_districts['district'].isin(multiple_death_districts)
-                    
-                    # Untreated for treat_1 includes:
-                    # - Never treated (treat_1 == 0)
-                    # - Post-treatment non-death cycles (treat_1 == 1, treat_3 == 0)
-                    # - Subsequent deaths ONLY in multiple-death districts (is_multiple_death & treat_3 == 1 & cycle != first_death_cycle)
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0)) |
-                        ((all_districts['is_multiple_death'] == True) & 
-                         (all_districts['treat_1'] == 1) & 
-                         (all_districts['treat_3'] == 1) & 
-                         (all_districts['cycle'] != all_districts['first_death_cycle']))
-                    ][['district', 'cycle']]
-                else:
-                    # No multiple death districts, simpler logic
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                    ][['district', 'cycle']]
-            else:
-                # No multiple death districts, simpler logic
-                untreated_districts = all_districts[
-                    (all_districts['treat_1'] == 0) | 
-                    ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                ][['district', 'cycle']]
-            
-        else:
-            # For treat_2 and treat_3: untreated means treat_3 == 0 (no death in this cycle)
-            # treat_2 and treat_3 have identical logic
-            untreated_districts = all_districts[
-                (all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())
-            ][['district', 'cycle']]
-            
-        if untreated_districts.empty:
-            print(f"  No untreated districts for treat_{treat_num}")
-            continue
-
-                
-        # Merge with input data
-        input_untreated = pd.merge(
-            input_df,
-            untreated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for general elections only
-        input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-        # Create aggregations for untreated rows
-        agg_dict_untreated = {}
-        
-        ### Corporate contributors - general only
-        
-        ## Hedging
-        temp_corp_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'C') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_corp_unt = temp_corp_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_corp_unt.columns:
-            temp_corp_unt = temp_corp_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_corp_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_corp_unt.columns:
-            temp_corp_unt = temp_corp_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_corp_unt['total_amount_rep'] = 0
-        
-        temp_corp_unt['hedging'] = abs(temp_corp_unt['total_amount_dem'] - temp_corp_unt['total_amount_rep'])
-        
-        temp_corp_unt_result = temp_corp_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_corp=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_corp_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_corp'] = row['hedging_money_general_np_corp']
-        
-        ## Avg_count
-        temp_corp_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'C') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_corp_unt_count_result = temp_corp_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_corp=('counting_hedging_corp', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_corp_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_corp'] = row['avg_counting_hedging_np_corp']
-        
-        
-        ### Individual contributors - general only
-        
-        ## Hedging
-        temp_ind_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_ind_unt = temp_ind_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_ind_unt.columns:
-            temp_ind_unt = temp_ind_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_ind_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_ind_unt.columns:
-            temp_ind_unt = temp_ind_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_ind_unt['total_amount_rep'] = 0
-        
-        temp_ind_unt['hedging'] = abs(temp_ind_unt['total_amount_dem'] - temp_ind_unt['total_amount_rep'])
-        
-        temp_ind_unt_result = temp_ind_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_ind=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_ind_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_ind'] = row['hedging_money_general_np_ind']
-        
-        ## Avg_count
-        temp_ind_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_ind_unt_count_result = temp_ind_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_ind=('counting_hedging_ind', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_ind_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_ind'] = row['avg_counting_hedging_np_ind']
-        
-        
-        ### Small individual contributors - general only
-        
-        ## Hedging
-        temp_smallind_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1) &
-            (input_untreated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_smallind_unt = temp_smallind_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_smallind_unt.columns:
-            temp_smallind_unt = temp_smallind_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_smallind_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_smallind_unt.columns:
-            temp_smallind_unt = temp_smallind_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_smallind_unt['total_amount_rep'] = 0
-        
-        temp_smallind_unt['hedging'] = abs(temp_smallind_unt['total_amount_dem'] - temp_smallind_unt['total_amount_rep'])
-        
-        temp_smallind_unt_result = temp_smallind_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_smallind=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_smallind_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_smallind'] = row['hedging_money_general_np_smallind']
-        
-        ## Avg_count
-        temp_smallind_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1) &
-            (input_untreated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_smallind_unt_count_result = temp_smallind_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_smallind=('counting_hedging_smallind', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_smallind_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_smallind'] = row['avg_counting_hedging_np_smallind']
-        
-        # Update result_df with calculated values for untreated rows for THIS treatment
-        print(f"  Updating result_df with _gen_np_{treat_num} values for untreated rows...")
-        treat_suffix = f'_{treat_num}'
-        for (district, cycle), values in agg_dict_untreated.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                col_with_suffix = f'{col}{treat_suffix}'
-                if col_with_suffix in result_df.columns:
-                    result_df.loc[mask, col_with_suffix] = val
-    
-    print("Finished adding _gen_np variables with _1, _2, _3 suffixes for OUTPUT_8_ext")
-    return result_df    
-    
+    # Treated district-cycles: election.type != 'P' between death_date and special_elections_date, other rows: election.type == 'G'
+    result_df = add_treated_override_variables(
+        input_df, output_7_df, result_df, gen_np_vars_base,
+        lambda contributions, treat_suffix: general_hedging_aggregates(contributions, '_np', treat_suffix),
+        '-P', windows, multiple_death_districts
+    )
+    
+    print("Finished adding _gen_np variables with _1, _2, _3 suffixes for OUTPUT_8_ext")
+    return result_df
+    
     
 
 
@@ -3624,7 +2385,7 @@ def add_gen_np_variables_output8(input_df, output_7_df, output8_ext, single_deat
 
 #%%
 
-def add_gen_np_spec_variables(input_df, output_7_df, ext_df, output_name, single_death_districts, multiple_death_districts):
+def add_gen_np_spec_variables(input_df, output_7_df, ext_df, output_name, single_death_districts, multiple_death_districts, windows=None):
     """
     Add _gen_np_spec suffix variables with _1, _2, _3 versions to _ext datasets.
     
@@ -3645,6 +2406,8 @@ def add_gen_np_spec_variables(input_df, output_7_df, ext_df, output_name, single
         List of districts with single death
     multiple_death_districts : list
         List of districts with multiple deaths
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
     
     Returns:
     --------
@@ -3654,33 +2417,14 @@ def add_gen_np_spec_variables(input_df, output_7_df, ext_df, output_name, single
     
     print(f"Adding _gen_np_spec variables with _1, _2, _3 suffixes for {output_name}_ext...")
     
+    if windows is None:
+        windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+    
     # Start with the existing ext_df
     result_df = ext_df.copy()
     
-    # Determine filter type based on output_name
-    if output_name == 'OUTPUT_2':
-        filter_type = None
-        amount_filter = None
-        suffix = ''
-    elif output_name == 'OUTPUT_3':
-        filter_type = 'C'
-        amount_filter = None
-        suffix = '_corp'
-    elif output_name == 'OUTPUT_4_1':
-        filter_type = 'I'
-        amount_filter = None
-        suffix = '_ind'
-    elif output_name == 'OUTPUT_4_2':
-        filter_type = 'I'
-        amount_filter = 200
-        suffix = '_smallind'
-    
-    # Apply type and amount filters to input_df
-    input_df_filtered = input_df.copy()
-    if filter_type:
-        input_df_filtered = input_df_filtered[input_df_filtered['contributor.type'] == filter_type]
-    if amount_filter:
-        input_df_filtered = input_df_filtered[input_df_filtered['amount'] < amount_filter]
+    # Contributor-type variant of the output (see outputs_scripts/aggregate_slices.py)
+    filter_type, amount_filter, suffix = CONTRIBUTOR_VARIANTS[output_name]
     
     # Define base gen_np_spec variables
     gen_np_spec_vars_base = [
@@ -3698,395 +2442,23 @@ def add_gen_np_spec_variables(input_df, output_7_df, ext_df, output_name, single
         f'tran_count_rep_gen_np_spec_without_LTS1{suffix}'
     ]
     
-    # Initialize _1, _2, _3 versions with NaN
-    for treat_num in [1, 2, 3]:
-        for var in gen_np_spec_vars_base:
-            result_df[f'{var}_{treat_num}'] = np.nan
+    # total_amount and tran_count of all contributions, Democrats and Republicans, with and without LTS1
+    def aggregate(contributions, treat_suffix):
+        return aggregate_slices_variants(
+            contributions, {output_name: (filter_type, amount_filter, f'{suffix}{treat_suffix}')}, party_slices('_gen_np_spec')
+        )[output_name]
     
-    # Process each treatment
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing treat_{treat_num} for gen_np_spec variables...")
-        
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
-            print(f"  No treated districts for treat_{treat_num}")
-            continue
-        
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge filtered input_df with treated districts
-        input_treated = pd.merge(
-            input_df_filtered.drop(columns=['death_date', 'spec_election_date'], errors='ignore'),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions with election.type == 'S' between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date']) &
-            (input_treated['election.type'] == 'S')
-        ]
-        
-        # Create aggregations for treated rows
-        treat_suffix = f'_{treat_num}'
-        agg_dict = {}
-        
-        # 1: All special contributions
-        agg_1 = input_treated.groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_spec{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_spec{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        agg_dict.update(agg_1.set_index(['district', 'cycle']).to_dict('index'))
-        
-        # 2: Before special election
-        agg_2 = input_treated[input_treated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_2.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 3: Dem special
-        agg_3 = input_treated[input_treated['party'] == 100].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_spec{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_spec{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_3.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 4: Dem special, before special
-        agg_4 = input_treated[(input_treated['party'] == 100) & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_4.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 5: Rep special
-        agg_5 = input_treated[input_treated['party'] == 200].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_spec{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_spec{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_5.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # 6: Rep special, before special
-        agg_6 = input_treated[(input_treated['party'] == 200) & (input_treated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_spec_without_LTS1{suffix}{treat_suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_6.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Update result_df with calculated values for treated rows
-        print(f"  Updating result_df with _gen_np_spec{treat_suffix} values for treated rows...")
-        for (district, cycle), values in agg_dict.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                if col in result_df.columns:
-                    result_df.loc[mask, col] = val
-    
-    # # Process untreated rows (all treatments use election.type == 'G')
-    # print("  Processing untreated rows with election.type == 'G'...")
-    
-    # all_districts = result_df[['district', 'cycle']].copy()
-    
-    # # Merge with treatment info
-    # all_districts = pd.merge(
-    #     all_districts,
-    #     output_7_df[['district', 'cycle', 'treat_3']],
-    #     on=['district', 'cycle'],
-    #     how='left'
-    # )
-    
-    # # Select untreated rows (treat_3 == 0 or NaN)
-    # untreated_districts = all_districts[(all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())][['district', 'cycle']]
-    
-    # if not untreated_districts.empty:
-    #     # Merge with input data
-    #     input_untreated = pd.merge(
-    #         input_df_filtered,
-    #         untreated_districts,
-    #         on=['district', 'cycle'],
-    #         how='inner'
-    #     )
-        
-    #     # Filter for general elections only
-    #     input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-    #     # Create aggregations for untreated rows (only for general elections)
-    #     agg_dict_untreated = {}
-        
-    #     # 1: All general election contributions
-    #     agg_gen_all = input_untreated.groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_gen_np_spec{suffix}': ('amount', 'sum'),
-    #            f'tran_count_gen_np_spec{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     agg_dict_untreated.update(agg_gen_all.set_index(['district', 'cycle']).to_dict('index'))
-        
-    #     # 2: General elections, before special election (with LTS1 filter)
-    #     agg_gen_lts = input_untreated[input_untreated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_gen_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     # Party-specific aggregations
-    #     agg_dem = input_untreated[input_untreated['party'] == 100].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_dem_gen_np_spec{suffix}': ('amount', 'sum'),
-    #            f'tran_count_dem_gen_np_spec{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_dem.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_dem_lts = input_untreated[(input_untreated['party'] == 100) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_dem_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_dem_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_dem_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_rep = input_untreated[input_untreated['party'] == 200].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_rep_gen_np_spec{suffix}': ('amount', 'sum'),
-    #            f'tran_count_rep_gen_np_spec{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_rep.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     agg_rep_lts = input_untreated[(input_untreated['party'] == 200) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-    #         **{f'total_amount_rep_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-    #            f'tran_count_rep_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-    #     ).reset_index()
-    #     for idx, row in agg_rep_lts.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-    #     # Update result_df with calculated values for untreated rows (copy to all _1, _2, _3)
-    #     print("  Updating result_df with _gen_np_spec values for untreated rows...")
-    #     for (district, cycle), values in agg_dict_untreated.items():
-    #         mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-    #         for col, val in values.items():
-    #             # Update all three treatment versions with the same untreated values
-    #             for treat_num in [1, 2, 3]:
-    #                 col_with_suffix = f'{col}_{treat_num}'
-    #                 if col_with_suffix in result_df.columns:
-    #                     result_df.loc[mask, col_with_suffix] = val
-    
-    # print(f"Finished adding _gen_np_spec variables with _1, _2, _3 suffixes for {output_name}_ext")
-    # return result_df
-    
-    
-    # Process untreated rows (all treatments use election.type == 'G')
-    # We need to process this for EACH treatment separately since treat_1 has different treated rows than treat_2 and treat_3
-    print("  Processing untreated rows with election.type == 'G'...")
+    # Treated district-cycles: election.type == 'S' between death_date and special_elections_date, other rows: election.type == 'G'
+    result_df = add_treated_override_variables(
+        input_df, output_7_df, result_df, gen_np_spec_vars_base, aggregate, 'S', windows, multiple_death_districts
+    )
     
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing untreated rows for treat_{treat_num}...")
-        
-        all_districts = result_df[['district', 'cycle']].copy()
-        
-        # Merge with ALL treatment info at once
-        all_districts = pd.merge(
-            all_districts,
-            output_7_df[['district', 'cycle', 'treat_1', 'treat_2', 'treat_3']],
-            on=['district', 'cycle'],
-            how='left'
-        )
-        
-        if treat_num == 1:
-            # For treat_1: untreated means:
-            # 1. treat_1 == 0 (never treated)
-            # 2. OR (treat_1 == 1 AND treat_3 == 0) - post first death but no death this cycle
-            # 3. OR (district in multiple_death_districts AND treat_1 == 1 AND treat_3 == 1 AND this is NOT the first death)
-            
-            # Get the first death for each district (already processed in treated section)
-            first_deaths = output_7_df[output_7_df['treat_1'] == 1].copy()
-            if not first_deaths.empty and len(multiple_death_districts) > 0:
-                first_deaths_multiple = first_deaths[first_deaths['district'].isin(multiple_death_districts)]
-                if not first_deaths_multiple.empty:
-                    first_death_cycles = first_deaths_multiple.groupby('district')['cycle'].min().reset_index()
-                    first_death_cycles.columns = ['district', 'first_death_cycle']
-                    
-                    # Merge to identify which rows are first deaths
-                    all_districts = pd.merge(
-                        all_districts,
-                        first_death_cycles,
-                        on='district',
-                        how='left'
-                    )
-                    
-                    # Create a flag for multiple-death districts
-                    all_districts['is_multiple_death'] = all_districts['district'].isin(multiple_death_districts)
-                    
-                    # Untreated for treat_1 includes:
-                    # - Never treated (treat_1 == 0)
-                    # - Post-treatment non-death cycles (treat_1 == 1, treat_3 == 0)
-                    # - Subsequent deaths ONLY in multiple-death districts (is_multiple_death & treat_3 == 1 & cycle != first_death_cycle)
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0)) |
-                        ((all_districts['is_multiple_death'] == True) & 
-                         (all_districts['treat_1'] == 1) & 
-                         (all_districts['treat_3'] == 1) & 
-                         (all_districts['cycle'] != all_districts['first_death_cycle']))
-                    ][['district', 'cycle']]
-                else:
-                    # No multiple death districts, simpler logic
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                    ][['district', 'cycle']]
-            else:
-                # No multiple death districts, simpler logic
-                untreated_districts = all_districts[
-                    (all_districts['treat_1'] == 0) | 
-                    ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                ][['district', 'cycle']]
-            
-        else:
-            # For treat_2 and treat_3: untreated means treat_3 == 0 (no death in this cycle)
-            # treat_2 and treat_3 have identical logic
-            untreated_districts = all_districts[
-                (all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())
-            ][['district', 'cycle']]
-            
-        if untreated_districts.empty:
-            print(f"  No untreated districts for treat_{treat_num}")
-            continue
-        
-        # Merge with input data
-        input_untreated = pd.merge(
-            input_df_filtered,
-            untreated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for general elections only
-        input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-        # Create aggregations for untreated rows (only for general elections)
-        agg_dict_untreated = {}
-        
-        # 1: All general election contributions
-        agg_gen_all = input_untreated.groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_spec{suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_spec{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        agg_dict_untreated.update(agg_gen_all.set_index(['district', 'cycle']).to_dict('index'))
-        
-        # 2: General elections, before special election (with LTS1 filter)
-        agg_gen_lts = input_untreated[input_untreated['later_than_special'] != 1].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_gen_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Party-specific aggregations
-        agg_dem = input_untreated[input_untreated['party'] == 100].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_spec{suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_spec{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_dem.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_dem_lts = input_untreated[(input_untreated['party'] == 100) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_dem_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_dem_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_dem_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_rep = input_untreated[input_untreated['party'] == 200].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_spec{suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_spec{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_rep.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        agg_rep_lts = input_untreated[(input_untreated['party'] == 200) & (input_untreated['later_than_special'] != 1)].groupby(['district', 'cycle']).agg(
-            **{f'total_amount_rep_gen_np_spec_without_LTS1{suffix}': ('amount', 'sum'),
-               f'tran_count_rep_gen_np_spec_without_LTS1{suffix}': ('transaction.id', 'count')}
-        ).reset_index()
-        for idx, row in agg_rep_lts.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key].update({k: v for k, v in row.items() if k not in ['district', 'cycle']})
-        
-        # Update result_df with calculated values for untreated rows for THIS treatment
-        print(f"  Updating result_df with _gen_np_spec_{treat_num} values for untreated rows...")
-        treat_suffix = f'_{treat_num}'
-        for (district, cycle), values in agg_dict_untreated.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                col_with_suffix = f'{col}{treat_suffix}'
-                if col_with_suffix in result_df.columns:
-                    result_df.loc[mask, col_with_suffix] = val
-
-    return result_df
     print(f"Finished adding _gen_np_spec variables with _1, _2, _3 suffixes for {output_name}_ext")
+    return result_df
 
 
 
-def add_gen_np_spec_variables_output8(input_df, output_7_df, output8_ext, single_death_districts, multiple_death_districts):
+def add_gen_np_spec_variables_output8(input_df, output_7_df, output8_ext, single_death_districts, multiple_death_districts, windows=None):
     """
     Add _gen_np_spec suffix variables with _1, _2, _3 versions to OUTPUT_8_ext dataset.
     
@@ -4105,6 +2477,8 @@ def add_gen_np_spec_variables_output8(input_df, output_7_df, output8_ext, single
         List of districts with single death
     multiple_death_districts : list
         List of districts with multiple deaths
+    windows : DataFrame, optional
+        window_1, window_2, window_3 flags of input_df from treatment_window_flags (computed here if not given)
     
     Returns:
     --------
@@ -4114,6 +2488,9 @@ def add_gen_np_spec_variables_output8(input_df, output_7_df, output8_ext, single
     
     print("Adding _gen_np_spec variables with _1, _2, _3 suffixes for OUTPUT_8_ext...")
     
+    if windows is None:
+        windows = treatment_window_flags(input_df, output_7_df, single_death_districts, multiple_death_districts)
+    
     # Start with the existing output8_ext
     result_df = output8_ext.copy()
     
@@ -4127,732 +2504,12 @@ def add_gen_np_spec_variables_output8(input_df, output_7_df, output8_ext, single
         'avg_counting_hedging_np_spec_smallind',
     ]
     
-    # Initialize _1, _2, _3 versions with NaN
-    for treat_num in [1, 2, 3]:
-        for var in gen_np_spec_vars_base:
-            result_df[f'{var}_{treat_num}'] = np.nan
-    
-    # Process each treatment
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing treat_{treat_num} for OUTPUT_8 gen_np_spec variables...")
-        
-        # Get district-cycles where treatment == 1
-        treated_districts = output_7_df[output_7_df[f'treat_{treat_num}'] == 1][['district', 'cycle', 'death_date', 'special_elections_date']]
-        
-        if treated_districts.empty:
-            print(f"  No treated districts for treat_{treat_num}")
-            continue
-        
-        # For treat_1 with multiple death districts, only keep the first instance per district
-        if treat_num == 1:
-            multiple_death_treated = treated_districts[treated_districts['district'].isin(multiple_death_districts)]
-            
-            if not multiple_death_treated.empty:
-                first_occurrences = multiple_death_treated.groupby('district')['cycle'].idxmin()
-                multiple_death_treated_first = multiple_death_treated.loc[first_occurrences]
-                
-                single_death_treated = treated_districts[treated_districts['district'].isin(single_death_districts)]
-                
-                treated_districts = pd.concat([single_death_treated, multiple_death_treated_first], ignore_index=True)
-        
-        # Merge input_df with treated districts
-        input_treated = pd.merge(
-            input_df.drop(columns=['death_date', 'spec_election_date'], errors='ignore'),
-            treated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for contributions with election.type == 'S' between death_date and special_elections_date
-        input_treated = input_treated[
-            (input_treated['date'] > input_treated['death_date']) &
-            (input_treated['date'] < input_treated['special_elections_date']) &
-            (input_treated['election.type'] == 'S')
-        ]
-        
-        treat_suffix = f'_{treat_num}'
-        agg_dict = {}
-        
-        ### Corporate contributors
-        
-        ## Hedging
-        temp_corp = input_treated[
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_corp = temp_corp.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_corp.columns:
-            temp_corp = temp_corp.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_corp['total_amount_dem'] = 0
-            
-        if 200.0 in temp_corp.columns:
-            temp_corp = temp_corp.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_corp['total_amount_rep'] = 0
-        
-        temp_corp['hedging'] = abs(temp_corp['total_amount_dem'] - temp_corp['total_amount_rep'])
-        
-        temp_corp_result = temp_corp.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_spec_corp{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_corp_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_spec_corp{treat_suffix}'] = row[f'hedging_money_general_np_spec_corp{treat_suffix}']
-            
-           
-        ## Avg_count
-        temp_corp_count = input_treated[
-            (input_treated['contributor.type'] == 'C') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_corp_count_result = temp_corp_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_spec_corp{treat_suffix}': ('counting_hedging_corp', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_corp_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_spec_corp{treat_suffix}'] = row[f'avg_counting_hedging_np_spec_corp{treat_suffix}']
-        
-        
-        ### Individual contributors
-        ## Hedging
-        temp_ind = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_ind = temp_ind.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_ind.columns:
-            temp_ind = temp_ind.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_ind['total_amount_dem'] = 0
-            
-        if 200.0 in temp_ind.columns:
-            temp_ind = temp_ind.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_ind['total_amount_rep'] = 0
-        
-        temp_ind['hedging'] = abs(temp_ind['total_amount_dem'] - temp_ind['total_amount_rep'])
-        
-        temp_ind_result = temp_ind.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_spec_ind{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_ind_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_spec_ind{treat_suffix}'] = row[f'hedging_money_general_np_spec_ind{treat_suffix}']
-        
-        ## Avg_count
-        temp_ind_count = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_ind_count_result = temp_ind_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_spec_ind{treat_suffix}': ('counting_hedging_ind', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_ind_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_spec_ind{treat_suffix}'] = row[f'avg_counting_hedging_np_spec_ind{treat_suffix}']
-        
-        
-        ### Small individual contributors
-        ## Hedging
-        temp_smallind = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_smallind = temp_smallind.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_smallind.columns:
-            temp_smallind = temp_smallind.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_smallind['total_amount_dem'] = 0
-            
-        if 200.0 in temp_smallind.columns:
-            temp_smallind = temp_smallind.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_smallind['total_amount_rep'] = 0
-        
-        temp_smallind['hedging'] = abs(temp_smallind['total_amount_dem'] - temp_smallind['total_amount_rep'])
-        
-        temp_smallind_result = temp_smallind.groupby(['district', 'cycle']).agg(
-            **{f'hedging_money_general_np_spec_smallind{treat_suffix}': ('hedging', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_smallind_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'hedging_money_general_np_spec_smallind{treat_suffix}'] = row[f'hedging_money_general_np_spec_smallind{treat_suffix}']
-        
-        ## Avg_count
-        temp_smallind_count = input_treated[
-            (input_treated['contributor.type'] == 'I') & 
-            (input_treated['later_than_special'] != 1) &
-            (input_treated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_smallind_count_result = temp_smallind_count.groupby(['district', 'cycle']).agg(
-            **{f'avg_counting_hedging_np_spec_smallind{treat_suffix}': ('counting_hedging_smallind', 'mean')}
-        ).reset_index()
-        
-        for idx, row in temp_smallind_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict:
-                agg_dict[key] = {}
-            agg_dict[key][f'avg_counting_hedging_np_spec_smallind{treat_suffix}'] = row[f'avg_counting_hedging_np_spec_smallind{treat_suffix}']
-
-        
-        # Update result_df with calculated values for treated rows
-        print(f"  Updating result_df with _gen_np_spec{treat_suffix} values for treated rows...")
-        for (district, cycle), values in agg_dict.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                if col in result_df.columns:
-                    result_df.loc[mask, col] = val
-    
-    # # Process untreated rows (all treatments use election.type == 'G')
-    # print("  Processing untreated rows with election.type == 'G'...")
-    
-    # all_districts = result_df[['district', 'cycle']].copy()
-    
-    # # Merge with treatment info
-    # all_districts = pd.merge(
-    #     all_districts,
-    #     output_7_df[['district', 'cycle', 'treat_3']],
-    #     on=['district', 'cycle'],
-    #     how='left'
-    # )
-    
-    # # Select untreated rows (treat_3 == 0 or NaN)
-    # untreated_districts = all_districts[(all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())][['district', 'cycle']]
-    
-    # if not untreated_districts.empty:
-    #     # Merge with input data
-    #     input_untreated = pd.merge(
-    #         input_df,
-    #         untreated_districts,
-    #         on=['district', 'cycle'],
-    #         how='inner'
-    #     )
-        
-    #     # Filter for general elections only
-    #     input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-    #     # Create aggregations for untreated rows
-    #     agg_dict_untreated = {}
-        
-    #     ### Corporate contributors - general only
-        
-    #     ## Hedging
-    #     temp_corp_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'C') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_corp_unt = temp_corp_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_corp_unt.columns:
-    #         temp_corp_unt = temp_corp_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_corp_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_corp_unt.columns:
-    #         temp_corp_unt = temp_corp_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_corp_unt['total_amount_rep'] = 0
-        
-    #     temp_corp_unt['hedging'] = abs(temp_corp_unt['total_amount_dem'] - temp_corp_unt['total_amount_rep'])
-        
-    #     temp_corp_unt_result = temp_corp_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_spec_corp=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_corp_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_spec_corp'] = row['hedging_money_general_np_spec_corp']
-        
-    #     ## Avg_count
-    #     temp_corp_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'C') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_corp=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_corp_unt_count_result = temp_corp_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_spec_corp=('counting_hedging_corp', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_corp_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_spec_corp'] = row['avg_counting_hedging_np_spec_corp']
-        
-        
-    #     ### Individual contributors - general only
-        
-    #     ## Hedging
-    #     temp_ind_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_ind_unt = temp_ind_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_ind_unt.columns:
-    #         temp_ind_unt = temp_ind_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_ind_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_ind_unt.columns:
-    #         temp_ind_unt = temp_ind_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_ind_unt['total_amount_rep'] = 0
-        
-    #     temp_ind_unt['hedging'] = abs(temp_ind_unt['total_amount_dem'] - temp_ind_unt['total_amount_rep'])
-        
-    #     temp_ind_unt_result = temp_ind_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_spec_ind=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_ind_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_spec_ind'] = row['hedging_money_general_np_spec_ind']
-        
-    #     ## Avg_count
-    #     temp_ind_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_ind=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_ind_unt_count_result = temp_ind_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_spec_ind=('counting_hedging_ind', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_ind_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_spec_ind'] = row['avg_counting_hedging_np_spec_ind']
-        
-        
-    #     ### Small individual contributors - general only
-        
-    #     ## Hedging
-    #     temp_smallind_unt = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1) &
-    #         (input_untreated['amount'] < 200)
-    #     ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-    #         total_amount=('amount', 'sum')
-    #     ).reset_index()
-        
-    #     temp_smallind_unt = temp_smallind_unt.pivot_table(
-    #         index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-    #         columns='party',
-    #         values='total_amount',
-    #         fill_value=0
-    #     ).reset_index()
-        
-    #     if 100.0 in temp_smallind_unt.columns:
-    #         temp_smallind_unt = temp_smallind_unt.rename(columns={100.0: 'total_amount_dem'})
-    #     else:
-    #         temp_smallind_unt['total_amount_dem'] = 0
-            
-    #     if 200.0 in temp_smallind_unt.columns:
-    #         temp_smallind_unt = temp_smallind_unt.rename(columns={200.0: 'total_amount_rep'})
-    #     else:
-    #         temp_smallind_unt['total_amount_rep'] = 0
-        
-    #     temp_smallind_unt['hedging'] = abs(temp_smallind_unt['total_amount_dem'] - temp_smallind_unt['total_amount_rep'])
-        
-    #     temp_smallind_unt_result = temp_smallind_unt.groupby(['district', 'cycle']).agg(
-    #         hedging_money_general_np_spec_smallind=('hedging', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_smallind_unt_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['hedging_money_general_np_spec_smallind'] = row['hedging_money_general_np_spec_smallind']
-        
-    #     ## Avg_count
-    #     temp_smallind_unt_count = input_untreated[
-    #         (input_untreated['contributor.type'] == 'I') & 
-    #         (input_untreated['later_than_special'] != 1) &
-    #         (input_untreated['amount'] < 200)
-    #     ].groupby(['district', 'cycle', 'party']).agg(
-    #         counting_hedging_smallind=('bonica.rid', 'nunique')
-    #     ).reset_index()
-
-    #     temp_smallind_unt_count_result = temp_smallind_unt_count.groupby(['district', 'cycle']).agg(
-    #         avg_counting_hedging_np_spec_smallind=('counting_hedging_smallind', 'mean')
-    #     ).reset_index()
-        
-    #     for idx, row in temp_smallind_unt_count_result.iterrows():
-    #         key = (row['district'], row['cycle'])
-    #         if key not in agg_dict_untreated:
-    #             agg_dict_untreated[key] = {}
-    #         agg_dict_untreated[key]['avg_counting_hedging_np_spec_smallind'] = row['avg_counting_hedging_np_spec_smallind']
-        
-    #     # Update result_df with calculated values for untreated rows (copy to all _1, _2, _3)
-    #     print("  Updating result_df with _gen_np_spec values for untreated rows...")
-    #     for (district, cycle), values in agg_dict_untreated.items():
-    #         mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-    #         for col, val in values.items():
-    #             # Update all three treatment versions with the same untreated values
-    #             for treat_num in [1, 2, 3]:
-    #                 col_with_suffix = f'{col}_{treat_num}'
-    #                 if col_with_suffix in result_df.columns:
-    #                     result_df.loc[mask, col_with_suffix] = val
-    
-    # print("Finished adding _gen_np_spec variables with _1, _2, _3 suffixes for OUTPUT_8_ext")
-    # return result_df
-
-
-    # Process untreated rows (all treatments use election.type == 'G')
-    # We need to process this for EACH treatment separately since treat_1 has different treated rows than treat_2 and treat_3
-    print("  Processing untreated rows with election.type == 'G'...")
-    
-    for treat_num in [1, 2, 3]:
-        print(f"  Processing untreated rows for treat_{treat_num}...")
-        
-        all_districts = result_df[['district', 'cycle']].copy()
-        
-        # Merge with ALL treatment info at once
-        all_districts = pd.merge(
-            all_districts,
-            output_7_df[['district', 'cycle', 'treat_1', 'treat_2', 'treat_3']],
-            on=['district', 'cycle'],
-            how='left'
-        )
-        
-        if treat_num == 1:
-            # For treat_1: untreated means:
-            # 1. treat_1 == 0 (never treated)
-            # 2. OR (treat_1 == 1 AND treat_3 == 0) - post first death but no death this cycle
-            # 3. OR (district in multiple_death_districts AND treat_1 == 1 AND treat_3 == 1 AND this is NOT the first death)
-            
-            # Get the first death for each district (already processed in treated section)
-            first_deaths = output_7_df[output_7_df['treat_1'] == 1].copy()
-            if not first_deaths.empty and len(multiple_death_districts) > 0:
-                first_deaths_multiple = first_deaths[first_deaths['district'].isin(multiple_death_districts)]
-                if not first_deaths_multiple.empty:
-                    first_death_cycles = first_deaths_multiple.groupby('district')['cycle'].min().reset_index()
-                    first_death_cycles.columns = ['district', 'first_death_cycle']
-                    
-                    # Merge to identify which rows are first deaths
-                    all_districts = pd.merge(
-                        all_districts,
-                        first_death_cycles,
-                        on='district',
-                        how='left'
-                    )
-                    
-                    # Create a flag for multiple-death districts
-                    all_districts['is_multiple_death'] = all_districts['district'].isin(multiple_death_districts)
-                    
-                    # Untreated for treat_1 includes:
-                    # - Never treated (treat_1 == 0)
-                    # - Post-treatment non-death cycles (treat_1 == 1, treat_3 == 0)
-                    # - Subsequent deaths ONLY in multiple-death districts (is_multiple_death & treat_3 == 1 & cycle != first_death_cycle)
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0)) |
-                        ((all_districts['is_multiple_death'] == True) & 
-                         (all_districts['treat_1'] == 1) & 
-                         (all_districts['treat_3'] == 1) & 
-                         (all_districts['cycle'] != all_districts['first_death_cycle']))
-                    ][['district', 'cycle']]
-                else:
-                    # No multiple death districts, simpler logic
-                    untreated_districts = all_districts[
-                        (all_districts['treat_1'] == 0) | 
-                        ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                    ][['district', 'cycle']]
-            else:
-                # No multiple death districts, simpler logic
-                untreated_districts = all_districts[
-                    (all_districts['treat_1'] == 0) | 
-                    ((all_districts['treat_1'] == 1) & (all_districts['treat_3'] == 0))
-                ][['district', 'cycle']]
-            
-        else:
-            # For treat_2 and treat_3: untreated means treat_3 == 0 (no death in this cycle)
-            # treat_2 and treat_3 have identical logic
-            untreated_districts = all_districts[
-                (all_districts['treat_3'] == 0) | (all_districts['treat_3'].isna())
-            ][['district', 'cycle']]
-            
-        if untreated_districts.empty:
-            print(f"  No untreated districts for treat_{treat_num}")
-            continue
-        
-        # Merge with input data
-        input_untreated = pd.merge(
-            input_df,
-            untreated_districts,
-            on=['district', 'cycle'],
-            how='inner'
-        )
-        
-        # Filter for general elections only
-        input_untreated = input_untreated[input_untreated['election.type'] == 'G']
-        
-        # Create aggregations for untreated rows
-        agg_dict_untreated = {}
-        
-        ### Corporate contributors - general only
-        
-        ## Hedging
-        temp_corp_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'C') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_corp_unt = temp_corp_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_corp_unt.columns:
-            temp_corp_unt = temp_corp_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_corp_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_corp_unt.columns:
-            temp_corp_unt = temp_corp_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_corp_unt['total_amount_rep'] = 0
-        
-        temp_corp_unt['hedging'] = abs(temp_corp_unt['total_amount_dem'] - temp_corp_unt['total_amount_rep'])
-        
-        temp_corp_unt_result = temp_corp_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_spec_corp=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_corp_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_spec_corp'] = row['hedging_money_general_np_spec_corp']
-        
-        ## Avg_count
-        temp_corp_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'C') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_corp=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_corp_unt_count_result = temp_corp_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_spec_corp=('counting_hedging_corp', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_corp_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_spec_corp'] = row['avg_counting_hedging_np_spec_corp']
-        
-        
-        ### Individual contributors - general only
-        
-        ## Hedging
-        temp_ind_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_ind_unt = temp_ind_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_ind_unt.columns:
-            temp_ind_unt = temp_ind_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_ind_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_ind_unt.columns:
-            temp_ind_unt = temp_ind_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_ind_unt['total_amount_rep'] = 0
-        
-        temp_ind_unt['hedging'] = abs(temp_ind_unt['total_amount_dem'] - temp_ind_unt['total_amount_rep'])
-        
-        temp_ind_unt_result = temp_ind_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_spec_ind=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_ind_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_spec_ind'] = row['hedging_money_general_np_spec_ind']
-        
-        ## Avg_count
-        temp_ind_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_ind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_ind_unt_count_result = temp_ind_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_spec_ind=('counting_hedging_ind', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_ind_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_spec_ind'] = row['avg_counting_hedging_np_spec_ind']
-        
-        
-        ### Small individual contributors - general only
-        
-        ## Hedging
-        temp_smallind_unt = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1) &
-            (input_untreated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
-            total_amount=('amount', 'sum')
-        ).reset_index()
-        
-        temp_smallind_unt = temp_smallind_unt.pivot_table(
-            index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
-            columns='party',
-            values='total_amount',
-            fill_value=0
-        ).reset_index()
-        
-        if 100.0 in temp_smallind_unt.columns:
-            temp_smallind_unt = temp_smallind_unt.rename(columns={100.0: 'total_amount_dem'})
-        else:
-            temp_smallind_unt['total_amount_dem'] = 0
-            
-        if 200.0 in temp_smallind_unt.columns:
-            temp_smallind_unt = temp_smallind_unt.rename(columns={200.0: 'total_amount_rep'})
-        else:
-            temp_smallind_unt['total_amount_rep'] = 0
-        
-        temp_smallind_unt['hedging'] = abs(temp_smallind_unt['total_amount_dem'] - temp_smallind_unt['total_amount_rep'])
-        
-        temp_smallind_unt_result = temp_smallind_unt.groupby(['district', 'cycle']).agg(
-            hedging_money_general_np_spec_smallind=('hedging', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_smallind_unt_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['hedging_money_general_np_spec_smallind'] = row['hedging_money_general_np_spec_smallind']
-        
-        ## Avg_count
-        temp_smallind_unt_count = input_untreated[
-            (input_untreated['contributor.type'] == 'I') & 
-            (input_untreated['later_than_special'] != 1) &
-            (input_untreated['amount'] < 200)
-        ].groupby(['district', 'cycle', 'party']).agg(
-            counting_hedging_smallind=('bonica.rid', 'nunique')
-        ).reset_index()
-
-        temp_smallind_unt_count_result = temp_smallind_unt_count.groupby(['district', 'cycle']).agg(
-            avg_counting_hedging_np_spec_smallind=('counting_hedging_smallind', 'mean')
-        ).reset_index()
-        
-        for idx, row in temp_smallind_unt_count_result.iterrows():
-            key = (row['district'], row['cycle'])
-            if key not in agg_dict_untreated:
-                agg_dict_untreated[key] = {}
-            agg_dict_untreated[key]['avg_counting_hedging_np_spec_smallind'] = row['avg_counting_hedging_np_spec_smallind']
-        
-        # Update result_df with calculated values for untreated rows for THIS treatment
-        print(f"  Updating result_df with _gen_np_spec_{treat_num} values for untreated rows...")
-        treat_suffix = f'_{treat_num}'
-        for (district, cycle), values in agg_dict_untreated.items():
-            mask = (result_df['district'] == district) & (result_df['cycle'] == cycle)
-            for col, val in values.items():
-                col_with_suffix = f'{col}{treat_suffix}'
-                if col_with_suffix in result_df.columns:
-                    result_df.loc[mask, col_with_suffix] = val
+    # Treated district-cycles: election.type == 'S' between death_date and special_elections_date, other rows: election.type == 'G'
+    result_df = add_treated_override_variables(
+        input_df, output_7_df, result_df, gen_np_spec_vars_base,
+        lambda contributions, treat_suffix: general_hedging_aggregates(contributions, '_np_spec', treat_suffix),
+        'S', windows, multiple_death_districts
+    )
     
     print("Finished adding _gen_np_spec variables with _1, _2, _3 suffixes for OUTPUT_8_ext")
     return result_df
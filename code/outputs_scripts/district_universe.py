@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Universe of district-cycles (and district-cycle-parties) used to balance the panel of outputs.py,
+## with the real_data and territorial dummies, built from new_districts_filtered_all.csv (see convert_html_to_csv_2.py)
+
+
+### LIBRARIES
+
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+#%%
+
+### SETUP
+
+# All election years (hard-coded), and parties of the party universe (Dems and Reps only)
+UNIVERSE_CYCLES = range(1980, 2026, 2)
+UNIVERSE_PARTIES = [100, 200]
+
+# Non-voting delegations
+TERRITORIAL_DISTRICTS = ['AS01', 'DC01', 'GU01', 'MP01', 'PR01', 'VI01']
+
+# MT02 SPECIAL CASE (district discontinued and created within 1980 - 2024 period)
+# -> 2nd district: 1919–1993, 2023–present
+MT02_DISCONTINUED_CYCLES = range(1992, 2022, 2)
+
+#%%
+
+### FUNCTIONS
+
+def cartesian_product(**levels):
+    """
+    All combinations of the values of the levels, sorted by the levels in the order they are given.
+
+    Parameters:
+    -----------
+    **levels : array-like
+        Column name -> values (e.g. district = [...], cycle = [...])
+
+    Returns:
+    --------
+    DataFrame
+        One column per level
+    """
+    names = list(levels.keys())
+    product = pd.MultiIndex.from_product(list(levels.values()), names = names).to_frame(index = False)
+    return product.sort_values(names).reset_index(drop = True)
+
+
+def real_data_flags(universe):
+    """
+    real_data dummy of each district-cycle: whether the district existed in that cycle.
+
+    Districts that exist in the whole period (exist_always == 1) get 1. If some districts do not
+    (exist_always == 0), the years of creation and discontinuation are used for all rows: 0 before
+    created_year or after discontinued_year, 1 from created_year or until discontinued_year, and for
+    districts with both years, 1 only between them (inclusive). Other rows are missing.
+
+    Parameters:
+    -----------
+    universe : DataFrame
+        district-cycles with cycle, created_year, discontinued_year and exist_always
+
+    Returns:
+    --------
+    array of float
+    """
+    cycle = universe['cycle'].values.astype('float64')
+    created = universe['created_year'].values.astype('float64')
+    discontinued = universe['discontinued_year'].values.astype('float64')
+
+    real_data = np.where(universe['exist_always'].values == 1, 1.0, np.nan)
+    if (universe['exist_always'].values == 0).any():
+        real_data[(cycle < created) | (cycle > discontinued)] = 0
+        real_data[(cycle >= created) | (cycle <= discontinued)] = 1
+
+        # Special cases, which have alternate between 0 and 1 (have both created_year and discontinued_year)
+        both_years = ~np.isnan(created) & ~np.isnan(discontinued)
+        real_data[both_years] = ((cycle >= created) & (cycle <= discontinued))[both_years]
+
+    return real_data
+
+
+@lru_cache(maxsize = None)
+def _district_universe(file_path, mtime_ns, size, cycles):
+    new_districts_df = pd.read_csv(file_path, encoding='latin-1')
+
+    # Cartesian product of districts in new_districts_df and all cycles, merged with the districts data
+    universe = cartesian_product(district = new_districts_df['district'].dropna().unique(), cycle = list(cycles))
+    universe = pd.merge(
+        universe,
+        new_districts_df,
+        on=['district'],
+        how='outer'
+        )
+
+    universe['real_data'] = real_data_flags(universe)
+    universe.loc[
+        (universe['district'] == 'MT02') &
+        (universe['cycle'].isin(MT02_DISCONTINUED_CYCLES)),
+        'real_data'
+    ] = 0
+
+    universe['territorial'] = universe['district'].isin(TERRITORIAL_DISTRICTS).astype('int64')
+    return universe
+
+
+def district_universe(file_path, cycles = UNIVERSE_CYCLES):
+    """
+    Universe of district-cycles: every district of new_districts_filtered_all.csv in every cycle, with the
+    columns of the file and the real_data and territorial dummies.
+
+    The universe is built once per file (it is rebuilt when the file changes), and a copy is returned.
+
+    Parameters:
+    -----------
+    file_path : str
+        Path of new_districts_filtered_all.csv
+    cycles : iterable, optional
+        Cycles of the universe (all election years by default)
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, created_year, discontinued_year, exist_always, real_data and territorial, sorted by district and cycle
+    """
+    stat = os.stat(file_path)
+    return _district_universe(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, tuple(cycles)).copy()
+
+
+def party_universe(universe, parties = UNIVERSE_PARTIES):
+    """
+    Universe of district-cycle-parties: every district-cycle of universe for each party, with the columns of universe.
+
+    Parameters:
+    -----------
+    universe : DataFrame
+        district-cycles (e.g. from district_universe)
+    parties : list, optional
+        Parties of the universe (Dems and Reps by default)
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, party and the other columns of universe, sorted by district, cycle and party
+    """
+    party_df = cartesian_product(
+        district = universe['district'].dropna().unique(),
+        cycle = universe['cycle'].dropna().unique(),
+        party = parties
+        )
+    return pd.merge(
+        party_df,
+        universe,
+        on = ['district', 'cycle'],
+        how = 'left'
+        )
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Contributor-level amount cube of the hedging measures of OUTPUT_8 and OUTPUT_8_ext
+## (amount and count per contributor x recipient x district x cycle x party x election type x contributor type),
+## built once from the contributions, and the slices of it that replace the filtered groupbys of OUTPUT_1
+
+
+### LIBRARIES
+
+import numpy as np
+import pandas as pd
+
+#%%
+
+### CUBE
+
+# Contributions below this amount make the small individual donors (smallind) variant
+SMALL_AMOUNT = 200
+
+# Contributor-type variants of the hedging measures: suffix -> (contributor.type, amount below)
+HEDGING_VARIANTS = {
+    'corp': ('C', None),
+    'ind': ('I', None),
+    'smallind': ('I', SMALL_AMOUNT)
+    }
+
+CUBE_KEYS = ['district', 'cycle', 'bonica.cid', 'contributor.name', 'party', 'bonica.rid', 'election.type', 'contributor.type']
+
+#%%
+
+### FUNCTIONS
+
+def contributor_cube(df):
+    """
+    Amount and number of contributions of each contributor to each recipient, by district, cycle, party,
+    election type and contributor type, for the contributions the hedging measures use: general and primary
+    elections, corporations and individuals, and not later than the special election (later_than_special != 1).
+
+    The small individual donors variant keeps the contributions below SMALL_AMOUNT, so their amounts are
+    summed separately (total_amount_small, tran_count_small). Contributions outside it are masked as missing,
+    which adds up the same values, in the same order, as a groupby of the filtered contributions.
+    Missing contributors and recipients are kept as groups of their own, since they still count in the
+    groupbys that do not use them (e.g. rows without bonica.rid in the amounts by party).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Contributions (OUTPUT_1 or a subset of it)
+
+    Returns:
+    --------
+    DataFrame
+        CUBE_KEYS, total_amount, tran_count, total_amount_small and tran_count_small, sorted by CUBE_KEYS
+    """
+    rows = (
+        df['election.type'].isin(['G', 'P']) &
+        df['contributor.type'].isin(['C', 'I']) &
+        (df['later_than_special'] != 1) &
+        df['district'].notna() & df['cycle'].notna() & df['party'].notna() # never in a group of the measures
+        ).values
+    df = df[rows]
+
+    small = (df['amount'] < SMALL_AMOUNT).values
+    values = pd.DataFrame({
+        'total_amount': df['amount'],
+        'tran_count': np.ones(len(df), dtype = 'int64'),
+        'total_amount_small': df['amount'].where(small),
+        'tran_count_small': small.astype('int64')
+        }, index = df.index)
+
+    cube = values.groupby([df[col] for col in CUBE_KEYS], dropna = False, observed = True).sum()
+    return cube.reset_index()
+
+
+def cube_slice(cube, election_type, variant):
+    """
+    Rows of the cube of one election type and contributor-type variant, with the amounts of the variant
+    in total_amount.
+
+    Parameters:
+    -----------
+    cube : DataFrame
+        Output of contributor_cube
+    election_type : str
+        'G' or 'P'
+    variant : str
+        'corp', 'ind' or 'smallind' (see HEDGING_VARIANTS)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    filter_type, amount_filter = HEDGING_VARIANTS[variant]
+    rows = cube[((cube['election.type'] == election_type) & (cube['contributor.type'] == filter_type)).values]
+    if amount_filter is None:
+        return rows
+
+    rows = rows[rows['tran_count_small'].values > 0]
+    return rows.assign(total_amount = rows['total_amount_small'], tran_count = rows['tran_count_small'])
+
+
+def counting_hedging(cube, election_type, variant, column_name):
+    """
+    Number of recipients funded by the contributors of a variant, by district, cycle and party.
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, party and column_name
+    """
+    return cube_slice(cube, election_type, variant).groupby(['district', 'cycle', 'party']).agg(
+        **{column_name: ('bonica.rid', 'nunique')}
+        ).reset_index()
+
+
+def amounts_by_party(cube, election_type, variant):
+    """
+    Amount given by each contributor of a variant to each party, by district and cycle.
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, bonica.cid, contributor.name, party and total_amount
+    """
+    return cube_slice(cube, election_type, variant).groupby(['district', 'cycle', 'bonica.cid', 'contributor.name', 'party']).agg(
+        total_amount = ('total_amount', 'sum')
+        ).reset_index()
+
+
+def amounts_by_recipient(cube, election_type, variant):
+    """
+    Amount given by each contributor of a variant to each recipient, by district and cycle.
+
+    Returns:
+    --------
+    DataFrame
+        district, cycle, bonica.cid, contributor.name, party, bonica.rid and total_amount
+    """
+    group_vars = ['district', 'cycle', 'bonica.cid', 'contributor.name', 'party', 'bonica.rid']
+    rows = cube_slice(cube, election_type, variant).dropna(subset = group_vars)
+    return rows[group_vars + ['total_amount']].reset_index(drop = True)
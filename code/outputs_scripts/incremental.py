@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Incremental mode of outputs.py. When only some contribDB cycles change, only the district-cycles
+## whose contributions in OUTPUT_1 changed (and the district-cycles that depend on them) are recomputed and spliced
+## into the outputs stored by the last run
+
+
+### LIBRARIES
+
+import os
+import json
+import glob
+import hashlib
+import numpy as np
+import pandas as pd
+
+from treatment_windows import district_cycle_keys
+
+#%%
+
+### SETUP
+
+# Manifest of the last complete run, written once all outputs are stored
+MANIFEST_FILE = "manifest.json"
+
+# Columns of OUTPUT_1 read for the death attributes of OUTPUT_7 (death_unexpected_X, death_age_X, death_party_X)
+DEATH_COLUMNS = ['death_date', 'cycle', 'death_unexpected', 'death_age', 'spec_party']
+
+#%%
+
+### FUNCTIONS
+
+def inputs_signature(file_paths):
+    """
+    Signature of everything outputs.py reads besides OUTPUT_1: SHA-256 of the input files and of the helper
+    modules, and the pandas and numpy versions. Changes to outputs.py itself are not tracked, run it with
+    incremental = False after editing it.
+
+    Parameters:
+    -----------
+    file_paths : list
+        Paths of the input files (e.g. special_elections_final.csv) and helper modules (e.g. create_ext_vars.py)
+
+    Returns:
+    --------
+    str
+    """
+    sha = hashlib.sha256()
+    for file_path in file_paths:
+        sha.update(os.path.basename(file_path).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(2**24), b''):
+                sha.update(block)
+    sha.update(f"pandas {pd.__version__} numpy {np.__version__}".encode('utf-8'))
+    return sha.hexdigest()[:16]
+
+
+def group_fingerprints(df, by):
+    """
+    Fingerprint of the rows of each group of df: a hash of the row hashes, in the order of df (missing keys
+    are a group of their own).
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Rows to fingerprint
+    by : list
+        Columns of the groups
+
+    Returns:
+    --------
+    DataFrame
+        by and fingerprint (str)
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index = False).values
+    groups = df.groupby(by, dropna = False, sort = False).indices
+    fingerprints = pd.DataFrame(list(groups.keys()), columns = by)
+    fingerprints['fingerprint'] = [hashlib.sha1(row_hashes[rows].tobytes()).hexdigest()[:16] for rows in groups.values()]
+    return fingerprints
+
+
+def changed_groups(previous, current, by):
+    """Groups (by) whose fingerprint changed, appeared or disappeared between two group_fingerprints"""
+    merged = pd.merge(previous, current, on = by, how = 'outer', suffixes = ('_previous', '_current'))
+    return merged.loc[merged['fingerprint_previous'] != merged['fingerprint_current'], by]
+
+
+def open_outputs_cache(cache_folder, signature, OUTPUT_1, incremental):
+    """
+    Fingerprint OUTPUT_1 and compare it with the last run stored in cache_folder.
+
+    The contributions of each district-cycle and the deaths of each district (the distinct death rows of
+    OUTPUT_1 read for the death attributes of OUTPUT_7) are fingerprinted. The last run is used for an incremental run when its
+    manifest exists and the signature of the other inputs and the cycles of OUTPUT_1 (which set the universe
+    of districts and cycles) are the same, otherwise all outputs are recomputed.
+
+    Parameters:
+    -----------
+    cache_folder : str or None
+        Folder of the stored outputs, None disables the incremental mode
+    signature : str
+        Signature of the other inputs (see inputs_signature)
+    OUTPUT_1 : DataFrame
+        Contribution-level data (all district-cycles)
+    incremental : bool
+        Whether to recompute only the changed district-cycles
+
+    Returns:
+    --------
+    dict
+        State of the run, passed on to restrict_to_changes, splice_output and close_outputs_cache
+    """
+    state = {'folder': cache_folder, 'previous': None, 'keys': None, 'outputs': [], 'complete': True}
+    if cache_folder is None:
+        return state
+
+    print("Fingerprinting OUTPUT_1 by district-cycle...")
+    state['signature'] = signature
+    state['cycles'] = sorted(float(cycle) for cycle in OUTPUT_1['cycle'].dropna().unique())
+    state['fingerprints'] = group_fingerprints(OUTPUT_1, ['district', 'cycle'])
+    state['death_fingerprints'] = group_fingerprints(
+        OUTPUT_1.loc[OUTPUT_1['death_date'].notna(), ['district'] + DEATH_COLUMNS].drop_duplicates(), ['district'])
+
+    manifest_path = os.path.join(cache_folder, MANIFEST_FILE)
+    if incremental:
+        if not os.path.exists(manifest_path):
+            print("No complete stored run found, computing all outputs")
+        else:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest['signature'] != signature:
+                print("Inputs other than OUTPUT_1 changed since the last run, computing all outputs")
+            elif manifest['cycles'] != state['cycles']:
+                print("Cycles of OUTPUT_1 changed since the last run, computing all outputs")
+            else:
+                state['previous'] = manifest
+                state['previous_fingerprints'] = pd.read_pickle(os.path.join(cache_folder, "fingerprints.pkl"))
+                state['previous_death_fingerprints'] = pd.read_pickle(os.path.join(cache_folder, "death_fingerprints.pkl"))
+
+    return state
+
+
+def affected_keys(state, universe):
+    """
+    District-cycles to recompute in an incremental run:
+    - all district-cycles of the cycles with changed contributions. Contributions are deduplicated by
+      contributor (and recipient) and cycle across districts for the cfscore means of OUTPUT_9, so a change
+      in one district can move a contribution to another district of the same cycle;
+    - the next district-cycle of the universe of each of them, which reads it through the lagged variables
+      (P_dispersion_dem_lag and P_dispersion_rep_lag);
+    - all district-cycles of the districts whose deaths changed (death attributes of OUTPUT_7).
+    Lags and averages over earlier cycles of the general elections data (G_dispersion_lag, avg_gen_vote_pct)
+    do not depend on OUTPUT_1 and are computed on all district-cycles anyway.
+
+    Parameters:
+    -----------
+    state : dict
+        State of the run (see open_outputs_cache)
+    universe : DataFrame
+        district and cycle of the universe of district-cycles (new_districts_df)
+
+    Returns:
+    --------
+    DataFrame
+        district and cycle (float) of the district-cycles to recompute
+    """
+    changed = changed_groups(state['previous_fingerprints'], state['fingerprints'], ['district', 'cycle'])
+    changed_cycles = pd.to_numeric(changed['cycle']).dropna().astype('float64').unique()
+    death_districts = changed_groups(state['previous_death_fingerprints'], state['death_fingerprints'], ['district'])['district']
+
+    universe = universe[['district', 'cycle']].drop_duplicates().astype({'cycle': 'float64'}).sort_values(['district', 'cycle'])
+    universe['next_cycle'] = universe.groupby('district')['cycle'].shift(-1)
+    changed_keys = universe[universe['cycle'].isin(changed_cycles)]
+
+    keys = pd.concat([
+        changed_keys[['district', 'cycle']],
+        changed_keys[['district', 'next_cycle']].dropna().rename(columns = {'next_cycle': 'cycle'}),
+        universe.loc[universe['district'].isin(death_districts), ['district', 'cycle']]
+        ], ignore_index = True).drop_duplicates().reset_index(drop = True)
+
+    print("Cycles with changed contributions:", sorted(int(cycle) for cycle in changed_cycles))
+    print("Districts with changed deaths:", len(death_districts))
+    print("District-cycles to recompute:", len(keys))
+    return keys
+
+
+def restrict_to_changes(OUTPUT_1, universe, state):
+    """
+    In an incremental run, keep the rows of OUTPUT_1 needed to recompute the affected district-cycles
+    (see affected_keys): all contributions of their cycles and of the previous cycle of the universe
+    (lagged variables), and the death rows of their districts. In a full run OUTPUT_1 is returned as is.
+
+    Unless nothing changed, the manifest of the last run is removed here, before the stored outputs are
+    overwritten, and only written again once all outputs of this run are stored (see close_outputs_cache),
+    so that an interrupted run is never used.
+
+    Parameters:
+    -----------
+    OUTPUT_1 : DataFrame
+        Contribution-level data
+    universe : DataFrame
+        district and cycle of the universe of district-cycles (new_districts_df)
+    state : dict
+        State of the run (see open_outputs_cache), the affected district-cycles are saved in state['keys']
+
+    Returns:
+    --------
+    DataFrame
+    """
+    if state['previous'] is not None:
+        state['keys'] = affected_keys(state, universe)
+        if state['keys'].empty:
+            return OUTPUT_1.iloc[:0]
+
+    if state['folder'] is not None:
+        os.makedirs(state['folder'], exist_ok = True)
+        manifest_path = os.path.join(state['folder'], MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+    if state['previous'] is None:
+        return OUTPUT_1
+
+    keys = state['keys']
+
+    universe = universe[['district', 'cycle']].drop_duplicates().astype({'cycle': 'float64'}).sort_values(['district', 'cycle'])
+    universe['previous_cycle'] = universe.groupby('district')['cycle'].shift(1)
+    previous_cycles = pd.merge(keys, universe, on = ['district', 'cycle'], how = 'inner')['previous_cycle']
+    cycles = pd.concat([keys['cycle'], previous_cycles]).dropna().unique()
+
+    mask = pd.to_numeric(OUTPUT_1['cycle'], errors = 'coerce').isin(cycles).values
+    mask |= (OUTPUT_1['district'].isin(keys['district']) & OUTPUT_1['death_date'].notna()).values
+
+    print("Rows of OUTPUT_1 used to recompute them:", mask.sum(), "of", len(OUTPUT_1))
+    return OUTPUT_1[mask]
+
+
+def splice_output(df, name, state):
+    """
+    Splice an output of an incremental run into the output stored by the last run, and store the result
+    for the next run.
+
+    The rows of the recomputed district-cycles replace the stored ones at the same position, so the rows
+    keep the order of a full run. Integer columns that only became float through the missing values of the
+    replaced rows are set back to integers. In a full run df is only stored.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Output with 'district' and 'cycle', as computed in this run
+    name : str
+        Name of the output (e.g. 'OUTPUT_2')
+    state : dict
+        State of the run (see open_outputs_cache)
+
+    Returns:
+    --------
+    DataFrame
+        The spliced output (df in a full run)
+    """
+    if state['folder'] is None:
+        return df
+    output_path = os.path.join(state['folder'], f"{name}.pkl")
+
+    if state['keys'] is not None:
+        if name not in state['previous']['outputs']:
+            raise ValueError(f"{name} was not stored by the last run, run outputs.py with incremental = False")
+        stored = pd.read_pickle(output_path)
+        if list(stored.columns) != list(df.columns):
+            raise ValueError(f"Columns of {name} differ from the stored output, run outputs.py with incremental = False")
+
+        keys = district_cycle_keys(state['keys'])
+        stored_keys = district_cycle_keys(stored)
+        new_keys = district_cycle_keys(df)
+        kept = keys.get_indexer(stored_keys) < 0
+        recomputed = keys.get_indexer(new_keys) >= 0
+
+        # position of each district-cycle in the stored output (new district-cycles go at the end)
+        first_positions = pd.Series(np.arange(len(stored)), index = stored_keys)[~stored_keys.duplicated()]
+        positions = first_positions.reindex(new_keys[recomputed]).values
+        positions = np.where(np.isnan(positions), len(stored), positions)
+        order = np.lexsort((
+            np.arange(kept.sum() + recomputed.sum()),
+            np.concatenate([np.flatnonzero(kept), positions])
+            ))
+
+        spliced = pd.concat([stored[kept], df[recomputed]], ignore_index = True).iloc[order].reset_index(drop = True)
+        for column in df.columns:
+            if pd.api.types.is_integer_dtype(df[column].dtype) and pd.api.types.is_float_dtype(spliced[column].dtype) \
+                    and spliced[column].notna().all() and (spliced[column] % 1 == 0).all():
+                spliced[column] = spliced[column].astype(df[column].dtype)
+        print(f"{name}: {recomputed.sum()} recomputed rows spliced into {kept.sum()} stored rows")
+        df = spliced
+
+    tmp_path = output_path + '.tmp'
+    try:
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, output_path)
+        state['outputs'].append(name)
+    except OSError as e: # e.g. no space left on the disk
+        print(f"Warning: could not store {name} for the incremental mode: {e}")
+        state['complete'] = False
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return df
+
+
+def close_outputs_cache(state):
+    """
+    Write the fingerprints and the manifest of this run, once all outputs are stored (see open_outputs_cache).
+
+    Parameters:
+    -----------
+    state : dict
+        State of the run (see open_outputs_cache)
+    """
+    if state['folder'] is None:
+        return
+    if not state['complete']:
+        print("Warning: some outputs could not be stored, the next incremental run will compute all outputs")
+        return
+
+    state['fingerprints'].to_pickle(os.path.join(state['folder'], "fingerprints.pkl"))
+    state['death_fingerprints'].to_pickle(os.path.join(state['folder'], "death_fingerprints.pkl"))
+    for file_path in glob.glob(os.path.join(state['folder'], "*.pkl")):
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if name not in state['outputs'] + ['fingerprints', 'death_fingerprints']:
+            os.remove(file_path) # outputs no longer produced
+
+    with open(os.path.join(state['folder'], MANIFEST_FILE), 'w') as f:
+        json.dump({'signature': state['signature'], 'cycles': state['cycles'], 'outputs': state['outputs']}, f)
+    print(f"Stored {len(state['outputs'])} outputs for the incremental mode in {state['folder']}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Multi-way join of the district-cycle outputs on (district, cycle), used to assemble
+## OUTPUT_1_final_collapsed and OUTPUT_1_final_collapsed_ext in outputs.py
+
+
+### LIBRARIES
+
+import numpy as np
+import pandas as pd
+
+#%%
+
+### FUNCTIONS
+
+def _chained_merge(frames, keys, how):
+    """Join of the frames with one pd.merge per frame (used when keys are duplicated or missing, or columns overlap)"""
+    frames = list(frames.values())
+    joined = frames[0]
+    for df in frames[1:]:
+        joined = pd.merge(joined, df, on = keys, how = how)
+    return joined
+
+
+def join_on_keys(frames, keys = ['district', 'cycle'], how = 'outer'):
+    """
+    Join several frames on keys at once, giving the same table as merging them one after the other
+    (pd.merge(..., on = keys, how = how) of the first frame with each of the others, in order).
+
+    The keys of all frames are aligned on one index of the result rows: the keys of the first frame, followed
+    (how = 'outer') by the keys of each other frame that are not in the frames before it. Each frame is then
+    reindexed on these rows once, and the column blocks are concatenated once, instead of merging and copying
+    an ever-wider frame for each input. Frames with duplicated or missing keys, or with columns of the same
+    name, are merged one after the other as before, since their merges repeat rows or rename columns.
+
+    Parameters:
+    -----------
+    frames : dict
+        Name -> DataFrame, in the order of the merges (the first frame is the left one)
+    keys : list, optional
+        Columns to join on
+    how : str, optional
+        'outer' or 'left'
+
+    Returns:
+    --------
+    tuple
+        - DataFrame: the joined table, with the columns of the first frame followed by the other columns of each frame
+        - DataFrame: one row per frame with its number of rows, of result rows it has no data for (missing, filled
+          with NaN), of rows not in the result (dropped, only with how = 'left') and of duplicated keys
+    """
+    key_index = {
+        name: pd.MultiIndex.from_arrays([df[key].values for key in keys])
+        for name, df in frames.items()
+        }
+    value_columns = [col for df in frames.values() for col in df.columns if col not in keys]
+
+    names = list(frames.keys())
+    rows = key_index[names[0]]
+    new_rows = {names[0]: frames[names[0]][keys]}
+    if how == 'outer':
+        for name in names[1:]:
+            is_new = ~key_index[name].isin(rows) & ~key_index[name].duplicated()
+            if is_new.any():
+                rows = rows.append(key_index[name][is_new])
+                new_rows[name] = frames[name][keys][is_new]
+
+    report = pd.DataFrame({
+        'rows': [len(frames[name]) for name in names],
+        'missing': [int((~rows.isin(key_index[name])).sum()) for name in names],
+        'dropped': [int((~key_index[name].isin(rows)).sum()) for name in names],
+        'duplicated': [int(key_index[name].duplicated().sum()) for name in names]
+        }, index = pd.Index(names, name = 'frame'))
+
+    unique_keys = report['duplicated'].sum() == 0 and not any(frames[name][keys].isna().values.any() for name in names)
+    if not unique_keys or len(set(value_columns)) < len(value_columns):
+        return _chained_merge(frames, keys, how), report
+
+    # Each frame on the result rows (position -1, missing, is filled with NaN as in pd.merge)
+    blocks = []
+    for name in names:
+        positions = key_index[name].get_indexer(rows)
+        block = frames[name].drop(columns = keys).reset_index(drop = True)
+        if len(positions) != len(block) or (positions != np.arange(len(block))).any():
+            block = block.reindex(positions).reset_index(drop = True)
+        blocks.append(block)
+
+    key_block = pd.concat(list(new_rows.values()), ignore_index = True)
+    joined = pd.concat([key_block] + blocks, axis = 1)
+    columns = list(frames[names[0]].columns) + [col for df in list(frames.values())[1:] for col in df.columns if col not in keys]
+    return joined[columns], report
@@ -0,0 +1,2014 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Builders of the district-cycle outputs of outputs.py (OUTPUT_2 to OUTPUT_9, the _ext datasets and
+## OUTPUT_1_final_collapsed), and the registry OUTPUT_BUILDERS of the datasets each of them is built from. Every builder
+## takes its datasets and returns its output without writing any file, so the datasets it creates along the way are
+## freed when it returns. outputs.py (which saves them) and pipeline.py (which returns them) build the outputs in the
+## order of the registry.
+
+
+### LIBRARIES
+
+import os
+import sys
+import pandas as pd
+import numpy as np
+
+# Helper modules of outputs.py and the treatment windows shared with main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "main_scripts"))
+from treatment_windows import district_cycle_treatments, death_episode_attributes
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from aggregate_slices import CONTRIBUTOR_VARIANTS, variant_mask, aggregate_slices_variants
+from hedging_cube import contributor_cube, counting_hedging, amounts_by_party, amounts_by_recipient
+from multiway_join import join_on_keys
+import create_ext_vars as CEV
+
+#%%
+
+### SETUP
+
+# Columns of the universe of district-cycles, dropped from the outputs merged with OUTPUT_2 (no duplicate columns)
+UNIVERSE_COLUMNS = ['real_data', 'territorial']
+
+# Columns of OUTPUT_7 added to the _ext datasets, dropped from those merged with OUTPUT_2_ext
+TREATMENT_COLUMNS = ['treat_1', 'treat_2', 'treat_3', 'death_date', 'special_elections_date']
+
+# Contributors of each variant of OUTPUT_8, as named in the checks
+CONTRIBUTOR_LABELS = {'corp': 'companies', 'ind': 'individuals', 'smallind': 'small individuals'}
+
+#%%
+
+### PREPARING THE INPUTS
+
+def death_districts(special_elections):
+    """
+    Districts with the death of one incumbent, and with the deaths of several incumbents.
+
+    Parameters:
+    -----------
+    special_elections : DataFrame
+        special_elections_final.csv (see convert_html_to_csv.py)
+
+    Returns:
+    --------
+    tuple
+        (single_death_districts, multiple_death_districts), lists of districts
+    """
+    death_counts = special_elections[special_elections['cause_vacancy'] == 'Death'].groupby('district')['spec_member'].nunique().reset_index()
+    single_death_districts = death_counts[death_counts['spec_member'] == 1]['district'].tolist()
+    multiple_death_districts = death_counts[death_counts['spec_member'] > 1]['district'].tolist()
+    return single_death_districts, multiple_death_districts
+
+
+def prepare_general_elections(gen_elect_df, cycles):
+    """
+    Clean the MIT US House 1976 - 2024 elections data (1976-2024-house.csv) into one row per candidate of the
+    general election of each district-cycle, with the vote share gen_vote_pct (Dems and Reps only).
+
+    Parameters:
+    -----------
+    gen_elect_df : DataFrame
+        1976-2024-house.csv, as read
+    cycles : array-like
+        Cycles to keep (those of OUTPUT_1)
+
+    Returns:
+    --------
+    DataFrame
+        gen_elect_df, used for OUTPUT_6
+    """
+    # Renaming columns
+    gen_elect_df = gen_elect_df.rename(columns = {'year' : 'cycle'})
+
+    gen_elect_df['cycle'] = pd.to_numeric(gen_elect_df['cycle'], errors='coerce')  # will convert None values to NaN
+
+    # Dropping rows
+    gen_elect_df = gen_elect_df[gen_elect_df['cycle'].isin(cycles)] # cycle in OUTPUT_1
+    gen_elect_df = gen_elect_df[gen_elect_df['stage']=='GEN'] # very few observations for primary ('PRI'), no point in using them
+    gen_elect_df = gen_elect_df[gen_elect_df['special']!= True] # very few observations for special elections
+    gen_elect_df = gen_elect_df[gen_elect_df['runoff']!= True] # very few observations for runoff elections
+    gen_elect_df = gen_elect_df.drop(columns = ['runoff'])
+    gen_elect_df['runoff'] = False # Assuming everything else is not a runoff
+    # gen_elect_df = gen_elect_df[(gen_elect_df['party']=='DEMOCRAT') | (gen_elect_df['party']=='REPUBLICAN')] # only dems and reps
+    # print(gen_elect_df['cycle'].value_counts())
+    print(gen_elect_df['cycle'].unique())
+
+    # Replacing values
+    # print(gen_elect_df['party'].value_counts())
+
+    gen_elect_df['party_2'] = 300 # all others
+    gen_elect_df.loc[gen_elect_df['party'] == 'DEMOCRAT', 'party_2'] = 100
+    gen_elect_df.loc[gen_elect_df['party'] == 'REPUBLICAN', 'party_2'] = 200
+    # gen_elect_df.loc[~gen_elect_df['party'].isin([100, 200]), 'party'] = 300 # other
+    # print(gen_elect_df['party'].value_counts())
+    # print(gen_elect_df['party_2'].value_counts())
+
+    gen_elect_df = gen_elect_df.drop(columns = ['party'])
+    gen_elect_df = gen_elect_df.rename(columns = {'party_2':'party'})
+    print(gen_elect_df['party'].value_counts())
+
+    gen_elect_df['party'] = pd.to_numeric(gen_elect_df['party'], errors='coerce') # will convert None values to NaN
+
+    # Authors code at-large districts with 0, in the other datasets they are saved as 01 (e.g., for Alaska 'AK01')
+    gen_elect_df.loc[gen_elect_df['district'] == 0, 'district'] = 1
+
+    # Creating district-specific code to merge with other datasets
+    gen_elect_df['district_number'] = np.nan
+    gen_elect_df['district_number'] = gen_elect_df['district'].apply(lambda x: f"{x:02d}") # two-digit string
+    gen_elect_df['district'] = gen_elect_df['state_po'] + gen_elect_df['district_number'].astype(str)
+
+    print("Number of unique district:", gen_elect_df['district'].nunique())
+
+    # Dropping unneccesary variables
+    gen_elect_df = gen_elect_df.drop(columns = ['state', 'state_po', 'state_fips', 'state_cen', 'state_ic',
+                                                'office', # ALways US HOUSE
+                                                'stage',  # Always general elections
+                                                'special', 'runoff',
+                                                'mode',   # Always TOTAL
+                                                'unofficial',
+                                                'version', 'district_number'])
+
+    # display_duplicates(gen_elect_df, ['district', 'cycle', 'party', 'candidate'])
+
+
+    # Checking how many unique values of totalvotes for each district-cycle there, should select highest (CHECK ONLINE)
+    unique_counts = gen_elect_df.groupby(['district', 'cycle'])['totalvotes'].nunique().reset_index()
+    unique_counts.columns = ['district', 'cycle', 'nunique_totalvotes']
+    multiple_values = unique_counts[unique_counts['nunique_totalvotes'] > 1]
+    print(f"\nDistrict-cycles with multiple totalvotes values:\n{multiple_values}")
+    # LA05 2002 is a problem
+
+    # Find the maximum totalvotes for each district-cycle, merge with main data and keep only rows that have max totalvotes for district-cycle
+    max_totalvotes = gen_elect_df.groupby(['district', 'cycle'])['totalvotes'].max().reset_index()
+    max_totalvotes.columns = ['district', 'cycle', 'max_totalvotes']
+    gen_elect_df = gen_elect_df.merge(max_totalvotes, on=['district', 'cycle'], how='left')
+    gen_elect_df = gen_elect_df[gen_elect_df['totalvotes'] == gen_elect_df['max_totalvotes']]
+    gen_elect_df = gen_elect_df.drop('max_totalvotes', axis=1)
+
+    # Manually fixing values (wrong in raw data)
+    gen_elect_df.loc[
+        (gen_elect_df['district'] == 'IN02') &
+        (gen_elect_df['cycle'] == 2002) &
+        (gen_elect_df['candidate'] == 'WRITEIN'),
+        'candidatevotes'
+    ] = 12 # was originally 6
+
+    gen_elect_df.loc[
+        (gen_elect_df['district'] == 'CT01') &
+        (gen_elect_df['cycle'] == 2016) &
+        (gen_elect_df['candidate'] == 'WRITEIN'),
+        'candidatevotes'
+    ] = 2 # was originally 1
+
+
+    # Get the party associated with the highest candidatevotes for each candidate
+    main_party = gen_elect_df.loc[
+        gen_elect_df.groupby(['district', 'cycle', 'candidate'])['candidatevotes'].idxmax()
+    ][['district', 'cycle', 'candidate', 'party']]
+
+    # Sum candidatevotes
+    summed_df = gen_elect_df.groupby(['district', 'cycle', 'candidate']).agg({
+        'candidatevotes': 'sum',
+        # 'party': 'first',
+        'writein': 'first',
+        'totalvotes': 'first',
+        'fusion_ticket': 'first'
+    }).reset_index()
+
+    # Merge to get the main party
+    gen_elect_df = summed_df.merge(main_party, on=['district', 'cycle', 'candidate'], how='left')
+
+
+    votes_check = gen_elect_df.groupby(['district', 'cycle']).agg({
+        'candidatevotes': 'sum',
+        'totalvotes': 'first',
+    }).reset_index()
+    print(np.corrcoef(votes_check['candidatevotes'], votes_check['totalvotes']))
+    check_maxtotalvotes = votes_check[votes_check['candidatevotes'] != votes_check['totalvotes']]
+    print(check_maxtotalvotes)
+
+    # Detailed verification for each district-cycle combination
+    print("\n" + "="*80)
+    print("Detailed check for each district-cycle combination:")
+    print("="*80)
+
+    for _, row in check_maxtotalvotes.iterrows():
+        district = row['district']
+        cycle = row['cycle']
+        expected_total = row['totalvotes']
+        actual_sum = row['candidatevotes']
+
+        # Get all candidates for this district-cycle
+        district_cycle_data = gen_elect_df[
+            (gen_elect_df['district'] == district) &
+            (gen_elect_df['cycle'] == cycle)
+        ]
+
+        print(f"\nDistrict: {district}, Cycle: {cycle}")
+        print(f"Expected totalvotes: {expected_total:,.0f}")
+        print(f"Actual sum of candidatevotes: {actual_sum:,.0f}")
+        print(f"Difference: {expected_total - actual_sum:,.0f}")
+        print(f"Number of candidates: {len(district_cycle_data)}")
+        print("\nCandidate breakdown:")
+        # print(district_cycle_data[['candidate', 'candidatevotes', 'totalvotes']].to_string())
+        print("-"*80)
+
+
+    # For each district-cycle in check_maxtotalvotes, overwrite totalvotes with sum of candidatevotes
+    for _, row in check_maxtotalvotes.iterrows():
+        district = row['district']
+        cycle = row['cycle']
+        correct_total = row['candidatevotes']  # This is the sum from our check
+
+        # Update all rows for this district-cycle
+        mask = (gen_elect_df['district'] == district) & (gen_elect_df['cycle'] == cycle)
+        gen_elect_df.loc[mask, 'totalvotes'] = correct_total
+
+
+    print(f"Updated totalvotes for {len(check_maxtotalvotes)} district-cycle combinations")
+
+    # Verify
+    votes_check_after = gen_elect_df.groupby(['district', 'cycle']).agg({
+        'candidatevotes': 'sum',
+        'totalvotes': 'first',
+    }).reset_index()
+
+    remaining_mismatches = votes_check_after[votes_check_after['candidatevotes'] != votes_check_after['totalvotes']]
+    print(f"Remaining mismatches: {len(remaining_mismatches)}")
+
+
+    ## Final changes (problems with raw data)
+
+    # IMPORTANT NOTE: cases when candidate votes (one candidate) = totalvotes (1 = 1) indicate uncontested candidate
+    # For special case, MARIO DIAZ-BALART
+
+    # Update candidatevotes only where it's currently -1
+    gen_elect_df.loc[
+        (gen_elect_df['candidate'] == "MARIO DIAZ-BALART") &
+        (gen_elect_df['candidatevotes'] == -1),
+        'candidatevotes'
+    ] = 1
+
+    # Update totalvotes only where it's currently -1
+    gen_elect_df.loc[
+        (gen_elect_df['candidate'] == "MARIO DIAZ-BALART") &
+        (gen_elect_df['totalvotes'] == -1),
+        'totalvotes'
+    ] = 1
+
+    print("Summary of candidatevotes\n", gen_elect_df['candidatevotes'].describe()) # checking
+    print("Count of negative candidatevotes", len(gen_elect_df[gen_elect_df['candidatevotes'] < 0])) # checking
+    print("Count of negative candidatevotes", len(gen_elect_df[gen_elect_df['totalvotes'] < 0])) # checking
+
+    print(gen_elect_df[gen_elect_df['candidate'] == 'MARIO DIAZ-BALART'])
+
+
+    # Creating variable for OUTPUT_6 (since every row is each candidate in each district-cycle, we don't need to pivot or do anything else with the data to generate this data)
+    gen_elect_df['gen_vote_pct'] = gen_elect_df['candidatevotes'] / gen_elect_df['totalvotes']
+
+    # We keep only dems and reps
+    gen_elect_df = gen_elect_df[gen_elect_df['party'] != 300]
+
+    ## Checking if any duplicates
+    # display_duplicates(gen_elect_df, ['district', 'cycle', 'party', 'candidate'])
+    # display_duplicates(gen_elect_df, ['district', 'cycle', 'candidate'])
+
+    print("Summary of gen_vote_pct\n", gen_elect_df['gen_vote_pct'].describe()) # checking
+
+    return gen_elect_df
+
+
+def prepare_universe(new_districts_df, cycles):
+    """
+    Universe of district-cycles of the outputs: the universe of district_universe (see outputs_scripts/district_universe.py)
+    restricted to the cycles of OUTPUT_1.
+
+    Parameters:
+    -----------
+    new_districts_df : DataFrame
+        Output of district_universe
+    cycles : array-like
+        Cycles to keep (those of OUTPUT_1)
+
+    Returns:
+    --------
+    DataFrame
+        new_districts_df with district, cycle, real_data and territorial
+    """
+    # Filter data cycle in OUTPUT_1[cycle].unique()
+    print("Filter data cycle in OUTPUT_1[cycle].unique()")
+    new_districts_df = new_districts_df[new_districts_df['cycle'].isin(cycles)]
+    print("Earliest year", new_districts_df['cycle'].min())
+    print("Latest year", new_districts_df['cycle'].max())
+
+    new_districts_df_real1 = new_districts_df[new_districts_df['real_data'] == 1]
+    new_districts_df_real1_and_terr0 = new_districts_df_real1[new_districts_df_real1['territorial'] == 0]
+
+    print("Unique district count by cycle (all data)")
+    print(new_districts_df.groupby('cycle')['district'].count())
+    print("-" * 20)
+    print("Unique district count by cycle (real_data == 1)")
+    print(new_districts_df_real1.groupby('cycle')['district'].count())
+    print("-" * 20)
+    print("Unique district count by cycle (real_data == 1 & territorial == 0)")
+    print(new_districts_df_real1_and_terr0.groupby('cycle')['district'].count())
+    print("=" * 20)
+
+    return new_districts_df[['district', 'cycle', 'real_data', 'territorial']]
+
+
+def compare_districts(df1, df2, df1_name="df1", df2_name="df2", district_col='district'):
+    districts_df1 = set(df1[district_col].dropna())
+    districts_df2 = set(df2[district_col].dropna())
+
+    only_in_df1 = districts_df1 - districts_df2
+    only_in_df2 = districts_df2 - districts_df1
+    in_both = districts_df1 & districts_df2
+
+    print("=" * 60)
+    print(f"District Comparison: {df1_name} vs {df2_name}")
+    print("=" * 60)
+    print(f"\nTotal districts in {df1_name}: {len(districts_df1)}")
+    print(f"Total districts in {df2_name}: {len(districts_df2)}")
+    print(f"Districts in both: {len(in_both)}")
+
+    print(f"\n{'-' * 60}")
+    print(f"Districts only in {df1_name} (not in {df2_name}): {len(only_in_df1)}")
+    if only_in_df1:
+        print(sorted(only_in_df1))
+
+    print(f"\n{'-' * 60}")
+    print(f"Districts only in {df2_name} (not in {df1_name}): {len(only_in_df2)}")
+    if only_in_df2:
+        print(sorted(only_in_df2))
+
+    print('\n')
+
+    return {
+        'only_in_df1': sorted(only_in_df1),
+        'only_in_df2': sorted(only_in_df2),
+        'in_both': sorted(in_both),
+        'df1_count': len(districts_df1),
+        'df2_count': len(districts_df2),
+        'both_count': len(in_both)
+    }
+
+#%%
+
+### OUTPUT_2, OUTPUT_3 and OUTPUT_4
+
+# NOTE: (100 = Dem, 200 = Rep, 328 = Ind)
+#       All total_amount have tran_count variable to show number of transactions as well.
+
+#     1 total_amount: Sum of contributions in the district/cycle.
+
+#     2 total_amount_without_LTS1: For district/cycle with multiple elections, here we consider only those contributions that are earlier than the date of the special election.
+
+#     3 total_amount_no_primary: Sum of contributions in the district/cycle. Not considering primaries
+
+#     4 total_amount_no_primary_without_LTS1: Same as above, but before special elections date.
+
+#     5 total_amount_primary: Sum of contributions in the district/cycle. Only considering primaries
+
+#     6 total_amount_primary_without_LTS1: Same as above, but before special elections date.
+
+#     7 total_amount_gen: Sum of contributions in the district/cycle. Only considering general
+
+#     8 total_amount_gen_without_LTS1: Same as above, but before special elections date.
+
+#     9 total_amount_special: For district/cycle with multiple elections, here we consider only those contributions that are not going towards special elections, as per Bonica's definition.
+
+#     10 total_amount_special_without_LTS1: Excluding contributions before election date, but keeping only special ones
+
+#     11 total_amount_dem_gen: Sum of contributions in the district/cycle to Democratic candidate in the general election
+
+#     12 total_amount_dem_gen_without_LTS1: Same as total_amount_dem_gen, but we don't consider contributions later than special elections
+
+#     13 total_amount_dem_primary: Sum of contributions to Democratic candidates in primary
+
+#     14 total_amount_dem_primary_without_LTS1: Same as total_amount_dem_gen, but we don't consider contributions later than special elections
+
+#     15 total_amount_dem_special: Sum of contributions to Democratic candidates for special elections
+
+#     16 total_amount_dem_special_without_LTS1: Sum of contributions to Democratic candidates for special elections, before date of special election
+
+#     17 total_amount_rep_gen: Same, but for Republicans
+
+#     18 total_amount_rep_gen_without_LTS1: Same, but for Republicans
+
+#     19 total_amount_rep_primary: Same, but for Republicans
+
+#     20 total_amount_rep_primary_without_LTS1: Same, but for Republicans
+
+#     21 total_amount_rep_special: Same, but for Republicans
+
+#     22 total_amount_rep_special_without_LTS1: Same, but for Republicans
+
+# OUTPUT_3 has the same variables for contributions coming from corporations (suffix _corp), OUTPUT_4_1 for those
+# coming from individuals (_ind) and OUTPUT_4_2 for those of individuals below 200 (_smallind)
+
+def create_aggregated_outputs(input_df, variants = CONTRIBUTOR_VARIANTS):
+    """
+    Aggregate the contributions by district-cycle for all contributor-type variants in one grouped pass over the
+    22 slices (see outputs_scripts/aggregate_slices.py).
+
+    Parameters:
+    -----------
+    input_df : DataFrame
+        OUTPUT_1
+    variants : dict, optional
+        Contributor-type variants (filter on contributor.type and amount), by default those of OUTPUT_2, OUTPUT_3,
+        OUTPUT_4_1 and OUTPUT_4_2
+
+    Returns:
+    --------
+    dict
+        Name of the output -> DataFrame of the aggregates by district-cycle (only the district-cycles with contributions)
+    """
+    # Contributor-type variants (filter on contributor.type and amount) of the same input
+    print("Raw dataset:", input_df.shape)
+    for output_prefix, (filter_type, amount_filter, suffix) in variants.items():
+        if filter_type or amount_filter:
+            print(f"{output_prefix}: used", filter_type, "for filtering", f"and amounts less than {amount_filter}" if amount_filter else "")
+            print("New dataset:", (variant_mask(input_df, filter_type, amount_filter).sum(), input_df.shape[1]))
+        else:
+            print(f"{output_prefix}: no filtering used")
+
+    print(f"Processing {', '.join(variants)}...")
+
+    # All 22 slices (election type x party x later_than_special) of all variants in one grouped pass
+    # (see outputs_scripts/aggregate_slices.py)
+    final_outputs = aggregate_slices_variants(input_df, variants)
+
+    print("Aggregation complete!")
+    return final_outputs
+
+
+def balance_variant(aggregated_outputs, name, new_districts_df):
+    """
+    Output of one contributor-type variant on the universe of district-cycles, with 0 for the district-cycles
+    without contributions.
+
+    Parameters:
+    -----------
+    aggregated_outputs : dict
+        Output of create_aggregated_outputs
+    name : str
+        'OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4_1' or 'OUTPUT_4_2'
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    # NOTE: We have already created real_data dummy, we get this information from OUTPUT_2 (the 'universe' of district-cycles) and avoid creating a new one for district-cycle individual contributions
+    output = pd.merge(
+        new_districts_df, # we only need this information from OUTPUT_2
+        aggregated_outputs[name],
+        on=['cycle', 'district'],
+        how='left'
+        )
+
+    # Checking...
+    total_amount = f"total_amount{CONTRIBUTOR_VARIANTS[name][2]}"
+    print(f"Total length of dataset {name}:", len(output))
+    print(f"  - real_data == 1 and {total_amount} != Nan:", len(output[(output['real_data'] == 1) & (~output[total_amount].isna())]))
+    print(f"  - real_data == 1 and {total_amount} == Nan:", len(output[(output['real_data'] == 1) & (output[total_amount].isna())]), "(ISSUE if >0)")
+    print(f"  - real_data == 0 and {total_amount} != Nan:", len(output[(output['real_data'] == 0) & (~output[total_amount].isna())]), "(ISSUE if >0)")
+    print(f"  - real_data == 0 and {total_amount} == Nan:", len(output[(output['real_data'] == 0) & (output[total_amount].isna())]))
+
+    # Missing values of other columns are replaced with 0
+    return output.fillna(0)
+
+
+def build_output_2(aggregated_outputs, new_districts_df):
+    """
+    OUTPUT_2: amounts and counts of all contributions by district-cycle.
+
+    Parameters:
+    -----------
+    aggregated_outputs : dict
+        Output of create_aggregated_outputs
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_2...")
+
+    # Merging with districts that have a creation year or discontinuation year or both after 1980
+    print("Merging OUTPUTS with new_districts_df")
+
+    new_districts_df_real1 = new_districts_df[new_districts_df['real_data'] == 1]
+    output_2 = aggregated_outputs['OUTPUT_2']
+    for year in range(1980, 2026, 2):
+        compare_districts(
+            new_districts_df_real1[new_districts_df_real1['cycle'] == year],
+            output_2[output_2['cycle'] == year],
+            df1_name=f"new_districts_df_filter_{year}",
+            df2_name=f"OUTPUT_2_filter_{year}"
+        )
+
+    ## WE MERGE WITH UNIVERSE OF DISTRICTS
+    return balance_variant(aggregated_outputs, 'OUTPUT_2', new_districts_df)
+
+
+def build_output_3(aggregated_outputs, new_districts_df):
+    """
+    OUTPUT_3: the variables of OUTPUT_2 for contributions coming from corporations.
+
+    Parameters:
+    -----------
+    aggregated_outputs : dict
+        Output of create_aggregated_outputs
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_3...")
+    return balance_variant(aggregated_outputs, 'OUTPUT_3', new_districts_df)
+
+
+def build_output_4_1(aggregated_outputs, new_districts_df):
+    """
+    OUTPUT_4_1: the variables of OUTPUT_2 for contributions coming from individuals.
+
+    Parameters:
+    -----------
+    aggregated_outputs : dict
+        Output of create_aggregated_outputs
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_4_1...")
+    return balance_variant(aggregated_outputs, 'OUTPUT_4_1', new_districts_df)
+
+
+def build_output_4_2(aggregated_outputs, new_districts_df):
+    """
+    OUTPUT_4_2: the variables of OUTPUT_2 for contributions coming from individuals, below 200.
+
+    Parameters:
+    -----------
+    aggregated_outputs : dict
+        Output of create_aggregated_outputs
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_4_2...")
+    return balance_variant(aggregated_outputs, 'OUTPUT_4_2', new_districts_df)
+
+
+def build_output_4(output_4_1, output_4_2):
+    """
+    OUTPUT_4: OUTPUT_4_1 and OUTPUT_4_2 side by side.
+
+    Parameters:
+    -----------
+    output_4_1, output_4_2 : DataFrame
+        Outputs of build_output_4_1 and build_output_4_2
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_4...")
+    return pd.merge(
+        output_4_1.drop(columns = UNIVERSE_COLUMNS), # no duplicate columns when merging with OUTPUT_2
+        output_4_2.drop(columns = UNIVERSE_COLUMNS),
+        on=['cycle', 'district'],
+        how='outer'
+        )
+
+#%%
+
+### OUTPUT_5
+
+#     1 district_color_35_65: This variable is constructed as follows. First, we compute average vote share of Democratic Presidential nominee in the district in the closest Presidential election (var: district.pres.vs) across all cycles. Second, if this is between 35 and 65, we assign value "C". We assign value "D" if this average is above 65, and value "R" otherwise
+
+#     2 district_color_30_70: Same as district_color_35_65 but using 30 and 70 as thresholds
+
+#     3 district_color_40_60: Same as district_color_35_65 but using 40 and 60 as thresholds
+
+def build_output_5(output_1, new_districts_df):
+    """
+    OUTPUT_5: average vote share of the Democratic Presidential nominee and district colors by district-cycle.
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_5...")
+
+    print("Filtering OUTPUT_5...")
+    output_5 = output_1.groupby(
+        ['district', 'cycle']).agg(
+            district_pres_vs_avg = ('district.pres.vs', 'mean'),
+            district_pres_vs_num_candidates = ('bonica.rid', 'nunique')
+    ).reset_index()
+
+    labels = ['R', 'C', 'D']
+
+    # Assign categories
+    output_5['district_color_35_65'] = pd.cut(
+        output_5['district_pres_vs_avg'],
+        bins = [0, 0.35, 0.65, 1],
+        labels = labels,
+        include_lowest = True  # Ensures 0 is included
+    )
+
+    output_5['district_color_30_70'] = pd.cut(
+        output_5['district_pres_vs_avg'],
+        bins = [0, 0.30, 0.70, 1],
+        labels = labels,
+        include_lowest = True
+    )
+
+    output_5['district_color_40_60'] = pd.cut(
+        output_5['district_pres_vs_avg'],
+        bins = [0, 0.40, 0.60, 1],
+        labels = labels,
+        include_lowest = True
+    )
+
+    print("Finished merging OUTPUT_5!")
+
+    return pd.merge(
+        new_districts_df,
+        output_5,
+        on=['cycle', 'district'],
+        how='left'
+        )
+
+#%%
+
+### OUTPUT_6
+
+#     - totalvotes: Total number of votes in district-cycle
+
+#     - G_dem: Vote share of Democratic candidate in general elections
+
+#     - G_rep: Vote share of Republican candidate in general elections
+
+#     - G_dispersion: Absolute difference between G_dem and G_rep
+
+#     - num_candidates: Number of candidates running in general elections
+
+#     - G_dispersion_lag: Lag of G_dispersion
+
+#     - P_max_dem: Vote share of Democratic candidates with highest vote share in primary elections
+
+#     - P_min_dem: Vote share of Democratic candidates with second highest vote share in primary elections
+
+#     - P_dispersion_dem: Absolute difference between P_max_dem and P_min_dem
+
+#     - num_candidates_dem: Number of candidates running in Democratic primary elections
+
+#     - P_dispersion_dem_lag: Lag of P_dispersion_dem
+
+#     - P_max_rep: Vote share of Republican candidates with highest vote share in primary elections
+
+#     - P_min_rep: Vote share of Republican candidates with second highest vote share in primary elections
+
+#     - P_dispersion_rep: Absolute difference between P_max_rep and P_min_rep
+
+#     - num_candidates_rep: Number of candidates running in Republican primary elections
+
+#     - P_dispersion_rep_lag: Lag of P_dispersion_rep
+
+#     - Election_day: Date of the general election held at that election cycle.
+
+def calculate_metrics_grouped(data, group_vars, measure_var):
+    """
+    Using either gen.vote.pct (G) and prim.vote.pct (P) variable, calculating _max, _min, _dispersion and _average
+    (and the number of candidates) for all groups of group_vars at once.
+
+    For gen.vote.pct (G) and prim.vote.pct (P), the top two candidates of a group (by unique bonica.rid)
+    are the two largest values of the per-candidate maximum of measure_var, so _max and _min are the first
+    and second of these values within each group. For the MIT data (gen_vote_pct), G_dem and G_rep are
+    the largest gen_vote_pct of the Democrat and Republican candidates, and G_dispersion is set to 1
+    when either of them won uncontested (G_dem or G_rep equal to 1).
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        Contribution-level (OUTPUT_1) or MIT election data
+    group_vars : list
+        Variables to group by (e.g. ['district', 'cycle', 'party'])
+    measure_var : str
+        'gen.vote.pct', 'prim.vote.pct' or 'gen_vote_pct'
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per group (sorted by group_vars) with the group variables and the metrics
+    """
+    # Groups are numbered in sorted order, rows with missing group variables are dropped as in groupby
+    data = data.dropna(subset = group_vars)
+    grouped = data.groupby(group_vars)
+    group_id = grouped.ngroup()
+    result = grouped.size().index.to_frame(index = False)
+
+    if measure_var in ['gen.vote.pct', 'prim.vote.pct']:
+        prefix = 'G' if measure_var == 'gen.vote.pct' else 'P'
+
+        # Best value of every candidate (NaN if all missing), sorted within each group (descending, NaN last)
+        candidates = data[measure_var].groupby(
+            [group_id, data['bonica.rid']], dropna = False
+        ).max().reset_index(level = 0)
+        candidates.columns = ['group_id', 'value']
+        candidates = candidates.sort_values(
+            by = ['group_id', 'value'], ascending = [True, False], na_position = 'last', kind = 'mergesort'
+        )
+        rank = candidates.groupby('group_id').cumcount()
+
+        # Top two candidates of each group
+        top_1 = candidates[rank == 0].set_index('group_id')['value']
+        top_2 = candidates[rank == 1].set_index('group_id')['value']
+        result[f'{prefix}_max'] = top_1.reindex(result.index).values
+        result[f'{prefix}_min'] = top_2.reindex(result.index).values
+        result[f'{prefix}_dispersion'] = result[f'{prefix}_max'] - result[f'{prefix}_min']
+        result[f'{prefix}_average'] = (result[f'{prefix}_max'] + result[f'{prefix}_min']) / 2
+
+        # Count unique candidates
+        result['num_candidates'] = data['bonica.rid'].groupby(group_id).nunique().reindex(result.index).astype(float).values
+
+    # Special condition: MIT data
+    elif measure_var == 'gen_vote_pct':
+        # Top candidate from each party
+        for party_code, col in [(100, 'G_dem'), (200, 'G_rep')]:
+            party_rows = data['party'] == party_code
+            top = data.loc[party_rows, 'gen_vote_pct'].groupby(group_id[party_rows]).max()
+            result[col] = top.reindex(result.index).values
+
+        # Missing if either party has no candidate
+        result['G_dispersion'] = (result['G_dem'] - result['G_rep']).abs()
+        result['G_average'] = (result['G_dem'] + result['G_rep']) / 2
+
+        result['num_candidates'] = data['candidate'].groupby(group_id).nunique().reindex(result.index).astype(float).values
+
+        # If G_dem or G_rep equals 1, set G_dispersion to 1 (this means they won elections uncontested)
+        result.loc[(result['G_dem'] == 1) | (result['G_rep'] == 1), 'G_dispersion'] = 1
+
+    else:
+        print(f"{measure_var} not found")
+
+    return result
+
+
+def calculate_avg_gen_vote_pct(data, value_column='G_average'):
+    """
+    Calculate average general vote percentages for Democrats and Republicans by district and cycle.
+    For cycle == 1980, treat as missing data.
+    For other cycles, calculate the average of G_average for each party using all previous cycles.
+
+    The averages are shifted expanding means within each district and party (sorted by cycle): the
+    non-missing values of each district-party are laid out in one row of a matrix, and the average of a
+    cycle is the mean of the first n values of its row, n being the number of values in earlier cycles.
+    Means over the same number of values are summed in one go along the rows, which adds them up exactly
+    as the mean of the previous cycles did.
+
+    Parameters:
+    data: DataFrame containing district, cycle, party, and G_average columns
+    value_column: Column name to use for calculations (default: 'G_average')
+
+    Returns:
+    DataFrame with district, cycle, avg_gen_vote_pct_dem, and avg_gen_vote_pct_rep columns
+    """
+    # Rows of each district and party, sorted by cycle
+    data = data[data['district'].notna() & data['party'].notna()]
+    groups = data.groupby(['district', 'party'], sort = False).ngroup().values
+    order = np.lexsort((pd.to_numeric(data['cycle'], errors = 'coerce').values, groups))
+    data = data.iloc[order]
+    groups = groups[order]
+
+    cycles = pd.to_numeric(data['cycle'], errors = 'coerce').values.astype('float64')
+    if value_column in data.columns:
+        values = data[value_column].values.astype('float64')
+    else:
+        values = np.full(len(data), np.nan)
+    valid = ~np.isnan(values)
+
+    # Non-missing values of each district and party, in order of cycle, as the rows of a matrix
+    valid_groups = groups[valid]
+    rank = np.arange(len(valid_groups)) - np.searchsorted(valid_groups, valid_groups, side = 'left')
+    matrix = np.zeros((groups.max() + 1 if len(groups) > 0 else 0, rank.max() + 1 if len(rank) > 0 else 0))
+    matrix[valid_groups, rank] = values[valid]
+
+    # One result per cycle of each district and party: the number of non-missing values in earlier cycles
+    # is the count from the first row of the district-party to the first row of the cycle
+    rows = np.flatnonzero(~data[['district', 'party', 'cycle']].duplicated().values)
+    valid_before = np.concatenate([[0], np.cumsum(valid)])
+    counts = valid_before[rows] - valid_before[np.searchsorted(groups, groups[rows], side = 'left')]
+    counts[np.isnan(cycles[rows])] = 0 # no earlier cycles than a missing one
+
+    avg_values = np.full(len(rows), np.nan)
+    for count in np.unique(counts[counts > 0]):
+        with_count = np.flatnonzero(counts == count)
+        avg_values[with_count] = np.add.reduce(matrix[groups[rows[with_count]], :count], axis = 1) / count
+    avg_values[cycles[rows] == 1980] = np.nan # For 1980, we'll set NaN
+
+    result_df = pd.DataFrame({
+        'district': data['district'].values[rows],
+        'cycle': data['cycle'].values[rows],
+        'party': data['party'].values[rows],
+        'avg_value': avg_values
+    })
+
+    # Pivot to get one row per district-cycle with columns for each party
+    if not result_df.empty:
+        pivoted = result_df.pivot(index=['district', 'cycle'],
+                                columns='party',
+                                values='avg_value').reset_index()
+
+        # Rename columns (100 for Democrats, 200 for Republicans)
+        pivoted.columns.name = None
+
+        # Create column names based on the value column used
+        dem_col = f'avg_{value_column}_dem'
+        rep_col = f'avg_{value_column}_rep'
+
+        # Ensure columns for both parties exist (they might not if data is missing)
+        if 100 in pivoted.columns:
+            pivoted = pivoted.rename(columns={100: dem_col})
+        else:
+            pivoted[dem_col] = np.nan
+
+        if 200 in pivoted.columns:
+            pivoted = pivoted.rename(columns={200: rep_col})
+        else:
+            pivoted[rep_col] = np.nan
+
+        # Ensure 1980 values are NaN
+        pivoted.loc[pivoted['cycle'] == 1980, [dem_col, rep_col]] = np.nan
+
+        return pivoted
+    else:
+        # Return empty DataFrame with appropriate columns if no data
+        dem_col = f'avg_{value_column}_dem'
+        rep_col = f'avg_{value_column}_rep'
+        return pd.DataFrame(columns=['district', 'cycle', dem_col, rep_col])
+
+
+def build_output_6(gen_elect_df, output_1_recipients, output_2, new_districts_df, new_districts_df_party, election_dates_df):
+    """
+    OUTPUT_6: vote shares and competitiveness of the general (MIT data) and primary elections by district-cycle.
+
+    Parameters:
+    -----------
+    gen_elect_df : DataFrame
+        Output of prepare_general_elections
+    output_1_recipients : DataFrame
+        OUTPUT_1_recipients
+    output_2 : DataFrame
+        Output of build_output_2 (its district-cycles)
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+    new_districts_df_party : DataFrame
+        Universe of district-cycle-parties (see outputs_scripts/district_universe.py)
+    election_dates_df : DataFrame
+        election_dates.csv
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_6...")
+
+    # Creating datasets
+    print("Filtering OUTPUT_6_1_1...")
+
+    output_6_1_1 = calculate_metrics_grouped(gen_elect_df, ['district', 'cycle', 'totalvotes'], 'gen_vote_pct')
+
+    output_6_1_1 = pd.merge(
+        new_districts_df,
+        output_6_1_1,
+        on=['cycle', 'district'],
+        how='left'
+        )
+
+    # We groupby party as well, to get G_max for Dems and Reps (their vote share)
+    print("Filtering OUTPUT_6_1_2...")
+
+    output_6_1_2 = calculate_metrics_grouped(gen_elect_df, ['district', 'cycle', 'party'], 'gen_vote_pct')
+
+    output_6_1_2 = pd.merge(
+        new_districts_df_party[['district', 'cycle', 'party']],
+        output_6_1_2,
+        on=['cycle', 'district', 'party'],
+        how='left'
+        )
+
+    # Now, we use the output above to calculate the average values of gen.vote.pct for dems and reps
+    print("Filtering OUTPUT_6_1_3...")
+    output_6_1_3 = calculate_avg_gen_vote_pct(output_6_1_2, value_column='G_max')
+    output_6_1_3 = output_6_1_3.rename(columns = {
+        'avg_G_max_dem': 'avg_gen_vote_pct_dem',
+        'avg_G_max_rep': 'avg_gen_vote_pct_rep',
+        }
+    )
+
+    # Then, we continue for primary elections
+    print("Filtering OUTPUT_6_2 and processing OUTPUT_6_2_dem and OUTPUT_6_2_rep...")
+    # Using the recipient-cycle data, which has the same candidates and prim.vote.pct as OUTPUT_1 (see main.py)
+    output_6_2 = calculate_metrics_grouped(output_1_recipients, ['district', 'cycle', 'party'], 'prim.vote.pct')
+
+    output_6_2_dem = output_6_2[output_6_2['party'] == 100].drop(columns = 'party')
+    output_6_2_rep = output_6_2[output_6_2['party'] == 200].drop(columns = 'party')
+
+    # Adding suffix _dem and _rep to all variable names (except district, cycle)
+    output_6_2_dem = output_6_2_dem.rename(columns = {col: f"{col}_dem" for col in output_6_2_dem.columns if col not in ["district", "cycle"]})
+    output_6_2_rep = output_6_2_rep.rename(columns = {col: f"{col}_rep" for col in output_6_2_rep.columns if col not in ["district", "cycle"]})
+
+    # Balancing datasets
+    output_6_2_dem = pd.merge(
+        output_2[['district', 'cycle']],
+        output_6_2_dem,
+        on=['cycle', 'district'],
+        how='left'
+        )
+    output_6_2_rep = pd.merge(
+        output_2[['district', 'cycle']],
+        output_6_2_rep,
+        on=['cycle', 'district'],
+        how='left'
+        )
+
+    # Adding lagged variables
+    print("Adding lagged variables")
+
+    output_6_1_1 = output_6_1_1.sort_values(by=['district', 'cycle'])
+    output_6_1_1['G_dispersion_lag'] = output_6_1_1.groupby('district')['G_dispersion'].shift(1)
+
+    output_6_2_dem = output_6_2_dem.sort_values(by=['district', 'cycle'])
+    output_6_2_dem['P_dispersion_dem_lag'] = output_6_2_dem.groupby('district')['P_dispersion_dem'].shift(1)
+
+    output_6_2_rep = output_6_2_rep.sort_values(by=['district', 'cycle'])
+    output_6_2_rep['P_dispersion_rep_lag'] = output_6_2_rep.groupby('district')['P_dispersion_rep'].shift(1)
+
+    # Dropping columns
+    drop_columns = ['G_average','P_average_dem', 'P_average_rep',
+                    'avg_gen_vote_pct_dem', 'avg_gen_vote_pct_rep']
+    dataframes = [
+        df.drop(columns = [column for column in df.columns if column in drop_columns])
+        for df in [output_6_1_1, output_6_1_3, output_6_2_dem, output_6_2_rep]
+        ]
+
+    # Merging all datasets to one final dataset
+    print("Merging datasets to OUTPUT_6...")
+
+    output_6 = dataframes[0]
+    for df in dataframes[1:]:
+        output_6 = pd.merge(
+            output_6,
+            df,
+            on=['cycle', 'district'],
+            how='outer'
+            )
+
+    output_6 = pd.merge(
+        output_6,
+        election_dates_df, # merging to get election dates
+        on='cycle',
+        how='left'
+    )
+
+    output_6 = output_6.rename(columns = {
+        'election_date_in_cycle':'Election_day'
+        }
+        )
+
+    print("Merge complete!")
+    return output_6
+
+#%%
+
+### OUTPUT_7
+
+#   - "treat_1": "For single districts, we assign 1 for district/cycles after death of an incumbent. We assign 0 otherwise (before death). For multiple death districts, we copy treat_1 logic and take into account only first death",
+
+#   - "treat_2": "For single districts, we copy treat_1 logic. For multiple death districts, we assign 1 for district/cycles for the first cycle after death of an incumbent. We assign 0 afterwards until second death, where we assign 1 again in the first cycle after second death, and 0 again. We repeat for third death, if applicable.",
+
+#   - "death_date": "Date of incumbent's death, if applicable"
+
+#   - "death_unexpected_1": "For treat_1, we take this dummy from Deaths.xlsx dataset. 1, if if cause of death was an unexpected event.",
+
+#   - "death_age_1": "For treat_1, age of dead incumbent",
+
+#   - "death_party_1": "For treat_1, party of dead incumbent.",
+
+#   - "death_unexpected_2": "For treat_2, we take this dummy from Deaths.xlsx dataset. 1, if if cause of death was an unexpected event.",
+
+#   - "death_age_2": "For treat_2, age of dead incumbent",
+
+#   - "death_party_2": "For treat_2, party of dead incumbent.",
+
+#   - "spec_member": "District representative in special elections (includes deaths and resignations)",
+
+#   - "special_elections_date": "Date of special elections, if applicable"
+
+#   - "special_elections_cause": "Cause of special elections (either death or resignation of representative)",
+
+#   - "special_elections": "Dummy to indicate district-cycle with special election",
+
+def build_output_7(output_1, new_districts_df, special_elections):
+    """
+    OUTPUT_7: treatments, death attributes and special elections by district-cycle.
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+    special_elections : DataFrame
+        special_elections_final.csv
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_7...")
+    single_death_districts, multiple_death_districts = death_districts(special_elections)
+
+    output_7 = output_1[['district', 'cycle']].drop_duplicates()
+    output_7 = output_7[~output_7['cycle'].isna()]
+    print("Balancing dataset...")
+    output_7 = pd.merge(
+        new_districts_df,
+        output_7,
+        how = 'left',
+        on = ['district', 'cycle']
+        )
+
+    # Adding information from special elections data
+    output_7 = pd.merge(
+        output_7,
+        special_elections[['district', 'death_cycle', 'spec_cycle', 'death_date', 'spec_election_date',
+                           'dead_member_margin', 'spec_winner_margin', 'runoff']].rename(
+            columns = {
+                'death_cycle': 'cycle',
+                'spec_election_date': 'special_elections_date'
+                }),
+        how = 'left',
+        on = ['district', 'cycle']
+        )
+
+    # Treatments and attributes of the relevant death of each district-cycle, with the deaths of each district read
+    # once and attached to all its cycles with as-of joins on the cycle (see main_scripts/treatment_windows.py)
+    print("Creating treat_1, treat_2 and treat_3...")
+    output_7 = output_7.join(district_cycle_treatments(output_7, single_death_districts, multiple_death_districts))
+    print("Finished processing treat_1, treat_2 and treat_3")
+
+    # Creating death_unexpected, death_age, and death_party_member
+    print("Creating death_unexpected_1 (and _2), death_age_1 (and _2), and death_party_member_1 (and _2)...")
+    output_7 = output_7.join(death_episode_attributes(
+        output_7, output_1, special_elections, single_death_districts, multiple_death_districts
+        ))
+    print("Finished processing death attributes")
+
+    # Creating special_elections and special_elections_cause data
+    print("Creating special_elections and special_elections_cause variables")
+
+    # Subset of vars from special_elections data, latter only to show what has been merged
+    output_7 = pd.merge(
+        output_7,
+        special_elections[['district', 'spec_cycle', 'spec_member', 'cause_vacancy']].rename(
+            columns = {'spec_cycle': 'cycle',
+                       'cause_vacancy': 'special_elections_cause'}), # rename for merging
+        how = 'left',
+        on = ['district', 'cycle']
+        )
+
+    output_7['special_elections'] = np.where(output_7['spec_member'].notna(), 1, 0)
+
+    output_7['death_date'] = pd.to_datetime(output_7['death_date'])
+    output_7['special_elections_date'] = pd.to_datetime(output_7['special_elections_date'])
+
+    return output_7
+
+#%%
+
+### OUTPUT_8
+
+#     1 avg_counting_hedging_corp: Average number of candidates (in general election only, and before the special election) funded by corporations in the district/cycle
+
+#     2 avg_counting_hedging_corp_dem_primary: Same as avg_counting_hedging_corp but for candidates to Dem primary only
+
+#     3 avg_counting_hedging_corp_rep_primary: Same as avg_counting_hedging_corp but for candidates to Rep primary only
+
+#     4 avg_counting_hedging_ind: Average number of candidates (in general election only, and before the special election) funded by individuals in the district/cycle
+
+#     5 avg_counting_hedging_ind_dem_primary: Same as avg_counting_hedging_ind but for candidates to Dem primary only
+
+#     6 avg_counting_hedging_ind_rep_primary: Same as avg_counting_hedging_ind but for candidates to Rep primary only
+
+#     7 hedging_money_general_corp: The index of extensive-margin hedging is computed as the absolute difference between a corporation’s contributions to Republican and Democratic candidates in a given district and election cycle (only for general election, before the special election). This captures the extent to which a firm biases its contributions toward one party over the other. The index is constructed taking the average of this difference across corporations in the same district and cycle. See the keynote file strategies_hedging
+
+#     8 hedging_money_dem_primary_corp: Same as hedging_money_general_corp but computed using contributions to two main candidates in Dem primary only
+
+#     9 hedging_money_rep_primary_corp: Same as hedging_money_general_corp but computed using contributions to two main candidates in Rep primary only
+
+#     10 hedging_money_general_ind: For contributions coming from individuals
+
+#     11 hedging_money_dem_primary_ind: Same as hedging_money_general_ind but computed using contributions to two main candidates in Dem primary only
+
+#     12 hedging_money_rep_primary_ind: Same as hedging_money_general_ind but computed using contributions to two main candidates in Rep primary only
+
+def build_output_8_variant(cube, variant):
+    """
+    Build the hedging measures of OUTPUT_8 for one contributor-type variant: avg_counting_hedging_{variant},
+    avg_counting_hedging_{variant}_dem_primary and _rep_primary, hedging_money_general_{variant}, and
+    hedging_money_dem_primary_{variant} and hedging_money_rep_primary_{variant}.
+
+    The datasets of each measure (OUTPUT_8_1 to OUTPUT_8_4) only exist inside the function, so they are freed
+    as soon as they are merged.
+
+    Parameters:
+    -----------
+    cube : DataFrame
+        The contributor cube (see outputs_scripts/hedging_cube.py)
+    variant : str
+        'corp', 'ind' or 'smallind'
+
+    Returns:
+    --------
+    DataFrame
+        A dataframe with the hedging measures of the variant by district and cycle
+    """
+    # Creating avg_counting_hedging_{variant}
+    print(f"Creating avg_counting_hedging_{variant}...")
+    output_8_1 = counting_hedging(cube, 'G', variant, f'counting_hedging_{variant}')
+
+    output_8_1 = output_8_1.groupby(['district', 'cycle']).agg(**{
+        f'avg_counting_hedging_{variant}': (f'counting_hedging_{variant}', 'mean')
+    }).reset_index()
+
+    # Creating avg_counting_hedging_{variant}_dem_primary and avg_counting_hedging_{variant}_rep_primary
+    print(f"Creating avg_counting_hedging_{variant}_dem_primary and avg_counting_hedging_{variant}_rep_primary...")
+    output_8_2 = counting_hedging(cube, 'P', variant, f'counting_hedging_{variant}_primary')
+
+    output_8_2 = output_8_2.pivot_table(
+        index=['district', 'cycle'],
+        columns='party',
+        values=f'counting_hedging_{variant}_primary',
+        fill_value=0
+    ).reset_index().rename(columns = {100.0 : f"counting_hedging_{variant}_dem_primary",
+                                      200.0 : f"counting_hedging_{variant}_rep_primary"})
+    output_8_2 = output_8_2[['district', 'cycle', f'counting_hedging_{variant}_dem_primary', f'counting_hedging_{variant}_rep_primary']] # keeping only Dems and Reps
+
+    output_8_2 = output_8_2.groupby(['district', 'cycle']).agg(**{
+        f'avg_counting_hedging_{variant}_dem_primary': (f'counting_hedging_{variant}_dem_primary', 'mean'),
+        f'avg_counting_hedging_{variant}_rep_primary': (f'counting_hedging_{variant}_rep_primary', 'mean'),
+    }).reset_index()
+
+    # Creating hedging_money_general_{variant}
+    print(f"Creating hedging_money_general_{variant}...")
+    output_8_3 = amounts_by_party(cube, 'G', variant)
+
+    output_8_3 = output_8_3.pivot_table(
+        index=['district', 'cycle', 'bonica.cid', 'contributor.name'],
+        columns='party',
+        values='total_amount',
+        fill_value=0
+    ).reset_index().rename(columns = {100.0 : "total_amount_dem",
+                                      200.0 : "total_amount_rep"})
+    output_8_3 = output_8_3[['district', 'cycle', 'bonica.cid', 'contributor.name', 'total_amount_dem', 'total_amount_rep']]
+
+    output_8_3['hedging'] = abs(output_8_3['total_amount_dem'] - output_8_3['total_amount_rep'])
+    # output_8_3['n_hedging'] = output_8_3['hedging'] / (output_8_3['total_amount_dem'] + output_8_3['total_amount_rep'])
+
+    output_8_3 = output_8_3.groupby(['district', 'cycle']).agg(**{
+        f'hedging_money_general_{variant}': ('hedging', 'mean'),
+        # f'hedging_money_general_normalized_{variant}': ('n_hedging', 'mean')
+    }).reset_index()
+
+    # Creating hedging_money_dem_primary_{variant} and hedging_money_rep_primary_{variant}
+    print(f"Creating hedging_money_dem_primary_{variant} and hedging_money_rep_primary_{variant}...")
+    output_8_4 = amounts_by_recipient(cube, 'P', variant)
+
+    print(f"Nr of {CONTRIBUTOR_LABELS[variant]} that are giving to more than one candidate in the primaries",
+          output_8_4[output_8_4.duplicated(subset=['district', 'cycle', 'bonica.cid'], keep=False)]['bonica.cid'].nunique())
+
+    print(f"Nr of {CONTRIBUTOR_LABELS[variant]} that are giving to more than one candidate in the primaries in the same party",
+          output_8_4[output_8_4.duplicated(subset=['district', 'cycle', 'bonica.cid', 'party'], keep=False)]['bonica.cid'].nunique())
+
+    # Getting duplicate rows, so we understand what parties are contributing to the same party's candidates in the primaries
+    output_8_4 = output_8_4[output_8_4.duplicated(subset=['district', 'cycle', 'bonica.cid', 'party'], keep=False)]
+
+    # Primary hedging of the contributors of one party, shared with the _ext_ datasets (see outputs_scripts/create_ext_vars.py)
+    print(f"Processing hedging metrics for Dems and Reps separately ({variant})...")
+    output_8_4 = pd.merge(
+        CEV.calculate_party_hedging(output_8_4, 100, 'dem', variant),
+        CEV.calculate_party_hedging(output_8_4, 200, 'rep', variant),
+        on=['district', 'cycle'],
+        how='outer'
+    )
+
+    print(f"Merging OUTPUT_8_1_{variant} to OUTPUT_8_4_{variant}")
+    output_8, _ = join_on_keys({
+        f'OUTPUT_8_1_{variant}': output_8_1,
+        f'OUTPUT_8_2_{variant}': output_8_2,
+        f'OUTPUT_8_3_{variant}': output_8_3,
+        f'OUTPUT_8_4_{variant}': output_8_4
+        }, keys = ['cycle', 'district'])
+    print("Merge complete!")
+
+    return output_8
+
+
+def build_output_8(output_1, new_districts_df):
+    """
+    OUTPUT_8: hedging measures of corporations, individuals and small individual donors by district-cycle.
+
+    All measures come from one contributor-level cube of the contributions to general and primary elections, before
+    the special election: amount and count by contributor, recipient, district, cycle, party, election type and
+    contributor type (see outputs_scripts/hedging_cube.py).
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_8...")
+
+    print("Creating contributor cube...")
+    cube = contributor_cube(output_1)
+    print("Number of rows in the contributor cube:", len(cube), "(OUTPUT_1:", len(output_1), "rows)")
+
+    # Datasets of each variant, merged at once (see outputs_scripts/multiway_join.py)
+    output_8_variants = {}
+    for variant in ['corp', 'ind', 'smallind']:
+        print(f"Processing OUTPUT_8_{variant}...")
+        output_8_variants[f'OUTPUT_8_{variant}'] = build_output_8_variant(cube, variant)
+
+    output_8, _ = join_on_keys(output_8_variants, keys = ['cycle', 'district'])
+
+    # NOTE: We have already created real_data dummy, we get this information from OUTPUT_2 (the 'universe' of district-cycles) and avoid creating a new one for district-cycle individual contributions
+    output_8 = pd.merge(
+        new_districts_df, # we only need this information from OUTPUT_2
+        output_8,
+        on=['cycle', 'district'],
+        how='left'
+        )
+
+    # Checking...
+    print("Total length of dataset OUTPUT_8:", len(output_8))
+    print("  - real_data == 1 and (avg_counting_hedging_corp_dem_primary != Nan or avg_counting_hedging_corp_rep_primary != Nan):", len(output_8[(output_8['real_data'] == 1) & ((~output_8['avg_counting_hedging_corp_dem_primary'].isna()) | (~output_8['avg_counting_hedging_corp_rep_primary'].isna()))]))
+    print("  - real_data == 1 and (avg_counting_hedging_corp_dem_primary == Nan or avg_counting_hedging_corp_rep_primary == Nan):", len(output_8[(output_8['real_data'] == 1) & ((output_8['avg_counting_hedging_corp_dem_primary'].isna()) | (output_8['avg_counting_hedging_corp_rep_primary'].isna()))]))
+    print("  - real_data == 0 and (avg_counting_hedging_corp_dem_primary != Nan or avg_counting_hedging_corp_rep_primary != Nan):", len(output_8[(output_8['real_data'] == 0) & ((~output_8['avg_counting_hedging_corp_dem_primary'].isna()) | (~output_8['avg_counting_hedging_corp_rep_primary'].isna()))]))
+    print("  - real_data == 0 and (avg_counting_hedging_corp_dem_primary != Nan or avg_counting_hedging_corp_rep_primary != Nan):", len(output_8[(output_8['real_data'] == 0) & ((output_8['avg_counting_hedging_corp_dem_primary'].isna()) | (output_8['avg_counting_hedging_corp_rep_primary'].isna()))]))
+
+    # Missing values of other columns are replaced with 0
+    return output_8.fillna(0)
+
+#%%
+
+### OUTPUT_9
+
+# each variable has cfscore and cfscore_dyn!
+
+#     1 cfscore_mean_prim_dem: Average CFscore of candidates in the Dem primary (this tells us how much leftist the Dems are in this primary, computed using recipient.cfscores.dyn)
+
+#     2 cfscore_mean_prim_rep: Average CFscore of candidates in the Rep primary (same as above)
+
+#     3 cfscore_prim_abs_diff: Absolute value of (CFscore of Dem candidate - CFscore of Rep candidate). This should capture difference in ideology between the two parties in the district.
+
+#     4 cfscore_gen_dem: CFscore of Dem candidate in general
+
+#     5 cfscore_gen_rep: CFscore of Rep candidate in general
+
+#     6 cfscore_gen_abs_diff: Absolute value of (CFscore of Dem candidate - CFscore of Rep candidate). This should capture difference in ideology between the two parties in the district.
+
+#     7 cfscore_mean_contrib: Average CFscore of all donors
+
+#     8 cfscore_mean_contrib_dem: Average CFscore of all donors for Democrats
+
+#     9 cfscore_mean_contrib_rep: Average CFscore of all donors for Republicans
+
+def build_output_9(output_1, output_1_recipients, new_districts_df):
+    """
+    OUTPUT_9: CFscores of the candidates and the donors by district-cycle.
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    output_1_recipients : DataFrame
+        OUTPUT_1_recipients
+    new_districts_df : DataFrame
+        Universe of district-cycles (see prepare_universe)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_9...")
+
+    # Here we only use rows that were merged in merged_df_2 by filtering out NA values, so that we don't get repeated values for candidates
+    # Recipients come from the recipient-cycle data, which is in the order of OUTPUT_1 (see main.py)
+    recipients = output_1_recipients[~output_1_recipients['bonica.rid'].isna()] # suffix: _1, for recipients
+    contributors = output_1[~output_1['bonica.cid'].isna()] # suffix: _2, for contributors / donors
+
+    # Dropping duplicate rows
+    recipients = recipients.drop_duplicates(
+        subset=['bonica.rid', 'cycle'],
+        keep='first'
+    )
+
+    contributors = contributors.drop_duplicates(
+        subset=['bonica.cid', 'cycle'],
+        keep='first'
+    )
+
+    # cfscore_mean_prim_dem
+    print("Processing cfscore_mean_prim_dem...")
+    output_9_1 = recipients[
+        (recipients['election.type'] == 'P') &   # primary only
+        (recipients['party'] == 100)             # dems
+        ].groupby(['district', 'cycle']).agg(
+        count_cfscore=('recipient.cfscore', 'count'),
+        count_cfscore_dyn=('recipient.cfscore.dyn', 'count'),
+        cfscore_mean_prim_dem=('recipient.cfscore', 'mean'),
+        cfscore_dyn_mean_prim_dem=('recipient.cfscore.dyn', 'mean')
+    ).reset_index()
+
+    # Replacing missing values of cfscore_dyn with cf_score
+    output_9_1['cfscore_dyn_mean_prim_dem_final'] = np.where(
+        output_9_1['cfscore_dyn_mean_prim_dem'].isna(),  # Condition: where values are missing
+        output_9_1['cfscore_mean_prim_dem'],             # Value if condition is True: use cfscore_mean_prim_dem
+        output_9_1['cfscore_dyn_mean_prim_dem']          # Value if condition is False: keep original value
+    )
+
+    output_9_1 = output_9_1[['district', 'cycle', 'cfscore_dyn_mean_prim_dem_final']].rename(columns = {'cfscore_dyn_mean_prim_dem_final': 'cfscore_mean_prim_dem'})
+
+
+    # cfscore_mean_prim_rep
+    print("Processing cfscore_mean_prim_rep...")
+    output_9_2 = recipients[
+        (recipients['election.type'] == 'P') &   # primary only
+        (recipients['party'] == 200)             # reps
+        ].groupby(['district', 'cycle']).agg(
+        count_cfscore=('recipient.cfscore', 'count'),
+        count_cfscore_dyn=('recipient.cfscore.dyn', 'count'),
+        cfscore_mean_prim_rep=('recipient.cfscore', 'mean'),
+        cfscore_dyn_mean_prim_rep=('recipient.cfscore.dyn', 'mean')
+    ).reset_index()
+
+    output_9_2['cfscore_dyn_mean_prim_rep_final'] = np.where(
+        output_9_2['cfscore_dyn_mean_prim_rep'].isna(),
+        output_9_2['cfscore_mean_prim_rep'],
+        output_9_2['cfscore_dyn_mean_prim_rep']
+    )
+
+    output_9_2 = output_9_2[['district', 'cycle', 'cfscore_dyn_mean_prim_rep_final']].rename(columns = {'cfscore_dyn_mean_prim_rep_final': 'cfscore_mean_prim_rep'})
+
+    # cfscore_prim_abs_diff
+    print("Processing cfscore_prim_abs_diff...")
+    output_9_3 = pd.merge(
+        output_9_1,
+        output_9_2,
+        on = ['district', 'cycle'],
+        how = 'outer'
+        )
+    output_9_3['cfscore_prim_abs_diff'] = abs(output_9_3['cfscore_mean_prim_dem'] - output_9_3['cfscore_mean_prim_rep'])
+
+
+    # cfscore_gen_dem
+    print("Processing cfscore_gen_dem...")
+    groupby_vars = ['district', 'cycle', 'bonica.rid']
+    output_9_4 = recipients[
+        (recipients['election.type'] == 'G') &   # primary only
+        (recipients['party'] == 100)             # dems
+        ].groupby(groupby_vars).agg(
+        count_cfscore=('recipient.cfscore', 'count'),
+        count_cfscore_dyn=('recipient.cfscore.dyn', 'count'),
+        cfscore_gen_dem=('recipient.cfscore', 'mean'),
+        cfscore_dyn_gen_dem=('recipient.cfscore.dyn', 'mean'),
+        gen_vote_pct=('gen.vote.pct', 'sum'),
+    ).reset_index()
+
+    output_9_4['cfscore_dyn_gen_dem_final'] = np.where(
+        output_9_4['cfscore_dyn_gen_dem'].isna(),
+        output_9_4['cfscore_gen_dem'],
+        output_9_4['cfscore_dyn_gen_dem']
+    )
+
+    output_9_4 = output_9_4[groupby_vars + ['cfscore_dyn_gen_dem_final', 'count_cfscore', 'gen_vote_pct']].rename(columns = {'cfscore_dyn_gen_dem_final': 'cfscore_gen_dem'})
+
+    output_9_4 = output_9_4.sort_values(
+        # Selecting candidates with most votes for each district-cycle-party (if duplicates)
+        by=['district', 'cycle', 'gen_vote_pct'],
+        ascending = [True, True, False])
+    output_9_4 = output_9_4.drop_duplicates(subset=['district', 'cycle'])
+    output_9_4 = output_9_4.drop(columns = ['bonica.rid', 'count_cfscore', 'gen_vote_pct'])
+
+    # cfscore_gen_rep
+    print("Processing cfscore_gen_rep...")
+    output_9_5 = recipients[
+        (recipients['election.type'] == 'G') &   # primary only
+        (recipients['party'] == 200)             # reps
+        ].groupby(groupby_vars).agg(
+        count_cfscore=('recipient.cfscore', 'count'),
+        count_cfscore_dyn=('recipient.cfscore.dyn', 'count'),
+        cfscore_gen_rep=('recipient.cfscore', 'mean'),
+        cfscore_dyn_gen_rep=('recipient.cfscore.dyn', 'mean'),
+        gen_vote_pct=('gen.vote.pct', 'sum'),
+    ).reset_index()
+
+    output_9_5['cfscore_dyn_gen_rep_final'] = np.where(
+        output_9_5['cfscore_dyn_gen_rep'].isna(),
+        output_9_5['cfscore_gen_rep'],
+        output_9_5['cfscore_dyn_gen_rep']
+    )
+
+    output_9_5 = output_9_5[groupby_vars + ['cfscore_dyn_gen_rep_final', 'count_cfscore', 'gen_vote_pct']].rename(columns = {'cfscore_dyn_gen_rep_final': 'cfscore_gen_rep'})
+
+    output_9_5 = output_9_5.sort_values(
+        # Selecting candidates with most votes for each district-cycle-party (if duplicates)
+        by=['district', 'cycle', 'gen_vote_pct'],
+        ascending = [True, True, False])
+    output_9_5 = output_9_5.drop_duplicates(subset=['district', 'cycle'])
+    output_9_5 = output_9_5.drop(columns = ['bonica.rid', 'count_cfscore', 'gen_vote_pct'])
+
+
+    # cfscore_gen_abs_diff
+    print("Processing cfscore_gen_abs_diff...")
+    output_9_6 = pd.merge(
+        output_9_4,
+        output_9_5,
+        on = ['district', 'cycle'],
+        how = 'outer'
+        )
+    output_9_6['cfscore_gen_abs_diff'] = abs(output_9_6['cfscore_gen_dem'] - output_9_6['cfscore_gen_rep'])
+
+    # cfscore_mean_contrib
+    print("Processing cfscore_mean_contrib...")
+    output_9_7 = contributors.groupby(['district', 'cycle']).agg(
+        count_cfscore=('contributor.cfscore', 'count'),
+        count_cfscore_dyn=('contributor.cfscore', 'count'),
+        cfscore_mean_contrib=('contributor.cfscore', 'mean'),
+        cfscore_dyn_mean_contrib=('contributor.cfscore', 'mean')
+    ).reset_index()
+
+    output_9_7['cfscore_dyn_mean_contrib_final'] = np.where(
+        output_9_7['cfscore_dyn_mean_contrib'].isna(),
+        output_9_7['cfscore_mean_contrib'],
+        output_9_7['cfscore_dyn_mean_contrib']
+    )
+
+    output_9_7 = output_9_7[['district', 'cycle', 'cfscore_dyn_mean_contrib_final', 'count_cfscore']].rename(columns = {'cfscore_dyn_mean_contrib_final': 'cfscore_mean_contrib'})
+
+
+    # cfscore_mean_contrib_dem
+    print("Processing cfscore_mean_contrib_dem...")
+    output_9_8 = contributors[
+        (contributors['party'] == 100)
+        ].groupby(['district', 'cycle']).agg(
+        count_cfscore=('contributor.cfscore', 'count'),
+        count_cfscore_dyn=('contributor.cfscore', 'count'),
+        cfscore_mean_contrib_dem=('contributor.cfscore', 'mean'),
+        cfscore_dyn_mean_contrib_dem=('contributor.cfscore', 'mean')
+    ).reset_index()
+
+    output_9_8['cfscore_dyn_mean_contrib_dem_final'] = np.where(
+        output_9_8['cfscore_dyn_mean_contrib_dem'].isna(),
+        output_9_8['cfscore_mean_contrib_dem'],
+        output_9_8['cfscore_dyn_mean_contrib_dem']
+    )
+
+    output_9_8 = output_9_8[['district', 'cycle', 'cfscore_dyn_mean_contrib_dem_final', 'count_cfscore']].rename(columns = {'cfscore_dyn_mean_contrib_dem_final': 'cfscore_mean_contrib_dem'})
+
+    # cfscore_mean_contrib_rep
+    print("Processing cfscore_mean_contrib_rep...")
+    output_9_9 = contributors[
+        (contributors['party'] == 200)
+        ].groupby(['district', 'cycle']).agg(
+        count_cfscore=('contributor.cfscore', 'count'),
+        count_cfscore_dyn=('contributor.cfscore', 'count'),
+        cfscore_mean_contrib_rep=('contributor.cfscore', 'mean'),
+        cfscore_dyn_mean_contrib_rep=('contributor.cfscore', 'mean')
+    ).reset_index()
+
+
+    output_9_9['cfscore_dyn_mean_contrib_rep_final'] = np.where(
+        output_9_9['cfscore_dyn_mean_contrib_rep'].isna(),
+        output_9_9['cfscore_mean_contrib_rep'],
+        output_9_9['cfscore_dyn_mean_contrib_rep']
+    )
+
+    output_9_9 = output_9_9[['district', 'cycle', 'cfscore_dyn_mean_contrib_rep_final', 'count_cfscore']].rename(columns = {'cfscore_dyn_mean_contrib_rep_final': 'cfscore_mean_contrib_rep'})
+
+
+    # Cleaning, and registry of the datasets merged to output_9
+    output_9_parts = {
+        'OUTPUT_9_1': output_9_1[['district', 'cycle', 'cfscore_mean_prim_dem']],
+        'OUTPUT_9_2': output_9_2[['district', 'cycle', 'cfscore_mean_prim_rep']],
+        'OUTPUT_9_3': output_9_3[['district', 'cycle', 'cfscore_prim_abs_diff']],
+        'OUTPUT_9_4': output_9_4[['district', 'cycle', 'cfscore_gen_dem']],
+        'OUTPUT_9_5': output_9_5[['district', 'cycle', 'cfscore_gen_rep']],
+        'OUTPUT_9_6': output_9_6[['district', 'cycle', 'cfscore_gen_abs_diff']],
+        'OUTPUT_9_7': output_9_7[['district', 'cycle', 'cfscore_mean_contrib']],
+        'OUTPUT_9_8': output_9_8[['district', 'cycle', 'cfscore_mean_contrib_dem']],
+        'OUTPUT_9_9': output_9_9[['district', 'cycle', 'cfscore_mean_contrib_rep']]
+    }
+    del recipients, contributors, output_9_1, output_9_2, output_9_3, output_9_4, output_9_5, output_9_6, output_9_7, output_9_8, output_9_9
+
+
+    # Merging all outputs
+    print("Merging datasets to OUTPUT_9...")
+
+    output_9, _ = join_on_keys(output_9_parts, keys = ['cycle', 'district'])
+    del output_9_parts
+    print("Merge complete!")
+
+    output_9 = pd.merge(
+        new_districts_df,
+        output_9,
+        on = ['district', 'cycle'],
+        how = 'left'
+        )
+
+    # We have 'recipient.cfscore' and 'recipient.cfscore.dyn', but the latter is clearly better, although has missing values
+
+    return output_9
+
+#%%
+
+### OUTPUT_2_ext, OUTPUT_3_ext, OUTPUT_4_ext, and OUTPUT_8_ext
+
+# Extended datasets with vars that apply the condition of filter contributions between death_date and spec_election_date,
+# in 3 steps (see outputs_scripts/create_ext_vars.py):
+# 1. create_treatment_filtered_outputs and create_output8_treatment_filtered
+# 2. add_gen_np_variables and add_gen_np_variables_output8
+# 3. add_gen_np_spec_variables and add_gen_np_spec_variables_output8
+
+def flag_treatment_windows(output_1, output_7, special_elections):
+    """
+    Contributions between death_date and special_elections_date of the treated district-cycles of OUTPUT_7,
+    computed once for all the _ext_ datasets (see main_scripts/treatment_windows.py).
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    output_7 : DataFrame
+        Output of build_output_7
+    special_elections : DataFrame
+        special_elections_final.csv
+
+    Returns:
+    --------
+    DataFrame
+        window_1, window_2 and window_3 flags of the rows of OUTPUT_1
+    """
+    return CEV.treatment_window_flags(output_1, output_7.drop(columns = UNIVERSE_COLUMNS), *death_districts(special_elections))
+
+
+def aggregate_treated_slices(output_1, output_7, windows):
+    """
+    Treated aggregates of the 22 slices for all contributor-type variants, one grouped pass per treatment
+    (see create_ext_vars.treated_slice_aggregates).
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    output_7 : DataFrame
+        Output of build_output_7
+    windows : DataFrame
+        Output of flag_treatment_windows
+
+    Returns:
+    --------
+    dict
+        treat_num -> output name -> DataFrame
+    """
+    return CEV.treated_slice_aggregates(output_1, output_7.drop(columns = UNIVERSE_COLUMNS), windows, list(CONTRIBUTOR_VARIANTS))
+
+
+def add_treatment_variables(ext_df, output_7, name):
+    """
+    Add treat_1, treat_2, treat_3, death_date and special_elections_date of OUTPUT_7 to an _ext dataset, as its
+    first columns after district and cycle, with numeric columns and the rows sorted by district and cycle.
+
+    Parameters:
+    -----------
+    ext_df : DataFrame
+        _ext dataset
+    output_7 : DataFrame
+        Output of build_output_7
+    name : str
+        Name of the _ext dataset
+
+    Returns:
+    --------
+    DataFrame
+    """
+    # Merge treatment variables
+    df_merged = pd.merge(
+        ext_df,
+        output_7[['district', 'cycle'] + TREATMENT_COLUMNS],
+        on=['district', 'cycle'],
+        how='left'
+    )
+
+    print(df_merged.columns)
+
+    # Convert all columns to numeric except district and date columns
+    print(f"Converting {name} columns to numeric...")
+    for col in df_merged.columns:
+        if col not in ['district', 'death_date', 'special_elections_date']:
+            df_merged[col] = pd.to_numeric(df_merged[col], errors='ignore')
+
+    # Ensure date columns are datetime
+    for col in df_merged.columns:
+        if col in ['death_date', 'special_elections_date']:
+            df_merged[col] = pd.to_datetime(df_merged[col], errors='ignore')
+
+    # Reorder columns: district, cycle, treat_1, treat_2, treat_3, then the rest
+    first_cols = ['district', 'cycle'] + TREATMENT_COLUMNS
+    other_cols = [col for col in df_merged.columns if col not in first_cols]
+    df_merged = df_merged[first_cols + other_cols]
+    return df_merged.sort_values(by = ['district', 'cycle'])
+
+
+def build_ext_output(name, output_1, output_7, base_output, special_elections, windows, treated_aggregates, output_2_ext = None):
+    """
+    _ext dataset of OUTPUT_2, OUTPUT_3, OUTPUT_4_1 or OUTPUT_4_2: the variables of the output with their _1, _2 and _3
+    versions for the treated district-cycles, and the _gen_np and _gen_np_spec variables.
+
+    Parameters:
+    -----------
+    name : str
+        'OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4_1' or 'OUTPUT_4_2'
+    output_1 : DataFrame
+        OUTPUT_1
+    output_7 : DataFrame
+        Output of build_output_7
+    base_output : DataFrame
+        The output (OUTPUT_2 as built, the others without real_data and territorial)
+    special_elections : DataFrame
+        special_elections_final.csv
+    windows : DataFrame
+        Output of flag_treatment_windows
+    treated_aggregates : dict
+        Output of aggregate_treated_slices
+    output_2_ext : DataFrame, optional
+        Output of build_output_2_ext, from which real_data and territorial are taken (all but OUTPUT_2)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print(f"Processing {name}_ext...")
+    single_death_districts, multiple_death_districts = death_districts(special_elections)
+    output_7 = output_7.drop(columns = UNIVERSE_COLUMNS)
+
+    ext_df = CEV.create_treatment_filtered_outputs(output_1, output_7, base_output, name, single_death_districts, multiple_death_districts, windows = windows, treated_aggregates = treated_aggregates)
+    ext_df = CEV.add_gen_np_variables(output_1, output_7, ext_df, name, single_death_districts, multiple_death_districts, windows = windows)
+    ext_df = CEV.add_gen_np_spec_variables(output_1, output_7, ext_df, name, single_death_districts, multiple_death_districts, windows = windows)
+    ext_df = add_treatment_variables(ext_df, output_7, f'{name}_ext')
+
+    # Adding 'real_data' and 'territorial'
+    if output_2_ext is not None:
+        ext_df = pd.merge(
+            output_2_ext[['district', 'cycle'] + UNIVERSE_COLUMNS],
+            ext_df,
+            on = ['district', 'cycle'],
+            how = 'left'
+            )
+
+    print(f"{name}_ext shape:", ext_df.shape)
+    return ext_df.fillna(0)
+
+
+def build_output_2_ext(output_1, output_7, output_2, special_elections, windows, treated_aggregates):
+    """OUTPUT_2_ext, see build_ext_output"""
+    return build_ext_output('OUTPUT_2', output_1, output_7, output_2, special_elections, windows, treated_aggregates)
+
+
+def build_output_3_ext(output_1, output_7, output_3, special_elections, windows, treated_aggregates, output_2_ext):
+    """OUTPUT_3_ext, see build_ext_output"""
+    return build_ext_output('OUTPUT_3', output_1, output_7, output_3.drop(columns = UNIVERSE_COLUMNS), special_elections, windows, treated_aggregates, output_2_ext)
+
+
+def build_output_4_1_ext(output_1, output_7, output_4_1, special_elections, windows, treated_aggregates, output_2_ext):
+    """OUTPUT_4_1_ext, see build_ext_output"""
+    return build_ext_output('OUTPUT_4_1', output_1, output_7, output_4_1.drop(columns = UNIVERSE_COLUMNS), special_elections, windows, treated_aggregates, output_2_ext)
+
+
+def build_output_4_2_ext(output_1, output_7, output_4_2, special_elections, windows, treated_aggregates, output_2_ext):
+    """OUTPUT_4_2_ext, see build_ext_output"""
+    return build_ext_output('OUTPUT_4_2', output_1, output_7, output_4_2.drop(columns = UNIVERSE_COLUMNS), special_elections, windows, treated_aggregates, output_2_ext)
+
+
+def build_output_8_ext(output_1, output_7, output_8, special_elections, windows, output_2_ext):
+    """
+    OUTPUT_8_ext: the hedging measures of OUTPUT_8 with their _1, _2 and _3 versions for the treated district-cycles,
+    and the _gen_np and _gen_np_spec measures.
+
+    Parameters:
+    -----------
+    output_1 : DataFrame
+        OUTPUT_1
+    output_7, output_8 : DataFrame
+        Outputs of build_output_7 and build_output_8
+    special_elections : DataFrame
+        special_elections_final.csv
+    windows : DataFrame
+        Output of flag_treatment_windows
+    output_2_ext : DataFrame
+        Output of build_output_2_ext, from which real_data and territorial are taken
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("Processing OUTPUT_8_ext...")
+    single_death_districts, multiple_death_districts = death_districts(special_elections)
+    output_7 = output_7.drop(columns = UNIVERSE_COLUMNS)
+
+    ext_df = CEV.create_output8_treatment_filtered(output_1, output_7, output_8.drop(columns = UNIVERSE_COLUMNS), single_death_districts, multiple_death_districts, windows = windows)
+    ext_df = CEV.add_gen_np_variables_output8(output_1, output_7, ext_df, single_death_districts, multiple_death_districts, windows = windows)
+    ext_df = CEV.add_gen_np_spec_variables_output8(output_1, output_7, ext_df, single_death_districts, multiple_death_districts, windows = windows)
+    ext_df = add_treatment_variables(ext_df, output_7, 'OUTPUT_8_ext')
+
+    # Adding 'real_data' and 'territorial'
+    ext_df = pd.merge(
+        output_2_ext[['district', 'cycle'] + UNIVERSE_COLUMNS],
+        ext_df,
+        on = ['district', 'cycle'],
+        how = 'left'
+        )
+
+    print("OUTPUT_8_ext shape:", ext_df.shape)
+    return ext_df.fillna(0)
+
+#%%
+
+### OUTPUT_1_final_collapsed and OUTPUT_1_final_collapsed_ext
+
+# Variables of the _ext datasets added to OUTPUT_1_final_collapsed: the gen_np variables of OUTPUT_2, 3, 4_1, 4_2 ...
+GEN_NP_VARS_OUTPUTS_2_TO_4 = [
+    'total_amount_gen_np',
+    'tran_count_gen_np',
+    'total_amount_gen_np_without_LTS1',
+    'tran_count_gen_np_without_LTS1',
+    'total_amount_dem_gen_np',
+    'tran_count_dem_gen_np',
+    'total_amount_dem_gen_np_without_LTS1',
+    'tran_count_dem_gen_np_without_LTS1',
+    'total_amount_rep_gen_np',
+    'tran_count_rep_gen_np',
+    'total_amount_rep_gen_np_without_LTS1',
+    'tran_count_rep_gen_np_without_LTS1'
+]
+
+# ... and those of OUTPUT_8
+GEN_NP_VARS_OUTPUT8 = [
+    'hedging_money_general_np_corp',
+    'avg_counting_hedging_np_corp',
+    'hedging_money_general_np_ind',
+    'avg_counting_hedging_np_ind',
+    'hedging_money_general_np_smallind',
+    'avg_counting_hedging_np_smallind',
+]
+
+def build_output_1_final_collapsed_ext(output_2_ext, output_3_ext, output_4_1_ext, output_4_2_ext, output_8_ext):
+    """
+    OUTPUT_1_final_collapsed_ext: all _ext datasets side by side.
+
+    All datasets are joined at once on their (district, cycle) rows (see outputs_scripts/multiway_join.py),
+    which gives the same data as merging them one after the other.
+
+    Parameters:
+    -----------
+    output_2_ext, output_3_ext, output_4_1_ext, output_4_2_ext, output_8_ext : DataFrame
+        Outputs of the _ext builders
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("..." * 5)
+    print("Merging all extended datasets: OUTPUTS_2_ext, OUTPUT_3_ext, OUTPUT_4_1_ext, OUTPUT_4_2_ext, and OUTPUT_8_ext")
+
+    # no duplicate columns when merging with OUTPUT_2_ext
+    output_1_final_collapsed_ext, ext_join_report = join_on_keys({
+        'OUTPUT_2_ext': output_2_ext,
+        'OUTPUT_3_ext': output_3_ext.drop(columns = UNIVERSE_COLUMNS + TREATMENT_COLUMNS),
+        'OUTPUT_4_1_ext': output_4_1_ext.drop(columns = UNIVERSE_COLUMNS + TREATMENT_COLUMNS),
+        'OUTPUT_4_2_ext': output_4_2_ext.drop(columns = UNIVERSE_COLUMNS + TREATMENT_COLUMNS),
+        'OUTPUT_8_ext': output_8_ext.drop(columns = UNIVERSE_COLUMNS + TREATMENT_COLUMNS)
+        }, keys = ['cycle', 'district'], how = 'outer')
+
+    print("EXT merge complete!")
+
+    print("\n\nFINAL EXT CHECK:\nLength of final EXT dataset:", len(output_1_final_collapsed_ext),
+          "should be the same as all these EXT datasets")
+    print("(missing: district-cycles of the final EXT dataset not in the dataset, filled with NaN; duplicated: repeated district-cycles)")
+    print(ext_join_report[['rows', 'missing', 'duplicated']])
+
+    return output_1_final_collapsed_ext
+
+
+def build_output_1_final_collapsed(output_2, output_3, output_4, output_5, output_6, output_7, output_8, output_9,
+                                   output_2_ext, output_3_ext, output_4_1_ext, output_4_2_ext, output_8_ext):
+    """
+    OUTPUT_1_final_collapsed: OUTPUT_2 to OUTPUT_9 side by side, with the gen_np variables of the _ext datasets.
+
+    Parameters:
+    -----------
+    output_2, ..., output_9 : DataFrame
+        Outputs of build_output_2 to build_output_9
+    output_2_ext, output_3_ext, output_4_1_ext, output_4_2_ext, output_8_ext : DataFrame
+        Outputs of the _ext builders
+
+    Returns:
+    --------
+    DataFrame
+    """
+    print("..." * 5)
+    print("Merging all outputs: OUTPUTS_2 to OUTPUTS_9")
+
+    # no duplicate columns when merging with OUTPUT_2, and only the district colors of OUTPUT_5
+    output_1_final_collapsed, join_report = join_on_keys({
+        'OUTPUT_2': output_2,
+        'OUTPUT_3': output_3.drop(columns = UNIVERSE_COLUMNS),
+        'OUTPUT_4': output_4,
+        'OUTPUT_5': output_5[['district', 'cycle', 'district_color_35_65', 'district_color_30_70', 'district_color_40_60']],
+        'OUTPUT_6': output_6.drop(columns = UNIVERSE_COLUMNS),
+        'OUTPUT_7': output_7.drop(columns = UNIVERSE_COLUMNS),
+        'OUTPUT_8': output_8.drop(columns = UNIVERSE_COLUMNS),
+        'OUTPUT_9': output_9.drop(columns = UNIVERSE_COLUMNS)
+        }, keys = ['cycle', 'district'], how = 'outer')
+    print("Merge complete!")
+
+    print("\n\nFINAL CHECK:\nLength of final dataset:", len(output_1_final_collapsed),
+          "should be the same as all these datasets")
+    print("(missing: district-cycles of the final dataset not in the dataset, filled with NaN; duplicated: repeated district-cycles)")
+    print(join_report[['rows', 'missing', 'duplicated']])
+
+    print("Also, merging variables from _ext datasets (OUTPUT_2_ext, OUTPUT_3_ext, OUTPUT_4_1_ext, OUTPUT_4_2_ext, and OUTPUT_8_ext)")
+
+    # Dictionary mapping datasets to their respective variable lists
+    ext_datasets = {
+        'OUTPUTS_2_ext': (output_2_ext, GEN_NP_VARS_OUTPUTS_2_TO_4),
+        'OUTPUT_3_ext': (output_3_ext, GEN_NP_VARS_OUTPUTS_2_TO_4),
+        'OUTPUT_4_1_ext': (output_4_1_ext, GEN_NP_VARS_OUTPUTS_2_TO_4),
+        'OUTPUT_4_2_ext': (output_4_2_ext, GEN_NP_VARS_OUTPUTS_2_TO_4),
+        'OUTPUT_8_ext': (output_8_ext, GEN_NP_VARS_OUTPUT8)
+    }
+
+    # Select the variables of each dataset, and merge them all at once
+    selected_ext_datasets = {'OUTPUT_1_final_collapsed': output_1_final_collapsed}
+    for dataset_name, (dataset, var_patterns) in ext_datasets.items():
+        print(f"  Selecting variables of {dataset_name}...")
+
+        # Select columns that contain any of the variable patterns
+        cols_to_keep = ['district', 'cycle']
+        for col in dataset.columns:
+            if any(pattern in col for pattern in var_patterns):
+                print(f"    From {dataset_name}, keeping variable: {col}")
+                cols_to_keep.append(col)
+
+        # Check if we found all expected variables
+        # Note: We expect at least as many columns as patterns (could be more with suffixes)
+        expected_count = len(var_patterns)
+        actual_count = len(cols_to_keep) - 2  # Subtract 'district' and 'cycle'
+
+        if actual_count >= expected_count:
+            print(f"Found {actual_count} variables (expected at least {expected_count})")
+        else:
+            print(f"Warning: Found only {actual_count} variables, expected at least {expected_count}")
+            print(f"    Missing patterns might include: {var_patterns}")
+
+        selected_ext_datasets[dataset_name] = dataset[cols_to_keep]
+
+        print(f"\nSelected {len(cols_to_keep) - 2} variables from {dataset_name}")
+        print()
+
+    output_1_final_collapsed, ext_vars_join_report = join_on_keys(selected_ext_datasets, keys = ['cycle', 'district'], how = 'left')
+    print("(missing: district-cycles of OUTPUT_1_final_collapsed not in the dataset; dropped: district-cycles of the dataset not in OUTPUT_1_final_collapsed)")
+    print(ext_vars_join_report[['missing', 'dropped', 'duplicated']])
+
+    print("Merge complete!")
+    print(f"OUTPUT_1_final_collapsed now has {len(output_1_final_collapsed.columns)} columns")
+
+    return output_1_final_collapsed
+
+#%%
+
+### REGISTRY
+
+# Datasets of outputs.py, in the order they are built: name ->
+# - builder: function building the dataset
+# - inputs: names of the datasets given to the builder, in order (datasets of the registry, or the inputs of outputs.py:
+#   OUTPUT_1, OUTPUT_1_recipients, special_elections, election_dates_df, gen_elect_df, new_districts_df and new_districts_df_party)
+# - kind: 'output' (saved, and spliced in the incremental mode), 'merged' (saved, merged from the spliced outputs) or
+#   'intermediate' (shared by several outputs, not saved)
+# Every dataset is freed once the last dataset built from it is done (see build_order)
+OUTPUT_BUILDERS = {
+    'aggregated_outputs': {'builder': create_aggregated_outputs, 'inputs': ['OUTPUT_1'], 'kind': 'intermediate'},
+    'OUTPUT_2': {'builder': build_output_2, 'inputs': ['aggregated_outputs', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_3': {'builder': build_output_3, 'inputs': ['aggregated_outputs', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_4_1': {'builder': build_output_4_1, 'inputs': ['aggregated_outputs', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_4_2': {'builder': build_output_4_2, 'inputs': ['aggregated_outputs', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_4': {'builder': build_output_4, 'inputs': ['OUTPUT_4_1', 'OUTPUT_4_2'], 'kind': 'output'},
+    'OUTPUT_5': {'builder': build_output_5, 'inputs': ['OUTPUT_1', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_6': {'builder': build_output_6, 'inputs': ['gen_elect_df', 'OUTPUT_1_recipients', 'OUTPUT_2', 'new_districts_df',
+                                                       'new_districts_df_party', 'election_dates_df'], 'kind': 'output'},
+    'OUTPUT_7': {'builder': build_output_7, 'inputs': ['OUTPUT_1', 'new_districts_df', 'special_elections'], 'kind': 'output'},
+    'OUTPUT_8': {'builder': build_output_8, 'inputs': ['OUTPUT_1', 'new_districts_df'], 'kind': 'output'},
+    'OUTPUT_9': {'builder': build_output_9, 'inputs': ['OUTPUT_1', 'OUTPUT_1_recipients', 'new_districts_df'], 'kind': 'output'},
+    'treatment_windows': {'builder': flag_treatment_windows, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'special_elections'], 'kind': 'intermediate'},
+    'treated_aggregates': {'builder': aggregate_treated_slices, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'treatment_windows'], 'kind': 'intermediate'},
+    'OUTPUT_2_ext': {'builder': build_output_2_ext, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'OUTPUT_2', 'special_elections',
+                                                               'treatment_windows', 'treated_aggregates'], 'kind': 'output'},
+    'OUTPUT_3_ext': {'builder': build_output_3_ext, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'OUTPUT_3', 'special_elections',
+                                                               'treatment_windows', 'treated_aggregates', 'OUTPUT_2_ext'], 'kind': 'output'},
+    'OUTPUT_4_1_ext': {'builder': build_output_4_1_ext, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'OUTPUT_4_1', 'special_elections',
+                                                                   'treatment_windows', 'treated_aggregates', 'OUTPUT_2_ext'], 'kind': 'output'},
+    'OUTPUT_4_2_ext': {'builder': build_output_4_2_ext, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'OUTPUT_4_2', 'special_elections',
+                                                                   'treatment_windows', 'treated_aggregates', 'OUTPUT_2_ext'], 'kind': 'output'},
+    'OUTPUT_8_ext': {'builder': build_output_8_ext, 'inputs': ['OUTPUT_1', 'OUTPUT_7', 'OUTPUT_8', 'special_elections',
+                                                               'treatment_windows', 'OUTPUT_2_ext'], 'kind': 'output'},
+    'OUTPUT_1_final_collapsed_ext': {'builder': build_output_1_final_collapsed_ext, 'inputs': [
+        'OUTPUT_2_ext', 'OUTPUT_3_ext', 'OUTPUT_4_1_ext', 'OUTPUT_4_2_ext', 'OUTPUT_8_ext'], 'kind': 'merged'},
+    'OUTPUT_1_final_collapsed': {'builder': build_output_1_final_collapsed, 'inputs': [
+        'OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4', 'OUTPUT_5', 'OUTPUT_6', 'OUTPUT_7', 'OUTPUT_8', 'OUTPUT_9',
+        'OUTPUT_2_ext', 'OUTPUT_3_ext', 'OUTPUT_4_1_ext', 'OUTPUT_4_2_ext', 'OUTPUT_8_ext'], 'kind': 'merged'}
+    }
+
+#%%
+
+### FUNCTIONS
+
+def build_order(names = None):
+    """
+    Datasets of OUTPUT_BUILDERS to build, in the order of the registry, to get the datasets names, and for each of
+    them the datasets that are no longer needed once it is built: the inputs of outputs.py (e.g. OUTPUT_1) and the
+    datasets of the registry whose last use it is, except the datasets of names.
+
+    Parameters:
+    -----------
+    names : list, optional
+        Datasets wanted, kept to the end (all datasets of the registry if None, each freed after its last use: outputs.py
+        saves every output as soon as it is built)
+
+    Returns:
+    --------
+    list
+        (name, datasets to free) for every dataset to build
+    """
+    # Datasets needed, from the last one back to the first
+    needed = set(OUTPUT_BUILDERS if names is None else names)
+    for name in reversed(list(OUTPUT_BUILDERS)):
+        if name in needed:
+            needed.update(input_name for input_name in OUTPUT_BUILDERS[name]['inputs'] if input_name in OUTPUT_BUILDERS)
+    order = [name for name in OUTPUT_BUILDERS if name in needed]
+
+    # Last dataset built from each dataset
+    last_use = {}
+    for name in order:
+        for input_name in OUTPUT_BUILDERS[name]['inputs']:
+            last_use[input_name] = name
+
+    return [
+        (name, [input_name for input_name, last in last_use.items() if last == name and (names is None or input_name not in names)])
+        for name in order
+        ]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Peak memory of each stage of outputs.py (reading datasets, each dataset of OUTPUT_BUILDERS and
+## saving), to check which stage drives the memory use of a run
+
+
+### LIBRARIES
+
+import os
+import time
+import threading
+import pandas as pd
+
+# psutil is only needed for the memory report on Windows and macOS (on Linux the memory is read from /proc)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+#%%
+
+### SETUP
+
+# Seconds between two readings of the memory of the process
+SAMPLING_INTERVAL = 0.05
+
+#%%
+
+### FUNCTIONS
+
+def process_memory():
+    """
+    Resident memory of this process, in bytes (None if it cannot be read: no psutil and no /proc).
+
+    Returns:
+    --------
+    int or None
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    return None
+
+
+def _sample(state):
+    """Keep the highest memory of the current stage, read every SAMPLING_INTERVAL seconds until the report is closed"""
+    while not state['closed'].wait(SAMPLING_INTERVAL):
+        memory = process_memory()
+        with state['lock']:
+            state['peak'] = max(state['peak'], memory)
+
+
+def open_memory_report(enabled):
+    """
+    Start measuring the memory of the stages (nothing is measured if enabled is False).
+
+    The memory of the process is read in a background thread, so the run is not slowed down. Peaks shorter
+    than SAMPLING_INTERVAL may be missed.
+
+    Parameters:
+    -----------
+    enabled : bool
+        Whether to measure the memory of the stages
+
+    Returns:
+    --------
+    dict
+        State of the report, passed to start_stage and close_memory_report
+    """
+    if enabled and process_memory() is None:
+        print("Warning: the memory of the process cannot be read (install psutil), no memory report")
+        enabled = False
+
+    state = {'enabled': enabled, 'stage': None, 'start': None, 'peak': 0, 'stages': [],
+             'lock': threading.Lock(), 'closed': threading.Event()}
+    if enabled:
+        threading.Thread(target = _sample, args = (state,), daemon = True).start()
+    return state
+
+
+def _end_stage(state):
+    """Record the peak and final memory, and the time, of the current stage"""
+    if state['stage'] is None:
+        return
+    memory = process_memory()
+    with state['lock']:
+        peak = max(state['peak'], memory)
+    state['stages'].append({
+        'stage': state['stage'],
+        'peak_MB': round(peak / 2**20, 1),
+        'end_MB': round(memory / 2**20, 1),
+        'seconds': round(time.time() - state['start'], 1)
+        })
+    state['stage'] = None
+
+
+def start_stage(state, stage):
+    """
+    End the current stage and start measuring a new one.
+
+    Parameters:
+    -----------
+    state : dict
+        Output of open_memory_report
+    stage : str
+        Name of the new stage
+    """
+    if not state['enabled']:
+        return
+    _end_stage(state)
+    memory = process_memory()
+    with state['lock']:
+        state['peak'] = memory
+    state['stage'] = stage
+    state['start'] = time.time()
+
+
+def close_memory_report(state):
+    """
+    End the current stage and print the memory of all stages: the peak memory of the process during the stage,
+    and its memory at the end of the stage (which includes the datasets kept for the next stages).
+
+    Parameters:
+    -----------
+    state : dict
+        Output of open_memory_report
+
+    Returns:
+    --------
+    DataFrame or None
+        One row per stage with peak_MB, end_MB and seconds (None if the report is not enabled)
+    """
+    if not state['enabled']:
+        return None
+    _end_stage(state)
+    state['closed'].set()
+
+    report = pd.DataFrame(state['stages']).set_index('stage')
+    print("\nMemory of the process by stage (MB):")
+    print(report)
+    return report
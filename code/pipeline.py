@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Feb 12 11:18:52 2025
+
+@author: lirhoxhaj
+"""
+
+## PURPOSE OF FILE: Building the datasets of convert_html_to_csv.py, convert_html_to_csv_2.py, main.py and outputs.py in
+## memory, from Python, on any data folder. The functions here call the same builders as the scripts
+## (convert_scripts/special_elections_builders.py, convert_scripts/new_districts_builders.py,
+## main_scripts/output_1_builders.py and outputs_scripts/output_builders.py) and return DataFrames: they do not write any file, show any plot or set any
+## environment variable. The scripts read the inputs and save the outputs, running them is the job of run.py.
+## Importing this file does not read any data, so its functions can also be run in worker processes
+## (e.g. with concurrent.futures.ProcessPoolExecutor).
+##
+## Example:
+##     import pipeline
+##     new_districts = pipeline.convert_new_districts()
+##     contribDB_all = pipeline.load_contributions(range(1980, 2006, 2))
+##     output_1 = pipeline.build_output_1(contribDB_all)
+##     outputs = pipeline.build_outputs(['OUTPUT_2', 'OUTPUT_9'], output_1['OUTPUT_1'], output_1['OUTPUT_1_recipients'])
+##     output_7 = pipeline.build_output('OUTPUT_7', output_1['OUTPUT_1'], output_1['OUTPUT_1_recipients'])
+
+
+### LIBRARIES
+
+import os
+import sys
+
+# Helper scripts of the converters, main.py and outputs.py (imported when the functions below are called)
+code_folder = os.path.dirname(os.path.abspath(__file__))
+for helper_folder in [os.path.join(code_folder, folder) for folder in ["convert_scripts", "main_scripts", "outputs_scripts"]]:
+    if helper_folder not in sys.path:
+        sys.path.insert(0, helper_folder)
+
+#%%
+
+### FUNCTIONS
+
+def default_data_folder(data_folder = None):
+    """
+    Data folder of the pipeline: the given one, else that of the environment variable DIME_DATA_FOLDER, else the
+    folder 'data' next to the folder of this file.
+
+    Returns:
+    --------
+    str
+    """
+    if data_folder is None:
+        data_folder = os.environ.get("DIME_DATA_FOLDER", os.path.join(os.path.dirname(code_folder), "data"))
+    return data_folder
+
+
+## CONVERTERS
+
+def convert_special_elections(data_folder = None):
+    """
+    Special elections data of convert_html_to_csv.py, without saving special_elections_final.csv
+    (see convert_scripts/special_elections_builders.py).
+
+    Returns:
+    --------
+    DataFrame
+        special_elections_final
+    """
+    from special_elections_builders import build_special_elections
+    return build_special_elections(default_data_folder(data_folder))
+
+
+def convert_new_districts(data_folder = None):
+    """
+    Districts data of convert_html_to_csv_2.py, without saving new_districts.csv and new_districts_filtered_all.csv
+    (see convert_scripts/new_districts_builders.py).
+
+    Returns:
+    --------
+    dict
+        new_districts and new_districts_filtered_all
+    """
+    from new_districts_builders import build_new_districts
+
+    new_districts, new_districts_filtered_all = build_new_districts(default_data_folder(data_folder))
+    return {'new_districts': new_districts, 'new_districts_filtered_all': new_districts_filtered_all}
+
+
+## INPUTS
+
+def load_contributions(years, n_workers = 1, chunksize = 1_000_000, cache_folder = None, data_folder = None):
+    """
+    Read, filter and append the contribDB files of several cycles, as in main.py (see main_scripts/read_contribDB.py).
+
+    Parameters:
+    -----------
+    years : iterable of int
+        Cycles to read (missing files are skipped)
+    n_workers : int, optional
+        Number of processes reading files in parallel
+    chunksize : int or None, optional
+        Number of rows of each file read at a time
+    cache_folder : str or None, optional
+        Folder of the Parquet cache of filtered cycles: None reads the csv files (and writes nothing), 'default' uses
+        (and updates) the cache of main.py
+    data_folder : str, optional
+        See default_data_folder
+
+    Returns:
+    --------
+    DataFrame
+        contribDB_all, which can be given to build_output_1
+    """
+    from read_contribDB import read_contribDB_cycles
+    from contrib_schema import concat_frames
+
+    data_folder = default_data_folder(data_folder)
+    if cache_folder == 'default':
+        cache_folder = os.path.join(data_folder, "cache", "contribDB")
+
+    contribDB_dict = read_contribDB_cycles(data_folder, years, n_workers = n_workers, chunksize = chunksize, cache_folder = cache_folder)
+    return concat_frames(contribDB_dict.values())
+
+
+def load_recipients(data_folder = None):
+    """
+    Recipients of main.py (INPUT 2): candidates to the House of Representatives, with their districts fixed.
+
+    Returns:
+    --------
+    DataFrame
+    """
+    import output_1_builders as O1B
+
+    recipients = O1B.read_recipients(default_data_folder(data_folder))
+    recipients = O1B.filter_recipients(recipients)
+    recipients, _, _ = O1B.fix_recipient_districts(recipients)
+    return recipients
+
+
+def load_special_elections(data_folder = None):
+    """Special elections data, special_elections_final.csv (see convert_html_to_csv.py)"""
+    import pandas as pd
+    return pd.read_csv(os.path.join(default_data_folder(data_folder), "special_elections_final.csv"), encoding='latin-1')
+
+
+def load_election_dates(data_folder = None):
+    """General election dates of each cycle, election_dates.csv"""
+    import pandas as pd
+    return pd.read_csv(os.path.join(default_data_folder(data_folder), "election_dates.csv"), encoding='latin-1')
+
+
+def load_general_elections(cycles, data_folder = None):
+    """
+    MIT US House 1976 - 2024 elections data of outputs.py (see prepare_general_elections in
+    outputs_scripts/output_builders.py).
+
+    Parameters:
+    -----------
+    cycles : array-like
+        Cycles to keep (those of OUTPUT_1)
+    data_folder : str, optional
+        See default_data_folder
+
+    Returns:
+    --------
+    DataFrame
+        gen_elect_df
+    """
+    import pandas as pd
+    from output_builders import prepare_general_elections
+
+    gen_elect_df = pd.read_csv(os.path.join(default_data_folder(data_folder), "1976-2024-house.csv"), encoding='utf-8')
+    return prepare_general_elections(gen_elect_df, cycles)
+
+
+def load_universe(cycles, data_folder = None):
+    """
+    Universe of district-cycles of outputs.py, and of district-cycle-parties (see outputs_scripts/district_universe.py).
+
+    Parameters:
+    -----------
+    cycles : array-like
+        Cycles of OUTPUT_1
+    data_folder : str, optional
+        See default_data_folder
+
+    Returns:
+    --------
+    tuple
+        (new_districts_df, new_districts_df_party)
+    """
+    from output_builders import prepare_universe
+    from district_universe import district_universe, party_universe
+
+    new_districts_df = prepare_universe(district_universe(os.path.join(default_data_folder(data_folder), "new_districts_filtered_all.csv")), cycles)
+    new_districts_df_party = party_universe(new_districts_df)[['district', 'cycle', 'party']]
+    return new_districts_df, new_districts_df_party
+
+
+## OUTPUTS
+
+def build_output_1(contribDB_all = None, years = range(1980, 2006, 2), data_folder = None):
+    """
+    Contribution-level datasets of main.py, without its plots (see main_scripts/output_1_builders.py).
+
+    Parameters:
+    -----------
+    contribDB_all : DataFrame, optional
+        Contributions from load_contributions, used instead of reading the contribDB files of years
+    years : iterable of int, optional
+        Cycles read when contribDB_all is not given (those of main.py by default)
+    data_folder : str, optional
+        See default_data_folder
+
+    Returns:
+    --------
+    dict
+        OUTPUT_1, OUTPUT_1_recipients and OUTPUT_1_dict
+    """
+    import output_1_builders as O1B
+    from create_output_1_dict import OUTPUT_1_dict_df
+
+    if contribDB_all is None:
+        contribDB_all = load_contributions(years, data_folder = data_folder)
+
+    datasets = O1B.create_output_1(
+        contribDB_all,
+        load_recipients(data_folder),
+        load_special_elections(data_folder),
+        load_election_dates(data_folder)
+        )
+    datasets['OUTPUT_1_dict'] = OUTPUT_1_dict_df.copy()
+    return datasets
+
+
+def build_outputs(names = None, OUTPUT_1 = None, OUTPUT_1_recipients = None, data_folder = None):
+    """
+    District-cycle datasets of outputs.py, built by the functions of OUTPUT_BUILDERS (see outputs_scripts/output_builders.py).
+    Only the datasets needed for names are built.
+
+    Parameters:
+    -----------
+    names : list, optional
+        Datasets of OUTPUT_BUILDERS wanted (e.g. ['OUTPUT_2', 'OUTPUT_9']). None builds all outputs of outputs.py,
+        and adds the dictionaries OUTPUT_1_final_collapsed_dict and OUTPUT_1_final_collapsed_dict_ext
+    OUTPUT_1, OUTPUT_1_recipients : DataFrame, optional
+        Outputs of build_output_1, used instead of reading the files of OUTPUT_1 and OUTPUT_1_recipients saved by main.py
+    data_folder : str, optional
+        See default_data_folder
+
+    Returns:
+    --------
+    dict
+        Name of the dataset -> DataFrame, for names (or every output of outputs.py)
+    """
+    from contrib_schema import apply_schema
+    from handoff import read_handoff
+    from output_builders import OUTPUT_BUILDERS, build_order
+
+    data_folder = default_data_folder(data_folder)
+    if OUTPUT_1 is None:
+        OUTPUT_1 = read_handoff(os.path.join(data_folder, "OUTPUTS"), "OUTPUT_1")
+    else:
+        OUTPUT_1 = apply_schema(OUTPUT_1.reset_index(drop = True))
+    if OUTPUT_1_recipients is None:
+        OUTPUT_1_recipients = read_handoff(os.path.join(data_folder, "OUTPUTS"), "OUTPUT_1_recipients")
+    else:
+        OUTPUT_1_recipients = apply_schema(OUTPUT_1_recipients.reset_index(drop = True))
+
+    cycles = OUTPUT_1['cycle'].unique()
+    new_districts_df, new_districts_df_party = load_universe(cycles, data_folder)
+    datasets = {
+        'OUTPUT_1': OUTPUT_1,
+        'OUTPUT_1_recipients': OUTPUT_1_recipients,
+        'special_elections': load_special_elections(data_folder),
+        'election_dates_df': load_election_dates(data_folder),
+        'gen_elect_df': load_general_elections(cycles, data_folder),
+        'new_districts_df': new_districts_df,
+        'new_districts_df_party': new_districts_df_party
+        }
+    del OUTPUT_1, OUTPUT_1_recipients, new_districts_df, new_districts_df_party
+
+    # Datasets built in the order of the registry, every dataset freed once the last dataset built from it is done
+    # (except those wanted)
+    wanted = names if names is not None else [name for name, builder in OUTPUT_BUILDERS.items() if builder['kind'] != 'intermediate']
+    for name, freed in build_order(wanted):
+        builder = OUTPUT_BUILDERS[name]
+        datasets[name] = builder['builder'](*[datasets[input_name] for input_name in builder['inputs']])
+        for input_name in freed:
+            del datasets[input_name]
+
+    outputs = {name: datasets[name] for name in wanted}
+    if names is None:
+        from create_dict import OUTPUT_1_final_collapsed_dict_df, OUTPUT_1_final_collapsed_ext_dict_df
+        outputs['OUTPUT_1_final_collapsed_dict'] = OUTPUT_1_final_collapsed_dict_df.copy()
+        outputs['OUTPUT_1_final_collapsed_dict_ext'] = OUTPUT_1_final_collapsed_ext_dict_df.copy()
+    return outputs
+
+
+def build_output(name, OUTPUT_1 = None, OUTPUT_1_recipients = None, data_folder = None):
+    """
+    One dataset of OUTPUT_BUILDERS (e.g. 'OUTPUT_7'), with the datasets it is built from, see build_outputs.
+
+    Returns:
+    --------
+    DataFrame
+    """
+    return build_outputs([name], OUTPUT_1, OUTPUT_1_recipients, data_folder)[name]
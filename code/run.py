@@ -6,29 +6,28 @@ Created on Tue Feb 18 16:53:37 2025
 @author: lirhoxhaj
 """
 
-## PURPOSE OF FILE: Running all Python scripts by order
+## PURPOSE OF FILE: Running all Python scripts as a pipeline of stages (convert_html_to_csv, convert_html_to_csv_2, main
+## and outputs). Each stage declares the files it reads and writes, so stages run once the stages they depend on are done,
+## independent stages run at the same time, and stages whose inputs and code did not change since their last run are skipped.
 
 #%%
 
 ### LIBRARIES
 
 import os
-import inspect
-import pandas as pd
-import numpy as np
-from pathlib import Path
-import matplotlib.pyplot as plt
-import seaborn as sns
-from bs4 import BeautifulSoup
-import re
-from datetime import datetime
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 
 #%%
 
 ### SETUP
 
-# These lines will get the location of this file '\code\main.py'. Please ensure file is saved in folder \code. 
+# These lines will get the location of this file '\code\main.py'. Please ensure file is saved in folder \code.
 
 # This line does not work in interactive environment (e.g., Jupyter Notebook or interpreters like IDLE)
 # code_folder = os.path.dirname(os.path.abspath(__file__))
@@ -40,53 +39,303 @@ from datetime import datetime
 code_folder = "/Users/lirhoxhaj/Library/CloudStorage/OneDrive-ImperialCollegeLondon/Desktop/RA/Tommaso/Contributions_Paper/working_folder_lir/code"
 code_folder = r"C:\Users\lhoxhaj\OneDrive - Imperial College London\Desktop\RA\Tommaso\Contributions_Paper\working_folder_lir\code"
 
+# Folders set from outside this file with the environment variables DIME_CODE_FOLDER and DIME_DATA_FOLDER take 
+# precedence over the lines above. The stages are run with the folders of this file (see run_stage).
+code_folder = os.environ.get("DIME_CODE_FOLDER", code_folder)
+
 # This is your working folder where folders '\code' and '\data' are saved
 parent_folder = os.path.dirname(code_folder)
 
-data_folder = os.path.join(parent_folder, "data")
+data_folder = os.environ.get("DIME_DATA_FOLDER", os.path.join(parent_folder, "data"))
 
 print("Parent folder:", parent_folder, "\n")
 print("Code folder:", code_folder, "\n")
 print("Data folder:", data_folder, "\n")
 
+# Folder with the record of the last run of each stage and the logs of the stages
+pipeline_cache_folder = os.path.join(data_folder, "cache", "pipeline")
+
+# Number of stages run at the same time (only stages that do not depend on each other)
+n_parallel_stages = 2
+
+# Stages to run even if their inputs and code did not change (e.g. ['outputs'])
+force_stages = []
+
 
 #%%
 
-### MODULES
-import convert_html_to_csv
-import convert_html_to_csv_2
-import main
-import outputs
+### STAGES
+
+# Each stage is a script in \code with:
+# - code: other scripts it imports (paths relative to \code), which are part of its signature together with the script
+# - inputs: files it reads (paths relative to \data)
+# - outputs: files it writes (paths relative to \data)
+# - optional_outputs (if any): outputs that a successful run may not write
+# A stage depends on the stages writing its inputs. The helper modules of outputs.py (outputs_scripts\create_ext_vars.py
+# and outputs_scripts\create_dict.py) are imported by it rather than run on their own, so they are code of the outputs stage.
+STAGES = {
+    'convert_html_to_csv': {
+        'script': 'convert_html_to_csv.py',
+        'code': ['convert_scripts/special_elections_builders.py'],
+        'inputs': ['special_elections.html', 'Deaths.csv', 'election_dates.csv', 'special_elections_final_DEATHS_specialdata.xlsx'],
+        'outputs': ['special_elections_final.csv']
+        },
+    'convert_html_to_csv_2': {
+        'script': 'convert_html_to_csv_2.py',
+        'code': ['convert_scripts/new_districts_builders.py'],
+        'inputs': ['new_districts.html'],
+        'outputs': ['new_districts.csv', 'new_districts_filtered_all.csv']
+        },
+    'main': {
+        'script': 'main.py',
+        'code': ['main_scripts/read_contribDB.py', 'main_scripts/contrib_schema.py', 'main_scripts/handoff.py',
+                 'main_scripts/special_elections_index.py', 'main_scripts/treatment_windows.py',
+                 'main_scripts/output_1_builders.py', 'main_scripts/plot_treatments.py', 'main_scripts/create_output_1_dict.py'],
+        'inputs': [f'contribDB_{year}.csv' for year in range(1980, 2006, 2)] + # cycles read in main.py
+                  ['dime_recipients_1979_2024.csv', 'special_elections_final.csv', 'election_dates.csv'],
+        'outputs': ['OUTPUTS/OUTPUT_1.parquet', 'OUTPUTS/OUTPUT_1_recipients.parquet',
+                    'OUTPUTS/OUTPUT_1.csv', 'OUTPUTS/OUTPUT_1_corp.csv', 'OUTPUTS/OUTPUT_1_ind.csv', 'OUTPUTS/OUTPUT_1_dict.csv',
+                    'OUTPUTS/OUTPUT_1_recipients.csv',
+                    'district_in_federalhouse_recipients_problem.csv', 'district_in_federalhouse_recipients_solved.csv'],
+        # OUTPUT_1 and OUTPUT_1_recipients are saved as Parquet files, as csv files, or both (see save_output_1_csv in main.py
+        # and main_scripts/handoff.py)
+        'optional_outputs': ['OUTPUTS/OUTPUT_1.parquet', 'OUTPUTS/OUTPUT_1_recipients.parquet',
+                             'OUTPUTS/OUTPUT_1.csv', 'OUTPUTS/OUTPUT_1_corp.csv', 'OUTPUTS/OUTPUT_1_ind.csv',
+                             'OUTPUTS/OUTPUT_1_recipients.csv']
+        },
+    'outputs': {
+        'script': 'outputs.py',
+        'code': ['outputs_scripts/aggregate_slices.py', 'outputs_scripts/hedging_cube.py', 'outputs_scripts/district_universe.py',
+                 'outputs_scripts/multiway_join.py', 'outputs_scripts/stage_memory.py',
+                 'outputs_scripts/create_ext_vars.py', 'outputs_scripts/output_builders.py',
+                 'outputs_scripts/create_dict.py', 'outputs_scripts/incremental.py', 'main_scripts/contrib_schema.py',
+                 'main_scripts/handoff.py', 'main_scripts/treatment_windows.py'],
+        'inputs': ['OUTPUTS/OUTPUT_1.parquet', 'OUTPUTS/OUTPUT_1_recipients.parquet',
+                   'OUTPUTS/OUTPUT_1.csv', 'OUTPUTS/OUTPUT_1_recipients.csv', 'special_elections_final.csv',
+                   'election_dates.csv', '1976-2024-house.csv', 'new_districts_filtered_all.csv'],
+        'outputs': ['new_districts_filtered_universe.csv', 'new_districts_filtered_universe_party.csv'] +
+                   [f'OUTPUTS/{name}.csv' for name in [
+                       'OUTPUT_2', 'OUTPUT_3', 'OUTPUT_4_1', 'OUTPUT_4_2', 'OUTPUT_4', 'OUTPUT_5', 'OUTPUT_6',
+                       'OUTPUT_7', 'OUTPUT_8', 'OUTPUT_9', 'OUTPUT_2_ext', 'OUTPUT_3_ext', 'OUTPUT_4_1_ext',
+                       'OUTPUT_4_2_ext', 'OUTPUT_8_ext', 'OUTPUT_1_final_collapsed', 'OUTPUT_1_final_collapsed_dict',
+                       'OUTPUT_1_final_collapsed_ext', 'OUTPUT_1_final_collapsed_dict_ext']]
+        }
+    }
+
 
 #%%
 
-### FUNCTIONALITY
+### FUNCTIONS
 
-print("=" * 80)
-print("STEP 1: Running convert_html_to_csv")
-print("=" * 80)
-# Run the entire script
-convert_html_to_csv.run_module('convert_html_to_csv', run_name='__main__')
+def file_hash(file_path, known_hashes):
+    """
+    SHA-256 of the contents of a file (None if it does not exist). Hashes are kept in known_hashes with the
+    size and modification time of the file, and only computed again when these change.
 
-print("\n" + "=" * 80)
-print("STEP 2: Running convert_html_to_csv_2")
-print("=" * 80)
-convert_html_to_csv_2.run_module('convert_html_to_csv_2', run_name='__main__')
+    Parameters:
+    -----------
+    file_path : str
+        Path of the file
+    known_hashes : dict
+        Path -> {'size', 'mtime_ns', 'sha256'}, updated in place
 
-print("\n" + "=" * 80)
-print("STEP 3: Running main")
-print("=" * 80)
-main.run_module('main', run_name='__main__')
+    Returns:
+    --------
+    str or None
+    """
+    if not os.path.exists(file_path):
+        return None
+    stat = os.stat(file_path)
+    known = known_hashes.get(file_path)
+    if known is not None and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['sha256']
 
-print("\n" + "=" * 80)
-print("STEP 4: Running outputs")
-print("=" * 80)
-outputs.run_module('outputs', run_name='__main__')
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(2**24), b''):
+            sha.update(block)
+    known_hashes[file_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha.hexdigest()}
+    return sha.hexdigest()
 
-print("\n" + "=" * 80)
-print("All scripts completed successfully!")
-print("=" * 80)
+
+def stage_dependencies(stages):
+    """
+    Stages each stage depends on: the stages writing one of its inputs.
+
+    Parameters:
+    -----------
+    stages : dict
+        Stage name -> definition, as in STAGES
+
+    Returns:
+    --------
+    dict
+        Stage name -> set of stage names
+    """
+    writers = {output: name for name, stage in stages.items() for output in stage['outputs']}
+    return {
+        name: {writers[file_name] for file_name in stage['inputs'] if file_name in writers and writers[file_name] != name}
+        for name, stage in stages.items()
+        }
+
+
+def stage_key(stage, known_hashes):
+    """
+    Content address of a stage: hash of its script, the code it imports and its inputs (missing files included as such)
+    and of the Python version. The stage needs to run again whenever its key changes.
+
+    Parameters:
+    -----------
+    stage : dict
+        Definition of the stage, as in STAGES
+    known_hashes : dict
+        See file_hash
+
+    Returns:
+    --------
+    str
+    """
+    contents = {'python': sys.version}
+    for file_name in [stage['script']] + stage['code']:
+        contents[f'code/{file_name}'] = file_hash(os.path.join(code_folder, file_name), known_hashes)
+    for file_name in stage['inputs']:
+        contents[f'data/{file_name}'] = file_hash(os.path.join(data_folder, file_name), known_hashes)
+    return hashlib.sha256(json.dumps(contents, sort_keys = True).encode('utf-8')).hexdigest()[:16]
 
 
+def stage_outputs(stage, known_hashes):
+    """Hashes of the outputs of a stage: file name -> SHA-256 (None if missing)"""
+    return {file_name: file_hash(os.path.join(data_folder, file_name), known_hashes) for file_name in stage['outputs']}
 
 
+def run_stage(name, stage, log_folder):
+    """
+    Run the script of a stage in its own Python process, from the code folder, with its output in {log_folder}/{name}.log.
+    The script uses the code and data folders of this file (environment variables DIME_CODE_FOLDER and DIME_DATA_FOLDER).
+
+    Returns:
+    --------
+    tuple
+        (return code of the script, seconds it took)
+    """
+    start = time.time()
+    with open(os.path.join(log_folder, f"{name}.log"), 'w') as log:
+        env = dict(os.environ, DIME_CODE_FOLDER = code_folder, DIME_DATA_FOLDER = data_folder)
+        process = subprocess.run([sys.executable, stage['script']], cwd = code_folder, env = env, stdout = log, stderr = subprocess.STDOUT)
+    return process.returncode, time.time() - start
+
+
+def run_pipeline(stages, cache_folder, n_parallel = 1, force = ()):
+    """
+    Run the stages in the order of their dependencies, skipping the stages that are up to date.
+
+    A stage is up to date when its key (see stage_key) and the hashes of its outputs are those recorded after
+    its last successful run, so that a stage also runs again when one of its outputs was changed or removed.
+    Stages whose dependencies are done run at the same time, up to n_parallel. When a stage fails, the stages
+    depending on it are not run.
+
+    Parameters:
+    -----------
+    stages : dict
+        Stage name -> definition, as in STAGES
+    cache_folder : str
+        Folder of the records of the stages ({cache_folder}/stages.json) and of the logs ({cache_folder}/logs)
+    n_parallel : int
+        Number of stages run at the same time
+    force : list
+        Stages to run even if they are up to date
+
+    Returns:
+    --------
+    dict
+        Stage name -> 'skipped', 'done', 'failed' or 'not run'
+    """
+    log_folder = os.path.join(cache_folder, "logs")
+    os.makedirs(log_folder, exist_ok = True)
+    records_path = os.path.join(cache_folder, "stages.json")
+    hashes_path = os.path.join(cache_folder, "file_hashes.json")
+    records, known_hashes = {}, {}
+    if os.path.exists(records_path):
+        with open(records_path) as f:
+            records = json.load(f)
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as f:
+            known_hashes = json.load(f)
+
+    dependencies = stage_dependencies(stages)
+    status = {}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers = max(1, n_parallel)) as executor:
+        while pending or running:
+            progress = False
+            for name in list(pending):
+                if any(status.get(dependency) in ['failed', 'not run'] for dependency in dependencies[name]):
+                    pending.remove(name)
+                    progress = True
+                    status[name] = 'not run'
+                    print(f"-> {name}: not run, a stage it depends on failed")
+                elif all(status.get(dependency) in ['skipped', 'done'] for dependency in dependencies[name]) and len(running) < n_parallel:
+                    pending.remove(name)
+                    progress = True
+                    key = stage_key(stages[name], known_hashes)
+                    record = records.get(name)
+                    if name not in force and record is not None and record['key'] == key \
+                            and record['outputs'] == stage_outputs(stages[name], known_hashes):
+                        status[name] = 'skipped'
+                        print(f"-> {name}: up to date, skipped")
+                        continue
+                    print(f"-> {name}: running {stages[name]['script']} (log: {os.path.join(log_folder, name + '.log')})")
+                    running[executor.submit(run_stage, name, stages[name], log_folder)] = (name, key)
+
+            if not running:
+                if pending and not progress:
+                    raise ValueError(f"Stages {pending} depend on each other")
+                continue
+
+            finished, _ = wait(running, return_when = FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                return_code, seconds = future.result()
+                outputs = stage_outputs(stages[name], known_hashes)
+                missing = [file_name for file_name, sha in outputs.items() if sha is None and file_name not in stages[name].get('optional_outputs', [])]
+                if return_code != 0 or missing:
+                    status[name] = 'failed'
+                    records.pop(name, None)
+                    reason = f"exit code {return_code}" if return_code != 0 else f"missing outputs {missing}"
+                    print(f"-> {name}: FAILED after {seconds:.0f}s ({reason}), see {os.path.join(log_folder, name + '.log')}")
+                else:
+                    status[name] = 'done'
+                    records[name] = {'key': key, 'outputs': outputs}
+                    print(f"-> {name}: done in {seconds:.0f}s")
+
+                with open(records_path, 'w') as f:
+                    json.dump(records, f, indent = 1)
+
+    with open(hashes_path, 'w') as f:
+        json.dump(known_hashes, f)
+
+    return status
+
+
+#%%
+
+### FUNCTIONALITY
+
+print("=" * 80)
+print("Running stages:", ", ".join(STAGES))
+print("=" * 80)
+
+pipeline_status = run_pipeline(STAGES, pipeline_cache_folder, n_parallel = n_parallel_stages, force = force_stages)
+
+print("\n" + "=" * 80)
+for stage_name, stage_status in pipeline_status.items():
+    print(f"{stage_name}: {stage_status}")
+if all(stage_status in ['skipped', 'done'] for stage_status in pipeline_status.values()):
+    print("All scripts completed successfully!")
+    print("=" * 80)
+else:
+    print("Some scripts failed!")
+    print("=" * 80)
+    sys.exit(1)